@@ -0,0 +1,73 @@
+"""
+Compares two result files of `benchmarks.run`, for example of the main branch and of a merge request.
+
+```
+python -m benchmarks.compare baseline.json results.json --threshold 0.1
+```
+
+Exits with 1 if the median time or the peak memory of a benchmark grew by more than the threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[Tuple[str, str, float, float, bool]]:
+    """Compare the benchmarks contained in both results.
+
+    Args:
+        baseline (Dict[str, Any]): The results to compare against.
+        current (Dict[str, Any]): The new results.
+        threshold (float): The allowed relative growth, like 0.1 for 10 %.
+
+    Returns:
+        List[Tuple[str, str, float, float, bool]]: For every benchmark and metric, the baseline value, the
+            current value and whether the growth exceeds the threshold.
+    """
+    rows: List[Tuple[str, str, float, float, bool]] = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        for metric in ("median", "peak_bytes"):
+            old, new = before[metric], result[metric]
+            rows.append(
+                (name, metric, old, new, old > 0 and new > old * (1 + threshold))
+            )
+    return rows
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.compare",
+        description=__doc__.split("\n\n")[0].strip(),
+    )
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as stream:
+        baseline = json.load(stream)
+    with open(args.current, encoding="utf-8") as stream:
+        current = json.load(stream)
+
+    if baseline["meta"]["shape"] != current["meta"]["shape"]:
+        print("warning: the results were measured with different pipeline shapes")
+
+    rows = compare(baseline, current, args.threshold)
+    for name, metric, old, new, regressed in rows:
+        change = (new / old - 1) * 100 if old else 0.0
+        marker = "  REGRESSION" if regressed else ""
+        print(f"{name:<18}{metric:<12}{old:>14.6g}{new:>14.6g}{change:>+9.1f}%{marker}")
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Runs the benchmark suite against a synthetic pipeline and writes the results as JSON.
+
+```
+python -m benchmarks.run --jobs 5000 --stages 10 --output results.json
+python -m benchmarks.run --only construct_jobs --only derive_jobs
+python -m benchmarks.compare baseline.json results.json
+```
+
+Every benchmark is timed `--repeat` times with fresh objects, and run once more with `tracemalloc` to record the
+peak and the retained memory of the run. The retained memory of `construct_jobs` and `derive_jobs` is the memory
+of `--jobs` jobs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from benchmarks.synthetic import (
+    PipelineShape,
+    generate,
+    keywords,
+    make_image,
+    make_need,
+    make_rule,
+)
+from nay.core.job import Job
+
+Benchmark = Callable[[PipelineShape], Callable[[], Any]]
+"""Prepares a benchmark, which is not timed, and returns the function to time."""
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    def register(function: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = function
+        return function
+
+    return register
+
+
+@benchmark("construct")
+def _construct(shape: PipelineShape) -> Callable[[], Any]:
+    return lambda: generate(shape)
+
+
+def _job_factory(shape: PipelineShape) -> Callable[[str], Job]:
+    """Returns a function constructing jobs, which all share one image and the same rules and needs."""
+    image = make_image(shape, 0)
+    rules = [make_rule(shape, index) for index in range(shape.rules_per_job)]
+    needs = [make_need("build", 0)]
+
+    def construct(name: str) -> Job:
+        return Job(
+            name=name,
+            script=["pip install -e .", "pytest"],
+            stage="test",
+            image=image,
+            rules=rules,
+            needs=needs,
+            tags=["docker"],
+        )
+
+    return construct
+
+
+@benchmark("construct_jobs")
+def _construct_jobs(shape: PipelineShape) -> Callable[[], Any]:
+    construct = _job_factory(shape)
+    return lambda: [construct(f"test-{index}") for index in range(shape.jobs)]
+
+
+@benchmark("derive_jobs")
+def _derive_jobs(shape: PipelineShape) -> Callable[[], Any]:
+    template = _job_factory(shape)(".test")
+    return lambda: [template.derive(f"test-{index}") for index in range(shape.jobs)]
+
+
+def _render_all(kind: str) -> Benchmark:
+    def prepare(shape: PipelineShape) -> Callable[[], Any]:
+        objects = keywords(shape)[kind]
+        return lambda: [keyword.render() for keyword in objects]
+
+    return prepare
+
+
+BENCHMARKS["render_images"] = _render_all("images")
+BENCHMARKS["render_rules"] = _render_all("rules")
+BENCHMARKS["render_needs"] = _render_all("needs")
+
+
+@benchmark("dedup_hash")
+def _dedup_hash(shape: PipelineShape) -> Callable[[], Any]:
+    rules = keywords(shape)["rules"]
+    return lambda: list(dict.fromkeys(rules))
+
+
+@benchmark("dedup_equals")
+def _dedup_equals(shape: PipelineShape) -> Callable[[], Any]:
+    rules = keywords(shape)["rules"]
+
+    def dedup() -> List[Any]:
+        unique: List[Any] = []
+        for rule in rules:
+            if not any(rule._equals(other) for other in unique):
+                unique.append(rule)
+        return unique
+
+    return dedup
+
+
+@benchmark("derive_with_tag")
+def _derive_with_tag(shape: PipelineShape) -> Callable[[], Any]:
+    images = keywords(shape)["images"]
+    return lambda: [image.with_tag("2.0") for image in images]
+
+
+@benchmark("derive_never")
+def _derive_never(shape: PipelineShape) -> Callable[[], Any]:
+    rules = keywords(shape)["rules"]
+    return lambda: [rule.never() for rule in rules]
+
+
+@benchmark("render_pipeline")
+def _render_pipeline(shape: PipelineShape) -> Callable[[], Any]:
+    pipeline = generate(shape)
+    return pipeline.render
+
+
+@benchmark("dump")
+def _dump(shape: PipelineShape) -> Callable[[], Any]:
+    pipeline = generate(shape)
+    return pipeline.to_yaml
+
+
+@benchmark("write_stream")
+def _write_stream(shape: PipelineShape) -> Callable[[], Any]:
+    pipeline = generate(shape)
+    return lambda: pipeline.write_yaml(io.StringIO())
+
+
+def measure(prepare: Benchmark, shape: PipelineShape, repeat: int) -> Dict[str, Any]:
+    """Time a benchmark and record its memory usage.
+
+    Args:
+        prepare (Benchmark): The benchmark.
+        shape (PipelineShape): The shape of the synthetic pipeline.
+        repeat (int): The number of timed runs.
+
+    Returns:
+        Dict[str, Any]: The timings in seconds and the memory usage in bytes.
+    """
+    timings: List[float] = []
+    for _ in range(repeat):
+        function = prepare(shape)
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    function = prepare(shape)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "repeat": repeat,
+        "peak_bytes": peak - before,
+        "retained_bytes": current - before,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+    shape: PipelineShape, repeat: int = 5, names: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """Run the benchmarks.
+
+    Args:
+        shape (PipelineShape): The shape of the synthetic pipeline.
+        repeat (int): The number of timed runs per benchmark. Defaults to 5.
+        names (Optional[Sequence[str]]): The benchmarks to run. Defaults to all.
+
+    Raises:
+        KeyError: If a name is no known benchmark.
+
+    Returns:
+        Dict[str, Any]: The machine-readable results, with the environment under `meta` and the results of
+            every benchmark under `results`.
+    """
+    selected = list(names or BENCHMARKS)
+    return {
+        "meta": {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "shape": shape.as_dict(),
+        },
+        "results": {
+            name: measure(BENCHMARKS[name], shape, repeat) for name in selected
+        },
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0].strip()
+    )
+    defaults = PipelineShape()
+    parser.add_argument("--jobs", type=int, default=defaults.jobs)
+    parser.add_argument("--rules", type=int, default=defaults.rules_per_job)
+    parser.add_argument("--fan-in", type=int, default=defaults.needs_fan_in)
+    parser.add_argument("--images", type=int, default=defaults.distinct_images)
+    parser.add_argument("--distinct-rules", type=int, default=defaults.distinct_rules)
+    parser.add_argument("--stages", type=int, default=defaults.stages)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=sorted(BENCHMARKS),
+        help="run only this benchmark",
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    shape = PipelineShape(
+        jobs=args.jobs,
+        rules_per_job=args.rules,
+        needs_fan_in=args.fan_in,
+        distinct_images=args.images,
+        distinct_rules=args.distinct_rules,
+        stages=args.stages,
+        seed=args.seed,
+    )
+    results = run(shape, args.repeat, args.only)
+
+    print(f"{'benchmark':<18}{'median':>12}{'min':>12}{'peak':>14}{'retained':>14}")
+    for name, result in results["results"].items():
+        print(
+            f"{name:<18}{result['median'] * 1000:>10.2f}ms{result['min'] * 1000:>10.2f}ms"
+            f"{result['peak_bytes'] / 1024:>11,.0f}KiB{result['retained_bytes'] / 1024:>11,.0f}KiB"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as stream:
+            json.dump(results, stream, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
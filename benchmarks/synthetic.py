@@ -0,0 +1,126 @@
+"""
+Generates synthetic pipelines of configurable size for the benchmarks.
+
+The generated pipelines are deterministic for a given `PipelineShape`, so results of different commits are
+comparable. Keyword objects are created fresh for every job from a pool of distinct definitions, like a real
+generator does, so deduplication and the render caches have work to do.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List
+
+from nay.core.image import Image
+from nay.core.job import Job
+from nay.core.need import Need
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule, When
+
+
+@dataclass(frozen=True)
+class PipelineShape:
+    """The size of a synthetic pipeline.
+
+    Args:
+        jobs (int): The number of jobs. Defaults to 1000.
+        rules_per_job (int): The number of rules of every job. Defaults to 3.
+        needs_fan_in (int): The maximum number of jobs every job needs. Defaults to 3.
+        distinct_images (int): The number of distinct images shared by the jobs. Defaults to 10.
+        distinct_rules (int): The number of distinct rules shared by the jobs. Defaults to 50.
+        stages (int): The number of stages. Defaults to 5.
+        seed (int): The seed of the random choices. Defaults to 0.
+    """
+
+    jobs: int = 1000
+    rules_per_job: int = 3
+    needs_fan_in: int = 3
+    distinct_images: int = 10
+    distinct_rules: int = 50
+    stages: int = 5
+    seed: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+_WHENS = [When.ON_SUCCESS, When.MANUAL, When.ALWAYS, When.NEVER]
+
+
+def make_image(shape: PipelineShape, index: int) -> Image:
+    """Returns a new image object for one of the distinct images."""
+    return Image(
+        name=f"registry.example.com/tools/image-{index % shape.distinct_images}",
+        tag="1.0",
+    )
+
+
+def make_rule(shape: PipelineShape, index: int) -> Rule:
+    """Returns a new rule object for one of the distinct rules."""
+    index %= shape.distinct_rules
+    return Rule(
+        if_statement=f'$CI_COMMIT_BRANCH == "branch-{index}" && $CI_PIPELINE_SOURCE == "push"',
+        when=_WHENS[index % len(_WHENS)],
+        allow_failure=index % 7 == 0,
+        changes=[f"services/service-{index}/**/*"] if index % 3 == 0 else None,
+        variables={"RULE": str(index)} if index % 5 == 0 else None,
+    )
+
+
+def make_need(name: str, index: int) -> Need:
+    """Returns a new need object for a job."""
+    return Need(job=name, artifacts=index % 2 == 0)
+
+
+def keywords(shape: PipelineShape) -> Dict[str, List[Any]]:
+    """Returns fresh, unrendered image, rule and need objects in the numbers of a pipeline of this shape."""
+    rng = random.Random(shape.seed)
+    return {
+        "images": [
+            make_image(shape, rng.randrange(shape.distinct_images))
+            for _ in range(shape.jobs)
+        ],
+        "rules": [
+            make_rule(shape, rng.randrange(shape.distinct_rules))
+            for _ in range(shape.jobs * shape.rules_per_job)
+        ],
+        "needs": [
+            make_need(f"job-{rng.randrange(shape.jobs)}", index)
+            for index in range(shape.jobs * shape.needs_fan_in)
+        ],
+    }
+
+
+def generate(shape: PipelineShape) -> Pipeline:
+    """Build a pipeline of the given shape.
+
+    Every job is in one of `stages` stages and needs up to `needs_fan_in` random jobs of earlier stages,
+    so the needs form a DAG.
+    """
+    rng = random.Random(shape.seed)
+    pipeline = Pipeline(variables={"GLOBAL": "value"})
+    per_stage = max(1, -(-shape.jobs // shape.stages))
+
+    for index in range(shape.jobs):
+        stage = index // per_stage
+        earlier = stage * per_stage
+        needs = [
+            make_need(f"job-{rng.randrange(earlier)}", index)
+            for _ in range(min(shape.needs_fan_in, earlier))
+        ]
+        pipeline.add_children(
+            Job(
+                name=f"job-{index}",
+                script=["make setup", f"make target-{index}"],
+                stage=f"stage-{stage}",
+                image=make_image(shape, rng.randrange(shape.distinct_images)),
+                rules=[
+                    make_rule(shape, rng.randrange(shape.distinct_rules))
+                    for _ in range(shape.rules_per_job)
+                ],
+                needs=list(dict.fromkeys(needs)) if earlier else None,
+                variables={"INDEX": str(index)},
+            )
+        )
+    return pipeline
@@ -0,0 +1,27 @@
+"""
+Develop GitLab CI/CD pipelines in Python.
+
+The keyword classes of `nay.core`, like `nay.Pipeline` and `nay.Job`, are available from this package. They are
+imported on first access, so that short commands like `nay --version` do not import the whole library.
+"""
+
+import importlib
+from typing import Any, List
+
+__version__ = "0.1.0"
+
+
+def __getattr__(name: str) -> Any:
+    if name in ("cli", "core"):
+        return importlib.import_module(f"{__name__}.{name}")
+    core = importlib.import_module(f"{__name__}.core")
+    if name not in core.__all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(core, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    core = importlib.import_module(f"{__name__}.core")
+    return sorted({*globals(), "cli", "core", *core.__all__})
@@ -0,0 +1,5 @@
+import sys
+
+from nay.cli import main
+
+sys.exit(main())
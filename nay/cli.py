@@ -0,0 +1,262 @@
+"""
+The `nay` command line interface.
+
+```
+nay generate my_project.ci:pipeline -o .gitlab-ci.yml
+nay validate .gitlab-ci.yml
+nay diff .gitlab-ci.yml my_project.ci:pipeline
+nay --import-time validate .gitlab-ci.yml
+```
+
+Pipelines are given as `module:function`, a function returning a `Pipeline`, or as path of a YAML file or of a
+snapshot written by `nay generate --snapshot`, see `nay.core.snapshot`. The modules of `nay.core` are imported by
+the commands using them, through the lazy attributes of the package, so `nay --version` and `nay --help` import
+neither the library nor PyYAML.
+
+`--import-time` runs the command again with `python -X importtime` and reports the modules which took longest to
+import.
+"""
+
+import argparse
+import importlib
+import os
+import re
+import sys
+from typing import Any, List, Optional, Sequence, Tuple
+
+from nay import __version__, core
+
+IMPORT_TIME_TOP = 15
+"""The number of modules reported by `--import-time`."""
+
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def _call(reference: str) -> Any:
+    """Import `module:function` and call the function."""
+    module_name, _, attribute = reference.partition(":")
+    if not attribute:
+        raise ValueError(
+            f"Expected a reference like 'module:function', got '{reference}'."
+        )
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+def _is_snapshot(path: str) -> bool:
+    with open(path, "rb") as stream:
+        return stream.read(len(core.snapshot.MAGIC)) == core.snapshot.MAGIC
+
+
+def _load(source: str) -> Any:
+    """Load a YAML file or a snapshot, or import `module:function` and call the function returning a pipeline."""
+    if os.path.exists(source) or ":" not in source:
+        if _is_snapshot(source):
+            return core.snapshot.load(source)
+        return core.loader.load(source)
+    return _call(source)
+
+
+def _generate(args: argparse.Namespace) -> int:
+    if os.path.isfile(args.pipeline):
+        if not _is_snapshot(args.pipeline):
+            print(
+                f"error: {args.pipeline} is no pipeline snapshot, generate expects a function like "
+                "'my_project.ci:pipeline' or a file written with --snapshot",
+                file=sys.stderr,
+            )
+            return 2
+        result = core.snapshot.load(args.pipeline)
+    else:
+        result = _call(args.pipeline)
+    if isinstance(result, core.Pipeline):
+        if args.snapshot:
+            core.snapshot.dump(result, args.snapshot)
+        core.writer.write(result, args.output or sys.stdout, verify=args.verify)
+        return 0
+
+    if args.snapshot:
+        print(
+            "error: --snapshot cannot be used with a function returning several pipelines",
+            file=sys.stderr,
+        )
+        return 2
+
+    if args.output:
+        print(
+            "error: --output cannot be used with a function returning several pipelines",
+            file=sys.stderr,
+        )
+        return 2
+    for path, pipeline in result.items():
+        core.writer.write(pipeline, path, verify=args.verify)
+        print(f"wrote {path}")
+    return 0
+
+
+def validate(pipeline: Any) -> List[str]:
+    """Check a pipeline for errors GitLab would reject it for.
+
+    Args:
+        pipeline (Any): A `Pipeline`, or a `LoadedPipeline` of a `.gitlab-ci.yml`.
+
+    Returns:
+        List[str]: The errors, which are empty if the pipeline is valid.
+    """
+    if isinstance(pipeline, core.loader.LoadedPipeline):
+        pipeline = pipeline.to_pipeline()
+
+    errors: List[str] = []
+    graph = core.dag.NeedsGraph(pipeline.jobs, expand_matrix=True)
+    for name, needs in graph.dangling.items():
+        errors += [f"{name}: needs the unknown job '{need}'" for need in needs]
+    cycle = graph.find_cycle()
+    if cycle:
+        errors.append(f"the needs form a cycle: {' -> '.join(cycle)}")
+
+    for job in pipeline.jobs:
+        for rule in job.rules:
+            if not rule.if_statement:
+                continue
+            try:
+                core.expressions.compile_expression(rule.if_statement)
+            except core.exceptions.ExpressionSyntaxError as error:
+                errors.append(f"{job.name}: {error}")
+
+    try:
+        core.expansion.VariableExpander(pipeline).expand_all()
+    except core.exceptions.VariableCycleError as error:
+        errors.append(str(error))
+    return errors
+
+
+def _validate(args: argparse.Namespace) -> int:
+    errors = validate(_load(args.pipeline))
+    for error in errors:
+        print(f"error: {error}", file=sys.stderr)
+    if errors:
+        return 1
+    print(f"{args.pipeline} is valid")
+    return 0
+
+
+def _diff(args: argparse.Namespace) -> int:
+    result = core.diff.diff(_load(args.before), _load(args.after))
+    print(result.summary())
+    return 1 if result else 0
+
+
+def _report_import_time(argv: Sequence[str]) -> int:
+    """Run the command with `python -X importtime` and summarize the import times on stderr."""
+    import subprocess
+
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "nay", *argv],
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    imports: List[Tuple[int, str]] = []
+    total = 0
+    for line in process.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match is None:
+            if not line.startswith("import time:"):
+                print(line, file=sys.stderr)
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        imports.append((cumulative, name))
+        if len(indent) == 0:
+            total += cumulative
+
+    print(f"imported {len(imports)} modules in {total / 1000:.1f} ms", file=sys.stderr)
+    for cumulative, name in sorted(imports, reverse=True)[:IMPORT_TIME_TOP]:
+        print(f"{cumulative / 1000:9.1f} ms  {name}", file=sys.stderr)
+    return process.returncode
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="nay", description="Develop GitLab CI/CD pipelines in Python."
+    )
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {__version__}"
+    )
+    parser.add_argument(
+        "--import-time",
+        action="store_true",
+        help="run the command with 'python -X importtime' and report the slowest imports",
+    )
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    generate = commands.add_parser(
+        "generate", help="write the YAML of a pipeline defined in Python"
+    )
+    generate.add_argument(
+        "pipeline",
+        help="a function returning a pipeline, or the pipelines by their paths, like 'my_project.ci:pipeline', "
+        "or a snapshot file",
+    )
+    generate.add_argument(
+        "-o", "--output", help="the file to write, defaults to the standard output"
+    )
+    generate.add_argument(
+        "--snapshot", help="also write a binary snapshot of the pipeline to this file"
+    )
+    generate.add_argument(
+        "--verify",
+        action="store_true",
+        help="ensure that the streamed output equals the dumped pipeline",
+    )
+    generate.set_defaults(handler=_generate)
+
+    validate = commands.add_parser(
+        "validate", help="check the needs, rules and variables of a pipeline"
+    )
+    validate.add_argument(
+        "pipeline", help="a YAML file or a function like 'my_project.ci:pipeline'"
+    )
+    validate.set_defaults(handler=_validate)
+
+    diff = commands.add_parser("diff", help="compare two pipelines by their jobs")
+    diff.add_argument(
+        "before", help="a YAML file or a function like 'my_project.ci:pipeline'"
+    )
+    diff.add_argument(
+        "after", help="a YAML file or a function like 'my_project.ci:pipeline'"
+    )
+    diff.set_defaults(handler=_diff)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the `nay` command.
+
+    Returns:
+        int: The exit code of the command.
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if "--import-time" in argv:
+        # Handled before parsing, so that the import time of `--version` and `--help` is reported as well.
+        return _report_import_time(
+            [argument for argument in argv if argument != "--import-time"]
+        )
+
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+
+    sys.path.insert(0, os.getcwd())
+    try:
+        return args.handler(args)
+    except (
+        OSError,
+        ValueError,
+        core.exceptions.ExpressionSyntaxError,
+        core.exceptions.SnapshotError,
+        core.exceptions.UnsupportedKeywordError,
+        core.exceptions.VariableCycleError,
+    ) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 2
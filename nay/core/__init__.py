@@ -1,7 +1,73 @@
 """
 This module will hold all [GitLab CI Keyword](https://docs.gitlab.com/ee/ci/yaml/)
 representations
+
+The keyword classes, like `nay.core.Job`, and the submodules, like `nay.core.loader`, are available as attributes
+of this package. They are imported on first access, so importing the package itself is cheap.
 """
-from typing import Dict
+
+import importlib
+from typing import Any, Dict, List
 
 OrderedSetType = Dict[str, None]
+
+_EXPORTS = {
+    "EnvironmentSnapshot": "variables",
+    "FrozenImage": "image",
+    "FrozenRule": "rules",
+    "Image": "image",
+    "Job": "job",
+    "Matrix": "matrix",
+    "Need": "need",
+    "Pipeline": "pipeline",
+    "PredefinedVariables": "variables",
+    "Rule": "rules",
+    "TriggerJob": "job",
+    "When": "rules",
+}
+"""The module defining each of the classes exported by this package."""
+
+_SUBMODULES = frozenset(
+    {
+        "changes",
+        "children",
+        "dag",
+        "diff",
+        "exceptions",
+        "expansion",
+        "expressions",
+        "image",
+        "includes",
+        "incremental",
+        "job",
+        "loader",
+        "matrix",
+        "need",
+        "optimize",
+        "pipeline",
+        "profiling",
+        "rules",
+        "scenarios",
+        "simulation",
+        "snapshot",
+        "variables",
+        "writer",
+    }
+)
+
+__all__ = ["OrderedSetType", *_EXPORTS]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted({*globals(), *_EXPORTS, *_SUBMODULES})
@@ -0,0 +1,287 @@
+"""
+Evaluates the [changes](https://docs.gitlab.com/ee/ci/yaml/#ruleschanges) and
+[exists](https://docs.gitlab.com/ee/ci/yaml/#rulesexists) patterns of rules against lists of files.
+
+All patterns of all rules of a pipeline are compiled into one shared index. Literal paths are looked up in a set.
+Glob patterns are stored in a trie by their leading literal directories, and all patterns of a trie node are combined
+into one regular expression. Matching a file therefore only visits the nodes along its directories, and patterns used
+by several rules are evaluated once.
+
+Patterns follow the semantics of GitLab, which uses Ruby's `File.fnmatch` with `File::FNM_PATHNAME`,
+`File::FNM_DOTMATCH` and `File::FNM_EXTGLOB`:
+
+- `*` matches any characters except `/`, including a leading dot.
+- `**/` matches zero or more directories.
+- `?` matches one character except `/`.
+- `[abc]` and `[!abc]` match one character of, or not of, a set.
+- `{a,b}` matches one of the alternatives.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Set, Tuple, Union
+
+from nay.core.rules import FrozenRule, Rule
+
+_WILDCARDS = frozenset("*?[{\\")
+
+
+def translate(pattern: str) -> str:
+    """Translate a glob pattern into a regular expression matching whole paths.
+
+    Args:
+        pattern (str): The glob pattern of `changes` or `exists`.
+
+    Raises:
+        ValueError: If a `[` or `{` is not closed.
+
+    Returns:
+        str: The regular expression, which must be used with `re.fullmatch()`.
+    """
+    return _translate(pattern, 0, False)[0]
+
+
+def _translate(pattern: str, index: int, in_braces: bool) -> Tuple[str, int]:
+    parts: List[str] = []
+    length = len(pattern)
+
+    while index < length:
+        char = pattern[index]
+
+        if char == "*":
+            at_segment_start = index == 0 or pattern[index - 1] == "/"
+            if at_segment_start and pattern.startswith("**/", index):
+                parts.append("(?:[^/]*/)*")
+                index += 3
+                continue
+            while index < length and pattern[index] == "*":
+                index += 1
+            parts.append("[^/]*")
+            continue
+
+        if char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", index + 2)
+            if end < 0:
+                raise ValueError(f"Unclosed '[' in pattern '{pattern}'.")
+            content = pattern[index + 1 : end]
+            negate = content[:1] in ("!", "^")
+            if negate:
+                content = content[1:]
+            content = content.replace("\\", "\\\\")
+            parts.append(f"(?!/)[{'^' if negate else ''}{content}]")
+            index = end
+        elif char == "{":
+            alternatives: List[str] = []
+            index += 1
+            while True:
+                alternative, index = _translate(pattern, index, True)
+                alternatives.append(alternative)
+                if index >= length:
+                    raise ValueError(f"Unclosed '{{' in pattern '{pattern}'.")
+                if pattern[index] == "}":
+                    break
+                index += 1
+            parts.append(f"(?:{'|'.join(alternatives)})")
+        elif in_braces and char in ",}":
+            return "".join(parts), index
+        elif char == "\\" and index + 1 < length:
+            index += 1
+            parts.append(re.escape(pattern[index]))
+        else:
+            parts.append(re.escape(char))
+        index += 1
+
+    return "".join(parts), index
+
+
+def _normalize(path: str) -> str:
+    while path.startswith("./"):
+        path = path[2:]
+    return path
+
+
+class _Node:
+    """A node of the directory trie with the glob patterns whose literal prefix ends here."""
+
+    __slots__ = ("children", "patterns", "_combined")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _Node] = {}
+        self.patterns: Dict[str, Pattern[str]] = {}
+        self._combined: Optional[Pattern[str]] = None
+
+    def combined(self) -> Pattern[str]:
+        if self._combined is None:
+            self._combined = re.compile(
+                "|".join(f"(?:{regex.pattern})" for regex in self.patterns.values())
+            )
+        return self._combined
+
+
+class PatternIndex:
+    """An index of glob patterns, which finds the patterns matching at least one of many paths.
+
+    Args:
+        patterns (Iterable[str]): The glob patterns.
+
+    Raises:
+        ValueError: If a pattern is invalid.
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._literals: Set[str] = set()
+        self._root = _Node()
+        self._compiled: Dict[str, Pattern[str]] = {}
+
+        for pattern in patterns:
+            normalized = _normalize(pattern)
+            if normalized in self._compiled or normalized in self._literals:
+                continue
+            if not _WILDCARDS.intersection(normalized):
+                self._literals.add(normalized)
+                continue
+
+            regex = re.compile(translate(normalized))
+            self._compiled[normalized] = regex
+            node = self._root
+            for segment in normalized.split("/")[:-1]:
+                if _WILDCARDS.intersection(segment):
+                    break
+                node = node.children.setdefault(segment, _Node())
+            node.patterns[normalized] = regex
+
+    def __len__(self) -> int:
+        return len(self._literals) + len(self._compiled)
+
+    def matching(self, paths: Iterable[str]) -> Set[str]:
+        """Find the patterns which match at least one of the paths.
+
+        Every path is only checked against the patterns along its directories. Patterns which already matched
+        are not checked again.
+
+        Args:
+            paths (Iterable[str]): The file paths relative to the repository root.
+
+        Returns:
+            Set[str]: The matching patterns, normalized by removing a leading `./`.
+        """
+        matched: Set[str] = set()
+        pending: Dict[int, Tuple[_Node, Dict[str, Pattern[str]]]] = {}
+
+        for path in paths:
+            path = _normalize(path)
+            if path in self._literals:
+                matched.add(path)
+
+            node: Optional[_Node] = self._root
+            segments = path.split("/")
+            for depth in range(len(segments)):
+                if node is None:
+                    break
+                if node.patterns:
+                    remaining = pending.get(id(node))
+                    if remaining is None:
+                        remaining = pending[id(node)] = (node, dict(node.patterns))
+                    if remaining[1] and _search(remaining, path):
+                        for pattern, regex in list(remaining[1].items()):
+                            if regex.fullmatch(path):
+                                matched.add(pattern)
+                                del remaining[1][pattern]
+                node = node.children.get(segments[depth])
+
+        return matched
+
+
+def _search(remaining: Tuple[_Node, Dict[str, Pattern[str]]], path: str) -> bool:
+    node, patterns = remaining
+    if len(patterns) == len(node.patterns):
+        return node.combined().fullmatch(path) is not None
+    return any(regex.fullmatch(path) for regex in patterns.values())
+
+
+AnyRule = Union[Rule, FrozenRule]
+
+
+class FileMatch:
+    """The result of `FileMatcher.match()`, which tells whether the `changes` and `exists` clauses of rules match.
+
+    Args:
+        changes (Optional[Set[str]]): The `changes` patterns matching the changed files, or None if the changed
+            files are unknown.
+        exists (Optional[Set[str]]): The `exists` patterns matching the existing files, or None if the existing
+            files are unknown.
+    """
+
+    def __init__(self, changes: Optional[Set[str]], exists: Optional[Set[str]]) -> None:
+        self._changes = changes
+        self._exists = exists
+
+    def changes_match(self, rule: AnyRule) -> bool:
+        """True if the rule has no `changes` clause, the changes are unknown or a pattern matches a changed file."""
+        if not rule.changes or self._changes is None:
+            return True
+        return any(_normalize(pattern) in self._changes for pattern in rule.changes)
+
+    def exists_match(self, rule: AnyRule) -> bool:
+        """True if the rule has no `exists` clause, the files are unknown or a pattern matches an existing file."""
+        if not rule.exists or self._exists is None:
+            return True
+        return any(_normalize(pattern) in self._exists for pattern in rule.exists)
+
+    def rule_matches(self, rule: AnyRule) -> bool:
+        """True if both the `changes` and the `exists` clause of the rule match."""
+        return self.changes_match(rule) and self.exists_match(rule)
+
+
+class FileMatcher:
+    """Compiles the `changes` and `exists` patterns of many rules into one shared index.
+
+    ```python
+    matcher = FileMatcher(rule for job in pipeline.jobs for rule in job.rules)
+    files = matcher.match(changed=["src/app.py"], existing=repository_files)
+    files.rule_matches(rule)
+    ```
+
+    Args:
+        rules (Iterable[AnyRule]): The rules whose patterns are indexed.
+    """
+
+    def __init__(self, rules: Iterable[AnyRule]) -> None:
+        rules = list(rules)
+        self._changes = PatternIndex(p for rule in rules for p in rule.changes or ())
+        self._exists = PatternIndex(p for rule in rules for p in rule.exists or ())
+
+    def match(
+        self,
+        changed: Optional[Iterable[str]] = None,
+        existing: Optional[Iterable[str]] = None,
+    ) -> FileMatch:
+        """Match the indexed patterns against the changed and the existing files.
+
+        Like in GitLab, `changes` clauses match if the changed files are unknown, for example in pipelines for
+        tags or schedules. `exists` clauses match if the existing files are not given.
+
+        Args:
+            changed (Optional[Iterable[str]]): The files changed by the push or merge request. Defaults to None.
+            existing (Optional[Iterable[str]]): All files of the repository. Defaults to None.
+
+        Returns:
+            FileMatch: The result for all indexed rules.
+        """
+        return FileMatch(
+            self._changes.matching(changed) if changed is not None else None,
+            self._exists.matching(existing) if existing is not None else None,
+        )
+
+    def fired_rules(
+        self,
+        rules: Sequence[AnyRule],
+        changed: Optional[Iterable[str]] = None,
+        existing: Optional[Iterable[str]] = None,
+    ) -> List[AnyRule]:
+        """Returns the rules whose `changes` and `exists` clauses match the files."""
+        files = self.match(changed, existing)
+        return [rule for rule in rules if files.rule_matches(rule)]
@@ -0,0 +1,111 @@
+"""
+Generates many [child pipelines](https://docs.gitlab.com/ee/ci/pipelines/downstream_pipelines.html#parent-child-pipelines)
+in parallel, for example one per service of a monorepo.
+
+Every child pipeline is built, rendered and written by a worker process. The workers resolve `PredefinedVariables`
+from the `EnvironmentSnapshot` of the parent process, so all children see the same values, no matter when and where
+they are built:
+
+```python
+def build_service(service: str) -> Pipeline:
+    ...
+
+builders = {service: functools.partial(build_service, service) for service in services}
+parent.add_child_pipelines(builders, directory="generated")
+```
+
+Builders are sent to the workers with `pickle`, so they must be module-level functions or `functools.partial`
+objects of them, not lambdas or closures.
+"""
+
+from __future__ import annotations
+
+import os
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Mapping, Optional
+
+from nay.core.variables import EnvironmentSnapshot
+
+if TYPE_CHECKING:
+    from nay.core.pipeline import Pipeline
+
+ChildBuilder = Callable[[], "Pipeline"]
+"""A picklable function building a child pipeline."""
+
+
+@dataclass(frozen=True)
+class ChildResult:
+    """The outcome of generating one child pipeline.
+
+    Args:
+        name (str): The name of the child pipeline.
+        path (str): The path of the generated YAML file.
+        error (Optional[str]): The formatted traceback if the builder or writing the file failed. Defaults to None.
+    """
+
+    name: str
+    path: str
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _generate(builder: ChildBuilder, path: str, snapshot: EnvironmentSnapshot) -> None:
+    with snapshot:
+        builder().write_yaml(path)
+
+
+def _format_error(error: BaseException) -> str:
+    return "".join(traceback.format_exception(type(error), error, error.__traceback__))
+
+
+def generate_children(
+    builders: Mapping[str, ChildBuilder],
+    directory: str,
+    *,
+    max_workers: Optional[int] = None,
+    snapshot: Optional[EnvironmentSnapshot] = None,
+) -> List[ChildResult]:
+    """Build and write child pipelines in parallel.
+
+    Every child is written atomically to `<directory>/<name>.yml`. A failing builder does not stop the other
+    children, its traceback is reported in its `ChildResult` instead.
+
+    Args:
+        builders (Mapping[str, ChildBuilder]): The builders of the child pipelines by their names.
+        directory (str): The directory the YAML files are written to. It is created if missing.
+        max_workers (Optional[int]): The number of worker processes. Defaults to None, which uses the number of
+            CPUs. With 1, the children are generated one after another in the current process.
+        snapshot (Optional[EnvironmentSnapshot]): The environment the builders run in. Defaults to the active
+            snapshot or a new snapshot of `os.environ`.
+
+    Returns:
+        List[ChildResult]: The results in the order of `builders`, independent of the order of completion.
+    """
+    snapshot = snapshot if snapshot is not None else EnvironmentSnapshot.current()
+    os.makedirs(directory, exist_ok=True)
+    paths = {name: os.path.join(directory, f"{name}.yml") for name in builders}
+    errors: Dict[str, Optional[str]] = {}
+
+    if max_workers == 1:
+        for name, builder in builders.items():
+            try:
+                _generate(builder, paths[name], snapshot)
+                errors[name] = None
+            except Exception as error:
+                errors[name] = _format_error(error)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures: Dict[str, Future[None]] = {
+                name: executor.submit(_generate, builder, paths[name], snapshot)
+                for name, builder in builders.items()
+            }
+            for name, future in futures.items():
+                error = future.exception()
+                errors[name] = _format_error(error) if error is not None else None
+
+    return [ChildResult(name, paths[name], errors[name]) for name in builders]
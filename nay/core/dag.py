@@ -0,0 +1,325 @@
+"""
+The graph of the jobs of a pipeline and their [needs](https://docs.gitlab.com/ee/ci/yaml/#needs).
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from nay.core import OrderedSetType
+from nay.core.exceptions import CyclicNeedsError, UnknownNeedError
+from nay.core.job import Job
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+
+
+class NeedsGraph:
+    """An indexed, directed graph of the jobs of a pipeline, built from their `Need`s.
+
+    Every job is a node, identified by its index in insertion order. An edge leads from a needed job to the job
+    needing it, so that the edges point in the direction of execution. Only needs of jobs within the same pipeline
+    are edges. Needs of unknown jobs are collected as dangling needs instead of raising immediately, so that all
+    of them can be reported at once.
+
+    All algorithms run in linear time of the number of jobs and edges, and their results follow the insertion order
+    of the jobs and needs, so that they are deterministic.
+
+    With `expand_matrix`, every variant of a `parallel:matrix` job is a node of its own, named like GitLab names
+    the variant. The variants of a job occupy consecutive indices, so a `needs:parallel:matrix` reference is
+    resolved by computing the index of the variant from its values instead of searching for its name.
+
+    Args:
+        jobs (Iterable[Job]): The jobs of the pipeline.
+        expand_matrix (bool): Add one node per variant of `parallel:matrix` jobs. Defaults to False.
+    """
+
+    def __init__(self, jobs: Iterable[Job], *, expand_matrix: bool = False) -> None:
+        jobs = list(jobs)
+        self._names: List[str] = []
+        self._matrices: Dict[str, Tuple[int, Matrix]] = {}
+        job_nodes: List[range] = []
+
+        for job in jobs:
+            start = len(self._names)
+            if expand_matrix and job.matrix is not None:
+                self._matrices[job.name] = (start, job.matrix)
+                self._names.extend(
+                    Matrix.variant_name(job.name, variables) for variables in job.matrix
+                )
+            else:
+                self._names.append(job.name)
+            job_nodes.append(range(start, len(self._names)))
+
+        self._index: Dict[str, int] = {
+            name: index for index, name in enumerate(self._names)
+        }
+        self._predecessors: List[List[int]] = [[] for _ in self._names]
+        self._successors: List[List[int]] = [[] for _ in self._names]
+        self._dangling: Dict[str, OrderedSetType] = {}
+        self._edge_count = 0
+
+        for job, nodes in zip(jobs, job_nodes):
+            needed: Dict[int, None] = {}
+            dangling: OrderedSetType = {}
+            for need in job.needs or ():
+                if need.is_local:
+                    self._resolve(need, needed, dangling)
+
+            for index in nodes:
+                if dangling:
+                    self._dangling[self._names[index]] = dangling
+                for predecessor in needed:
+                    self._predecessors[index].append(predecessor)
+                    self._successors[predecessor].append(index)
+                    self._edge_count += 1
+
+    def _resolve(
+        self, need: Need, needed: Dict[int, None], dangling: OrderedSetType
+    ) -> None:
+        """Add the indices of the nodes a need refers to, or the names of unknown jobs and variants."""
+        name: str = need.job  # type: ignore[assignment]
+        matrix = self._matrices.get(name)
+        if matrix is None:
+            index = self._index.get(name)
+            if index is None:
+                dangling[name] = None
+            else:
+                needed[index] = None
+            return
+
+        start, job_matrix = matrix
+        if need.parallel is None:
+            needed.update(dict.fromkeys(range(start, start + len(job_matrix))))
+            return
+
+        for variables in need.parallel:
+            variant = job_matrix.index(variables)
+            if variant is None:
+                dangling[Matrix.variant_name(name, variables)] = None
+            else:
+                needed[start + variant] = None
+
+    def targets(self, need: Need) -> List[str]:
+        """Returns the names of the nodes a local need refers to, leaving out unknown jobs and variants.
+
+        If the graph expands matrices, these are the variants selected by `needs:parallel:matrix`.
+        """
+        needed: Dict[int, None] = {}
+        self._resolve(need, needed, {})
+        return [self._names[index] for index in needed]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index
+
+    @property
+    def names(self) -> List[str]:
+        """The job names in insertion order."""
+        return list(self._names)
+
+    @property
+    def edge_count(self) -> int:
+        return self._edge_count
+
+    @property
+    def dangling(self) -> Dict[str, List[str]]:
+        """The names of needed jobs which are not part of the graph, by the name of the job needing them."""
+        return {name: list(needs) for name, needs in self._dangling.items()}
+
+    def index(self, name: str) -> int:
+        """Returns the index of a job.
+
+        Raises:
+            KeyError: If the job is not part of the graph.
+        """
+        return self._index[name]
+
+    def needs(self, name: str) -> List[str]:
+        """Returns the names of the jobs needed by the given job."""
+        return [self._names[index] for index in self._predecessors[self._index[name]]]
+
+    def needed_by(self, name: str) -> List[str]:
+        """Returns the names of the jobs which need the given job."""
+        return [self._names[index] for index in self._successors[self._index[name]]]
+
+    def edges(self) -> Iterable[Tuple[str, str]]:
+        """Yields all edges as tuples of the needed job and the job needing it."""
+        for index, predecessors in enumerate(self._predecessors):
+            for predecessor in predecessors:
+                yield self._names[predecessor], self._names[index]
+
+    def find_cycle(self) -> Optional[List[str]]:
+        """Search the graph for a cycle.
+
+        Returns:
+            Optional[List[str]]: The job names along the first cycle found, where the first and the last name are
+                equal, or None if the graph is acyclic.
+        """
+        cycle = find_cycle(self._successors)
+        if cycle is None:
+            return None
+        return [self._names[index] for index in cycle]
+
+    def validate(self) -> None:
+        """Ensure that all needs refer to jobs of the graph and do not form a cycle.
+
+        Raises:
+            UnknownNeedError: For the first job needing a job which is not part of the graph.
+            CyclicNeedsError: If the needs form a cycle.
+        """
+        if self._dangling:
+            name, needs = next(iter(self._dangling.items()))
+            raise UnknownNeedError(name, next(iter(needs)))
+
+        cycle = self.find_cycle()
+        if cycle:
+            raise CyclicNeedsError(cycle)
+
+    def _topological_indices(self) -> List[int]:
+        in_degree = [len(predecessors) for predecessors in self._predecessors]
+        queue = deque(index for index, degree in enumerate(in_degree) if degree == 0)
+        order: List[int] = []
+
+        while queue:
+            index = queue.popleft()
+            order.append(index)
+            for successor in self._successors[index]:
+                in_degree[successor] -= 1
+                if in_degree[successor] == 0:
+                    queue.append(successor)
+
+        if len(order) != len(self._names):
+            raise CyclicNeedsError(self.find_cycle() or [])
+        return order
+
+    def topological_order(self) -> List[str]:
+        """Returns the job names ordered such that every job comes after all jobs it needs.
+
+        Raises:
+            CyclicNeedsError: If the needs form a cycle.
+        """
+        return [self._names[index] for index in self._topological_indices()]
+
+    def critical_path(
+        self,
+        durations: Optional[Mapping[str, float]] = None,
+        *,
+        default_duration: float = 1.0,
+    ) -> Tuple[float, List[str]]:
+        """Compute the chain of needs with the longest total duration.
+
+        With unlimited runners, the duration of the critical path is the shortest possible duration of the
+        pipeline, as far as it is determined by `needs`.
+
+        Args:
+            durations (Optional[Mapping[str, float]]): The estimated duration of the jobs by their names.
+                Defaults to None.
+            default_duration (float): The duration of jobs missing in `durations`. Defaults to 1.0.
+
+        Raises:
+            CyclicNeedsError: If the needs form a cycle.
+
+        Returns:
+            Tuple[float, List[str]]: The total duration and the job names along the critical path.
+        """
+        if not self._names:
+            return 0.0, []
+
+        durations = durations or {}
+        weights = [durations.get(name, default_duration) for name in self._names]
+        finish = [0.0] * len(self._names)
+        previous: List[Optional[int]] = [None] * len(self._names)
+
+        for index in self._topological_indices():
+            start, latest = 0.0, None
+            for predecessor in self._predecessors[index]:
+                if latest is None or finish[predecessor] > start:
+                    start, latest = finish[predecessor], predecessor
+            previous[index] = latest
+            finish[index] = start + weights[index]
+
+        last: Optional[int] = max(range(len(finish)), key=finish.__getitem__)
+        total = finish[last]  # type: ignore[index]
+        path: List[str] = []
+        while last is not None:
+            path.append(self._names[last])
+            last = previous[last]
+        return total, path[::-1]
+
+    def longest_chain(self) -> List[str]:
+        """Returns the job names along the longest chain of needs, counted in jobs.
+
+        Raises:
+            CyclicNeedsError: If the needs form a cycle.
+        """
+        return self.critical_path()[1]
+
+    def redundant_edges(self) -> List[Tuple[str, str]]:
+        """Compute the edges which are not part of the transitive reduction of the graph.
+
+        An edge from `a` to `c` is redundant if `c` also reaches `a` through another chain, like `a -> b -> c`.
+        The ancestors of every job are tracked as bitsets in topological order, so the computation stays fast
+        for tens of thousands of edges.
+
+        Raises:
+            CyclicNeedsError: If the needs form a cycle.
+
+        Returns:
+            List[Tuple[str, str]]: The redundant edges as tuples of the needed job and the job needing it.
+        """
+        ancestors = [0] * len(self._names)
+        redundant: List[Tuple[str, str]] = []
+
+        for index in self._topological_indices():
+            reachable = 0
+            for predecessor in self._predecessors[index]:
+                reachable |= ancestors[predecessor]
+
+            for predecessor in self._predecessors[index]:
+                if reachable >> predecessor & 1:
+                    redundant.append((self._names[predecessor], self._names[index]))
+
+            for predecessor in self._predecessors[index]:
+                reachable |= 1 << predecessor
+            ancestors[index] = reachable
+
+        return redundant
+
+
+def find_cycle(successors: Sequence[Sequence[int]]) -> Optional[List[int]]:
+    """Search a graph given as successor lists for a cycle, with an iterative depth-first search.
+
+    Args:
+        successors (Sequence[Sequence[int]]): The indices of the successors of every node.
+
+    Returns:
+        Optional[List[int]]: The nodes along the first cycle found, where the first and the last node are equal,
+            or None if the graph is acyclic.
+    """
+    unvisited, active, done = 0, 1, 2
+    state = [unvisited] * len(successors)
+
+    for root in range(len(successors)):
+        if state[root] != unvisited:
+            continue
+
+        state[root] = active
+        path = [root]
+        stack = [iter(successors[root])]
+        while stack:
+            for successor in stack[-1]:
+                if state[successor] == active:
+                    return path[path.index(successor) :] + [successor]
+                if state[successor] == unvisited:
+                    state[successor] = active
+                    path.append(successor)
+                    stack.append(iter(successors[successor]))
+                    break
+            else:
+                state[path.pop()] = done
+                stack.pop()
+
+    return None
@@ -0,0 +1,326 @@
+"""
+Structural diff of two pipelines by job name.
+
+Every dictionary, list and value of the rendered pipelines is hashed bottom-up, so each node carries a digest of
+its whole subtree, like a Merkle tree. Identical jobs and keywords are skipped by comparing a single digest, and
+the rendered keywords which `Pipeline.render()` shares between jobs are hashed only once. The order of jobs and
+of the keys of dictionaries does not matter, the order of lists does:
+
+```python
+result = diff(load("before.yml"), generate_pipeline())
+print(result.summary())
+```
+
+From the command line, each side is a YAML file or a function returning a `Pipeline`, given as `module:function`:
+
+```
+python -m nay.core.diff .gitlab-ci.yml my_project.ci:pipeline
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from nay.core.job import RenderCache
+from nay.core.loader import SUPPORTED_KEYWORDS, LoadedPipeline, load
+from nay.core.optimize import is_job
+from nay.core.pipeline import Pipeline
+
+Comparable = Union[Pipeline, LoadedPipeline, Dict[str, Any]]
+"""A built pipeline, a loaded `.gitlab-ci.yml`, or the result of `Pipeline.render()`."""
+
+_Node = Tuple[bytes, Any]
+"""The digest of a value and its children: node by key for dictionaries, nodes for lists, None for leaves."""
+
+_RESOLVED_KEYWORDS = ("extends", "inherit")
+
+
+@dataclass
+class FieldChange:
+    """A changed keyword of a job, or a changed global keyword.
+
+    Args:
+        field (str): The keyword, like `rules`.
+        before (Any): The old value, or None if the keyword was added.
+        after (Any): The new value, or None if the keyword was removed.
+        removed (List[Any]): For lists, the items only contained in the old value.
+        added (List[Any]): For lists, the items only contained in the new value.
+    """
+
+    field: str
+    before: Any
+    after: Any
+    removed: List[Any] = field(default_factory=list)
+    added: List[Any] = field(default_factory=list)
+
+
+@dataclass
+class PipelineDiff:
+    """The differences between two pipelines.
+
+    Args:
+        added (List[str]): The names of the jobs only contained in the new pipeline.
+        removed (List[str]): The names of the jobs only contained in the old pipeline.
+        changed (Dict[str, List[FieldChange]]): The changed keywords by the names of the changed jobs.
+        globals (List[FieldChange]): The changed global keywords, like `variables` or `stages`.
+    """
+
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: Dict[str, List[FieldChange]] = field(default_factory=dict)
+    globals: List[FieldChange] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed or self.globals)
+
+    def summary(self) -> str:
+        """Format the differences like a diff, with `+` for added, `-` for removed and `~` for changed jobs."""
+        lines: List[str] = []
+        for change in self.globals:
+            lines += _format_change(change, "")
+        lines += [f"- {name}" for name in self.removed]
+        lines += [f"+ {name}" for name in self.added]
+        for name, changes in self.changed.items():
+            lines.append(f"~ {name}")
+            for change in changes:
+                lines += _format_change(change, "    ")
+        lines.append(
+            f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed"
+        )
+        return "\n".join(lines)
+
+
+def _format_change(change: FieldChange, indent: str) -> List[str]:
+    if change.removed or change.added:
+        return [
+            f"{indent}{change.field}:",
+            *(f"{indent}  - {_compact(item)}" for item in change.removed),
+            *(f"{indent}  + {_compact(item)}" for item in change.added),
+        ]
+    return [
+        f"{indent}{change.field}: {_compact(change.before)} -> {_compact(change.after)}"
+    ]
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, separators=(", ", ": "), default=str)
+
+
+class _Hasher:
+    """Computes the digests of rendered values.
+
+    The pipeline, its jobs and their keywords are nodes whose digests combine the digests of their children.
+    Values nested deeper, like a single rule, are hashed as a whole. They are memoized by identity, and nodes also
+    by their depth, because the rendered keywords are shared between jobs.
+    """
+
+    def __init__(self) -> None:
+        self._nodes: Dict[Tuple[int, int], Tuple[Any, _Node]] = {}
+        self._leaves: Dict[int, Tuple[Any, bytes]] = {}
+        self._scalars: Dict[Tuple[type, Any], bytes] = {}
+
+    def node(self, value: Any, depth: int = 3) -> _Node:
+        if depth == 0 or not isinstance(value, (dict, list)):
+            return (self.leaf(value), None)
+
+        # The digest of a node depends on the depth it is hashed at, so a value shared between depths, like
+        # variables of the pipeline and of a job, is memoized once per depth.
+        memoized = self._nodes.get((id(value), depth))
+        if memoized is not None:
+            return memoized[1]
+
+        if isinstance(value, dict):
+            children = {key: self.node(item, depth - 1) for key, item in value.items()}
+            digest = hashlib.blake2b(b"d", digest_size=16)
+            for key in sorted(children, key=str):
+                digest.update(f"{key!r}\0".encode())
+                digest.update(children[key][0])
+            node = (digest.digest(), children)
+        else:
+            items = [self.node(item, depth - 1) for item in value]
+            digest = hashlib.blake2b(b"l", digest_size=16)
+            for item in items:
+                digest.update(item[0])
+            node = (digest.digest(), items)
+
+        self._nodes[(id(value), depth)] = (value, node)
+        return node
+
+    def leaf(self, value: Any) -> bytes:
+        if not isinstance(value, (dict, list)):
+            key = (type(value), value)
+            digest = self._scalars.get(key)
+            if digest is None:
+                digest = self._scalars[key] = hashlib.blake2b(
+                    f"{type(value).__name__}\0{value!r}".encode(), digest_size=16
+                ).digest()
+            return digest
+
+        memoized = self._leaves.get(id(value))
+        if memoized is not None:
+            return memoized[1]
+        try:
+            encoded = json.dumps(value, sort_keys=True, default=repr)
+        except TypeError:
+            encoded = json.dumps(value, default=repr)
+        digest = hashlib.blake2b(encoded.encode(), digest_size=16).digest()
+        self._leaves[id(value)] = (value, digest)
+        return digest
+
+
+def _rendered(pipeline: Comparable) -> Dict[str, Any]:
+    if isinstance(pipeline, Pipeline):
+        return pipeline.render()
+    if isinstance(pipeline, LoadedPipeline):
+        return _canonical(pipeline)
+    return pipeline
+
+
+def _canonical(pipeline: LoadedPipeline) -> Dict[str, Any]:
+    """Render a loaded pipeline like `Pipeline.render()` renders the jobs built from it.
+
+    The keywords modelled by `Job` are taken from the built jobs, so short forms like `image: python:3.11`,
+    `script: make` or `needs: [build]` equal the rendered long forms. Keywords which are not modelled, or whose keys
+    cannot be loaded, like `needs:optional`, are kept as they are.
+    """
+    rendered = {
+        key: value
+        for key, value in pipeline.config.items()
+        if key not in pipeline and key != "default" and not key.startswith(".")
+    }
+    if "variables" in rendered:
+        rendered["variables"] = pipeline.variables
+
+    cache: RenderCache = {}
+    for name in pipeline:
+        built = pipeline[name].render(cache=cache)
+        dropped = {key.partition(":")[0] for key in pipeline.dropped(name)}
+        job: Dict[str, Any] = {}
+        for key, value in pipeline.expanded(name).items():
+            if key in _RESOLVED_KEYWORDS:
+                continue
+            if key in SUPPORTED_KEYWORDS and key not in dropped:
+                # Empty keywords, like `rules: []`, are not rendered.
+                if key in built:
+                    job[key] = built[key]
+            else:
+                job[key] = value
+        rendered[name] = job
+    return rendered
+
+
+def _changes(
+    before: Dict[str, Any], after: Dict[str, Any], old: _Node, new: _Node
+) -> List[FieldChange]:
+    """Returns the changed keys of two dictionaries with differing digests."""
+    changes: List[FieldChange] = []
+    for key in [*before, *(key for key in after if key not in before)]:
+        old_child, new_child = old[1].get(key), new[1].get(key)
+        if (
+            old_child is not None
+            and new_child is not None
+            and old_child[0] == new_child[0]
+        ):
+            continue
+        change = FieldChange(key, before.get(key), after.get(key))
+        if isinstance(change.before, list) and isinstance(change.after, list):
+            old_items = {item[0] for item in old_child[1]}
+            new_items = {item[0] for item in new_child[1]}
+            change.removed = [
+                value
+                for value, item in zip(change.before, old_child[1])
+                if item[0] not in new_items
+            ]
+            change.added = [
+                value
+                for value, item in zip(change.after, new_child[1])
+                if item[0] not in old_items
+            ]
+        changes.append(change)
+    return changes
+
+
+def diff(before: Comparable, after: Comparable) -> PipelineDiff:
+    """Compare two pipelines by the names of their jobs.
+
+    Loaded pipelines are compared with `extends`, `default` and `!reference` tags resolved, including the
+    keywords which are not modelled by `Job`. The keywords modelled by `Job` are compared in the form
+    `Pipeline.render()` writes them, so a `.gitlab-ci.yml` using short forms equals the pipeline built from it.
+
+    Args:
+        before (Comparable): The old pipeline.
+        after (Comparable): The new pipeline.
+
+    Returns:
+        PipelineDiff: The added, removed and changed jobs and the changed global keywords.
+    """
+    old, new = _rendered(before), _rendered(after)
+    hasher = _Hasher()
+    old_root, new_root = hasher.node(old), hasher.node(new)
+
+    result = PipelineDiff()
+    if old_root[0] == new_root[0]:
+        return result
+
+    jobs = [key for key in {**old, **new} if is_job(key, old.get(key, new.get(key)))]
+    job_names = set(jobs)
+    for name in jobs:
+        if name not in old:
+            result.added.append(name)
+        elif name not in new:
+            result.removed.append(name)
+        else:
+            old_job, new_job = old_root[1][name], new_root[1][name]
+            if old_job[0] != new_job[0]:
+                result.changed[name] = _changes(old[name], new[name], old_job, new_job)
+
+    result.globals = [
+        change
+        for change in _changes(old, new, old_root, new_root)
+        if change.field not in job_names
+    ]
+    return result
+
+
+def _load(source: str) -> Comparable:
+    """Load a YAML file, or import `module:function` and call the function, which returns a pipeline."""
+    if os.path.exists(source) or ":" not in source:
+        return load(source)
+    module_name, _, attribute = source.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Compare two pipelines, each given as YAML file or as `module:function`.
+
+    Returns:
+        int: The exit code, which is 1 if the pipelines differ.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m nay.core.diff",
+        description="Compare two pipelines by their jobs.",
+    )
+    parser.add_argument(
+        "before", help="a YAML file or a function like 'my_project.ci:pipeline'"
+    )
+    parser.add_argument(
+        "after", help="a YAML file or a function like 'my_project.ci:pipeline'"
+    )
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    result = diff(_load(args.before), _load(args.after))
+    print(result.summary())
+    return 1 if result else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
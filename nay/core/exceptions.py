@@ -1,3 +1,6 @@
+from typing import Dict, List
+
+
 class ScriptArgumentNotAllowedError(Exception):
     """
     Exception raised when the 'script' argument is not allowed in the constructor.
@@ -18,3 +21,236 @@ class ScriptArgumentNotAllowedError(Exception):
             "The 'script' argument is not supported by this subclass of 'Job' because "
             "the class provides its custom script. You can prepend/append scripts as usual."
         )
+
+
+class RenderMismatchError(Exception):
+    """
+    Exception raised when the streamed YAML output of a pipeline differs from the output of dumping
+    the fully rendered pipeline dictionary.
+
+    This exception is only raised when the streaming writer runs in verification mode.
+
+    Attributes:
+        message (str): A descriptive error message.
+    """
+
+    def __init__(self, target: str) -> None:
+        """
+        Initialize the exception with a message.
+
+        Args:
+            target (str): A description of the output the pipeline was written to.
+        """
+        super().__init__(
+            f"The streamed YAML written to {target} is not byte-identical to the dumped pipeline dictionary."
+        )
+
+
+class FactoringMismatchError(Exception):
+    """
+    Exception raised when a factored pipeline is not semantically equivalent to the original pipeline
+    after expanding its anchors, `default` and `extends` keywords.
+
+    Attributes:
+        message (str): A descriptive error message.
+    """
+
+    def __init__(self, job: str) -> None:
+        """
+        Initialize the exception with a message.
+
+        Args:
+            job (str): The name of the first job which differs after expansion.
+        """
+        super().__init__(
+            f"The factored pipeline is not equivalent to the original pipeline for job '{job}'."
+        )
+
+
+class CyclicNeedsError(Exception):
+    """
+    Exception raised when the `needs` of the jobs of a pipeline form a cycle.
+
+    Attributes:
+        path (List[str]): The job names along the cycle. The first and the last name are equal.
+        message (str): A descriptive error message.
+    """
+
+    def __init__(self, path: List[str]) -> None:
+        """
+        Initialize the exception with a message.
+
+        Args:
+            path (List[str]): The job names along the cycle.
+        """
+        self.path = path
+        super().__init__(
+            f"The needs of the pipeline contain a cycle: {' -> '.join(path)}"
+        )
+
+
+class UnknownNeedError(Exception):
+    """
+    Exception raised when a job needs a job which is not part of the pipeline.
+
+    Attributes:
+        job (str): The name of the job with the dangling need.
+        need (str): The name of the needed job which does not exist.
+        message (str): A descriptive error message.
+    """
+
+    def __init__(self, job: str, need: str) -> None:
+        """
+        Initialize the exception with a message.
+
+        Args:
+            job (str): The name of the job with the dangling need.
+            need (str): The name of the needed job which does not exist.
+        """
+        self.job = job
+        self.need = need
+        super().__init__(
+            f"The job '{job}' needs the job '{need}', which is not part of the pipeline."
+        )
+
+
+class ExpressionSyntaxError(Exception):
+    """
+    Exception raised when a [rules:if](https://docs.gitlab.com/ee/ci/jobs/job_control.html#cicd-variable-expressions)
+    expression cannot be parsed.
+
+    Attributes:
+        expression (str): The invalid expression.
+        position (int): The offset in the expression where the error was detected.
+        message (str): A descriptive error message.
+    """
+
+    def __init__(self, expression: str, position: int, reason: str) -> None:
+        """
+        Initialize the exception with a message.
+
+        Args:
+            expression (str): The invalid expression.
+            position (int): The offset in the expression where the error was detected.
+            reason (str): What is wrong at this position.
+        """
+        self.expression = expression
+        self.position = position
+        super().__init__(
+            f"{reason} at position {position} of the expression: {expression}"
+        )
+
+
+class ChildPipelineError(Exception):
+    """
+    Exception raised when the builders of one or more child pipelines failed.
+
+    Attributes:
+        failures (Dict[str, str]): The formatted tracebacks of the failed builders by the names of the children.
+        message (str): A descriptive error message.
+    """
+
+    def __init__(self, failures: Dict[str, str]) -> None:
+        """
+        Initialize the exception with a message.
+
+        Args:
+            failures (Dict[str, str]): The formatted tracebacks of the failed builders by the names of the children.
+        """
+        self.failures = failures
+        details = "".join(
+            f"\n\n--- {name} ---\n{error}" for name, error in failures.items()
+        )
+        super().__init__(
+            f"{len(failures)} child pipeline(s) failed: {', '.join(failures)}{details}"
+        )
+
+
+class IncludeError(Exception):
+    """
+    Exception raised when an [include](https://docs.gitlab.com/ee/ci/yaml/#include) cannot be resolved.
+
+    Attributes:
+        location (str): The included file, URL or project file.
+        chain (List[str]): The files which led to the include, starting with the main configuration.
+        message (str): A descriptive error message.
+    """
+
+    def __init__(self, location: str, reason: str, chain: List[str]) -> None:
+        """
+        Initialize the exception with a message.
+
+        Args:
+            location (str): The included file, URL or project file.
+            reason (str): Why the include cannot be resolved.
+            chain (List[str]): The files which led to the include, starting with the main configuration.
+        """
+        self.location = location
+        self.chain = chain
+        super().__init__(
+            f"Cannot include '{location}': {reason} (included by {' -> '.join(chain)})"
+        )
+
+
+class VariableCycleError(Exception):
+    """
+    Exception raised when [CI/CD variables](https://docs.gitlab.com/ee/ci/variables/) reference each other in a cycle.
+
+    Attributes:
+        chain (List[str]): The names of the variables in the cycle, starting and ending with the same name.
+        message (str): A descriptive error message.
+    """
+
+    def __init__(self, chain: List[str]) -> None:
+        """
+        Initialize the exception with a message.
+
+        Args:
+            chain (List[str]): The names of the variables in the cycle, starting and ending with the same name.
+        """
+        self.chain = chain
+        super().__init__(f"The variables reference each other: {' -> '.join(chain)}")
+
+
+class SnapshotError(Exception):
+    """
+    Exception raised when a pipeline cannot be written to or read from a binary snapshot.
+
+    Attributes:
+        message (str): A descriptive error message.
+    """
+
+    def __init__(self, reason: str) -> None:
+        """
+        Initialize the exception with a message.
+
+        Args:
+            reason (str): Why the snapshot cannot be written or read.
+        """
+        super().__init__(f"Invalid pipeline snapshot: {reason}")
+
+
+class UnsupportedKeywordError(Exception):
+    """
+    Exception raised when a loaded `.gitlab-ci.yml` uses keys of `image`, `needs`, `parallel` or `rules` which cannot
+    be represented by `Image`, `Need`, `Matrix` and `Rule` objects, like `needs:optional`.
+
+    Attributes:
+        keywords (Dict[str, List[str]]): The keys which cannot be loaded, like `needs:optional`, by job name.
+        message (str): A descriptive error message.
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]]) -> None:
+        """
+        Initialize the exception with a message.
+
+        Args:
+            keywords (Dict[str, List[str]]): The keys which cannot be loaded, like `needs:optional`, by job name.
+        """
+        self.keywords = keywords
+        details = "; ".join(
+            f"{name}: {', '.join(keys)}" for name, keys in keywords.items()
+        )
+        super().__init__(
+            f"The pipeline uses keywords which cannot be loaded: {details}"
+        )
@@ -0,0 +1,263 @@
+"""
+Expands references between [CI/CD variables](https://docs.gitlab.com/ee/ci/variables/#use-cicd-variables-in-other-variables),
+like `$VARIABLE` and `${VARIABLE}`, to the effective values a job sees.
+
+Variables are organised in scopes, from the lowest to the highest precedence: the predefined variables, the
+global variables of the pipeline, the variables of a job, the variables of the rule which created the job and the
+variables a pipeline is run with. A reference is resolved with the value of the highest scope defining it, and
+references nested in that value are resolved in the same way:
+
+```python
+expander = VariableExpander(pipeline, predefined={"CI_COMMIT_REF_SLUG": "main"})
+scope = expander.job(job, rule=job.rules[0])
+scope["IMAGE"]  # "registry.example.com/app:main" for IMAGE: "$REGISTRY/app:$CI_COMMIT_REF_SLUG"
+```
+
+`$$` is a literal dollar sign, and references to undefined variables expand to an empty string, like on the runner.
+A variable which references itself, like `PATH: $PATH:/opt/bin`, refers to the value of the enclosing scope.
+
+Every scope memoizes the values it expanded. A child scope reuses the value of its parent unless the value depends
+on a variable the child redefines, so the global variables are expanded once for all jobs. Child scopes with the
+same variables are shared, so a rule used by many jobs with the same variables is expanded once.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from nay.core.exceptions import VariableCycleError
+from nay.core.job import Job
+from nay.core.rules import FrozenRule, Rule
+
+if TYPE_CHECKING:
+    from nay.core.pipeline import Pipeline
+
+_REFERENCE = re.compile(r"\$(?:(\$)|\{(\w+)\}|(\w+))")
+
+_Expansion = Tuple[str, FrozenSet[str]]
+"""An expanded value and the names of all variables it depends on, directly or through other variables."""
+
+
+@lru_cache(maxsize=4096)
+def _parse(value: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Split a value into literal parts and the names referenced between them.
+
+    Returns:
+        Tuple[Tuple[str, ...], Tuple[str, ...]]: The literals, which are one more than the names, and the names.
+    """
+    literals: List[str] = []
+    names: List[str] = []
+    literal: List[str] = []
+    position = 0
+    for match in _REFERENCE.finditer(value):
+        literal.append(value[position : match.start()])
+        position = match.end()
+        if match.group(1):
+            literal.append("$")
+        else:
+            literals.append("".join(literal))
+            literal = []
+            names.append(match.group(2) or match.group(3))
+    literal.append(value[position:])
+    literals.append("".join(literal))
+    return tuple(literals), tuple(names)
+
+
+class VariableScope(Mapping[str, str]):
+    """One level of variables on top of a parent scope. Looking up a variable returns its expanded value.
+
+    Args:
+        variables (Optional[Mapping[str, str]]): The raw variables of this level. Defaults to None.
+        parent (Optional[VariableScope]): The scope with the lower precedence. Defaults to None.
+    """
+
+    __slots__ = ("_variables", "_parent", "_expanded", "_children")
+
+    def __init__(
+        self,
+        variables: Optional[Mapping[str, str]] = None,
+        parent: Optional[VariableScope] = None,
+    ) -> None:
+        self._variables: Mapping[str, str] = variables or {}
+        self._parent = parent
+        self._expanded: Dict[str, _Expansion] = {}
+        self._children: Dict[Tuple[Tuple[str, str], ...], VariableScope] = {}
+
+    @property
+    def parent(self) -> Optional[VariableScope]:
+        return self._parent
+
+    def child(self, variables: Optional[Mapping[str, str]]) -> VariableScope:
+        """Returns the scope of the given variables on top of this one.
+
+        Scopes are shared between callers passing equal variables, so their expanded values are memoized for all.
+        """
+        if not variables:
+            return self
+        key = tuple(variables.items())
+        scope = self._children.get(key)
+        if scope is None:
+            scope = self._children[key] = VariableScope(dict(variables), self)
+        return scope
+
+    def __getitem__(self, name: str) -> str:
+        if not self._defines(name):
+            raise KeyError(name)
+        return self._expand(name, ())[0]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self._defines(name)
+
+    def __iter__(self) -> Iterator[str]:
+        names: Dict[str, None] = {}
+        scope: Optional[VariableScope] = self
+        scopes = []
+        while scope is not None:
+            scopes.append(scope)
+            scope = scope._parent
+        for scope in reversed(scopes):
+            names.update(dict.fromkeys(scope._variables))
+        return iter(names)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def raw(self, name: str) -> Optional[str]:
+        """Returns the unexpanded value of a variable, or None if it is not defined."""
+        scope = self._definition(name)
+        return scope._variables[name] if scope is not None else None
+
+    def expand(self, text: str) -> str:
+        """Expand the references in a text, like a script line, with the variables of this scope.
+
+        Raises:
+            VariableCycleError: If a referenced variable references itself through other variables.
+        """
+        literals, names = _parse(text)
+        if not names:
+            return literals[0]
+        parts = [literals[0]]
+        for name, literal in zip(names, literals[1:]):
+            parts.append(self._reference(name, ())[0])
+            parts.append(literal)
+        return "".join(parts)
+
+    def as_dict(self) -> Dict[str, str]:
+        """Returns the expanded values of all variables of this scope and its parents."""
+        return {name: self._expand(name, ())[0] for name in self}
+
+    def _defines(self, name: str) -> bool:
+        return self._definition(name) is not None
+
+    def _definition(self, name: str) -> Optional[VariableScope]:
+        """Returns the scope with the highest precedence defining a variable."""
+        scope: Optional[VariableScope] = self
+        while scope is not None:
+            if name in scope._variables:
+                return scope
+            scope = scope._parent
+        return None
+
+    def _reference(self, name: str, chain: Tuple[str, ...]) -> _Expansion:
+        """Expand a reference, which is empty and depends on the name if the variable is undefined."""
+        if not self._defines(name):
+            return "", frozenset((name,))
+        return self._expand(name, chain)
+
+    def _expand(self, name: str, chain: Tuple[str, ...]) -> _Expansion:
+        expansion = self._expanded.get(name)
+        if expansion is not None:
+            return expansion
+
+        if name not in self._variables and self._parent is not None:
+            expansion = self._parent._expand(name, chain)
+            if not any(dependency in self._variables for dependency in expansion[1]):
+                self._expanded[name] = expansion
+                return expansion
+
+        if name in chain:
+            raise VariableCycleError([*chain, name])
+
+        definition = self._definition(name)
+        assert definition is not None
+        literals, names = _parse(definition._variables[name])
+        parts = [literals[0]]
+        dependencies = set(names)
+        for reference, literal in zip(names, literals[1:]):
+            if reference == name:
+                scope = definition._parent
+                value, nested = (
+                    scope._reference(name, ())
+                    if scope is not None
+                    else ("", frozenset())
+                )
+            else:
+                value, nested = self._reference(reference, chain + (name,))
+            parts.append(value)
+            parts.append(literal)
+            dependencies.update(nested)
+
+        expansion = self._expanded[name] = ("".join(parts), frozenset(dependencies))
+        return expansion
+
+
+class VariableExpander:
+    """Builds the variable scopes of the jobs of a pipeline.
+
+    Args:
+        pipeline (Pipeline): The pipeline, whose global variables are the base of every job.
+        predefined (Optional[Mapping[str, str]]): The predefined variables, like `CI_COMMIT_BRANCH`, which have
+            the lowest precedence. Defaults to None.
+        overrides (Optional[Mapping[str, str]]): The variables the pipeline is run with, like the variables of a
+            trigger or a schedule, which have the highest precedence. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        *,
+        predefined: Optional[Mapping[str, str]] = None,
+        overrides: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        self._globals = VariableScope(predefined).child(pipeline.variables)
+        self._jobs = pipeline.jobs
+        self._overrides = dict(overrides) if overrides else None
+
+    @property
+    def globals(self) -> VariableScope:
+        """The scope of the global variables, including the predefined variables but without the overrides."""
+        return self._globals
+
+    def job(
+        self, job: Job, *, rule: Optional[Union[Rule, FrozenRule]] = None
+    ) -> VariableScope:
+        """Returns the effective variables of a job.
+
+        Args:
+            job (Job): The job.
+            rule (Optional[Union[Rule, FrozenRule]]): The rule which created the job, whose variables take
+                precedence over the variables of the job. Defaults to None.
+
+        Returns:
+            VariableScope: The scope of the job.
+        """
+        scope = self._globals.child(job.variables)
+        if rule is not None:
+            scope = scope.child(rule.render().get("variables"))  # type: ignore[arg-type]
+        return scope.child(self._overrides)
+
+    def expand_all(self) -> Dict[str, Dict[str, str]]:
+        """Returns the expanded variables of every job by its name, without the variables of rules."""
+        return {job.name: self.job(job).as_dict() for job in self._jobs}
@@ -0,0 +1,304 @@
+"""
+Evaluates [CI/CD variable expressions](https://docs.gitlab.com/ee/ci/jobs/job_control.html#cicd-variable-expressions)
+of `Rule.if_statement` and predicts which jobs a pipeline creates.
+
+Every expression is compiled once into a Python closure, which is cached by the expression string and shared by all
+rules using the same expression:
+
+```python
+predicate = compile_expression('$CI_COMMIT_BRANCH == "main" && $CI_PIPELINE_SOURCE =~ /^(push|web)$/')
+predicate({"CI_COMMIT_BRANCH": "main", "CI_PIPELINE_SOURCE": "push"})  # True
+```
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    List,
+    Mapping,
+    Optional,
+    Pattern,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from nay.core.changes import FileMatch
+from nay.core.exceptions import ExpressionSyntaxError
+from nay.core.rules import FrozenRule, Rule, When
+
+Variables = Mapping[str, str]
+"""The variables an expression is evaluated with. Missing variables are `null`."""
+
+Predicate = Callable[[Variables], bool]
+"""A compiled expression."""
+
+_Operand = Callable[[Variables], Any]
+
+_TOKEN = re.compile(
+    r"""
+    \s*(?:
+        (?P<variable>\$(?:\{(?P<braced>\w+)\}|(?P<plain>\w+)))
+      | (?P<string>"[^"]*"|'[^']*')
+      | (?P<regex>/(?:[^/\\]|\\.)*/[a-z]*)
+      | (?P<operator>==|!=|=~|!~|&&|\|\||\(|\))
+      | (?P<null>null\b)
+    )
+    """,
+    re.VERBOSE,
+)
+
+_REGEX_FLAGS = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL}
+
+_Token = Tuple[str, Any, int]
+
+
+@lru_cache(maxsize=None)
+def compile_expression(expression: str) -> Predicate:
+    """Compile a `rules:if` expression into a predicate.
+
+    Supported are `$VARIABLE` and `${VARIABLE}`, string literals in single or double quotes, `null`,
+    regular expressions like `/^release-.*$/i`, the operators `==`, `!=`, `=~`, `!~`, `&&` and `||`, and
+    parentheses. `&&` binds stronger than `||`. A variable on its own is true if it is set and not empty.
+    The right side of `=~` and `!~` may also be a variable containing a regular expression.
+
+    The result is cached, so compiling the same expression again is a dictionary lookup.
+
+    Args:
+        expression (str): The expression of `Rule.if_statement`.
+
+    Raises:
+        ExpressionSyntaxError: If the expression is invalid.
+
+    Returns:
+        Predicate: A function evaluating the expression for a mapping of variables.
+    """
+    return _Parser(expression).parse()
+
+
+def rule_matches(
+    rule: Union[Rule, FrozenRule],
+    variables: Variables,
+    files: Optional[FileMatch] = None,
+) -> bool:
+    """Check whether the clauses of a rule match.
+
+    `changes` and `exists` clauses can not be evaluated without a list of files and are considered matching
+    if `files` is None.
+
+    Args:
+        rule (Union[Rule, FrozenRule]): The rule to check.
+        variables (Variables): The variables of the pipeline.
+        files (Optional[FileMatch]): The result of `FileMatcher.match()` for the changed and existing files.
+            Defaults to None.
+
+    Returns:
+        bool: True if the rule applies.
+    """
+    if rule.if_statement and not compile_expression(rule.if_statement)(variables):
+        return False
+    return files is None or files.rule_matches(rule)
+
+
+def evaluate_rules(
+    rules: Sequence[Union[Rule, FrozenRule]],
+    variables: Variables,
+    files: Optional[FileMatch] = None,
+) -> When:
+    """Evaluate the rules of a job like GitLab does when creating a pipeline.
+
+    The first matching rule decides about the job. If no rule matches, the job is not created. A job without
+    rules is always created.
+
+    Args:
+        rules (Sequence[Union[Rule, FrozenRule]]): The rules of the job.
+        variables (Variables): The variables of the pipeline.
+        files (Optional[FileMatch]): The result of `FileMatcher.match()` for the changed and existing files.
+            Defaults to None, which considers all `changes` and `exists` clauses matching.
+
+    Returns:
+        When: The `when` of the first matching rule, `When.ON_SUCCESS` if there are no rules and `When.NEVER`
+            if no rule matches.
+    """
+    if not rules:
+        return When.ON_SUCCESS
+
+    for rule in rules:
+        if rule_matches(rule, variables, files):
+            return rule.when
+    return When.NEVER
+
+
+@lru_cache(maxsize=1024)
+def _compile_regex(literal: str) -> Optional[Pattern[str]]:
+    """Compile a regular expression literal like `/pattern/flags`, or return None if it is no such literal."""
+    if len(literal) < 2 or not literal.startswith("/") or literal.rfind("/") == 0:
+        return None
+
+    end = literal.rfind("/")
+    flags = 0
+    for flag in literal[end + 1 :]:
+        if flag not in _REGEX_FLAGS:
+            return None
+        flags |= _REGEX_FLAGS[flag]
+    try:
+        return re.compile(literal[1:end].replace("\\/", "/"), flags)
+    except re.error:
+        return None
+
+
+class _Parser:
+    """A recursive descent parser which builds the closures of an expression."""
+
+    def __init__(self, expression: str) -> None:
+        self._expression = expression
+        self._tokens = self._tokenize()
+        self._position = 0
+
+    def _tokenize(self) -> List[_Token]:
+        tokens: List[_Token] = []
+        offset = 0
+        end = len(self._expression.rstrip())
+        while offset < end:
+            match = _TOKEN.match(self._expression, offset)
+            if not match or match.end() == offset:
+                raise ExpressionSyntaxError(
+                    self._expression, offset, "Unexpected character"
+                )
+
+            start = match.start(match.lastgroup)  # type: ignore[arg-type]
+            if match.group("variable"):
+                tokens.append(
+                    ("variable", match.group("braced") or match.group("plain"), start)
+                )
+            elif match.group("string"):
+                tokens.append(("string", match.group("string")[1:-1], start))
+            elif match.group("regex"):
+                pattern = _compile_regex(match.group("regex"))
+                if pattern is None:
+                    raise ExpressionSyntaxError(
+                        self._expression, start, "Invalid regular expression"
+                    )
+                tokens.append(("regex", pattern, start))
+            elif match.group("null"):
+                tokens.append(("null", None, start))
+            else:
+                tokens.append((match.group("operator"), None, start))
+            offset = match.end()
+        return tokens
+
+    def _peek(self) -> Optional[str]:
+        return (
+            self._tokens[self._position][0]
+            if self._position < len(self._tokens)
+            else None
+        )
+
+    def _error(self, reason: str) -> ExpressionSyntaxError:
+        position = (
+            self._tokens[self._position][2]
+            if self._position < len(self._tokens)
+            else len(self._expression)
+        )
+        return ExpressionSyntaxError(self._expression, position, reason)
+
+    def parse(self) -> Predicate:
+        if not self._tokens:
+            raise self._error("Empty expression")
+
+        predicate = self._or()
+        if self._position != len(self._tokens):
+            raise self._error("Unexpected token")
+        return predicate
+
+    def _or(self) -> Predicate:
+        operands = [self._and()]
+        while self._peek() == "||":
+            self._position += 1
+            operands.append(self._and())
+
+        if len(operands) == 1:
+            return operands[0]
+        return lambda variables: any(operand(variables) for operand in operands)
+
+    def _and(self) -> Predicate:
+        operands = [self._primary()]
+        while self._peek() == "&&":
+            self._position += 1
+            operands.append(self._primary())
+
+        if len(operands) == 1:
+            return operands[0]
+        return lambda variables: all(operand(variables) for operand in operands)
+
+    def _primary(self) -> Predicate:
+        if self._peek() == "(":
+            self._position += 1
+            predicate = self._or()
+            if self._peek() != ")":
+                raise self._error("Missing closing parenthesis")
+            self._position += 1
+            return predicate
+
+        left = self._operand()
+        operator = self._peek()
+        if operator not in ("==", "!=", "=~", "!~"):
+            return lambda variables: bool(left(variables))
+
+        self._position += 1
+        if operator in ("=~", "!~"):
+            return self._match(left, operator == "!~")
+
+        right = self._operand()
+        if operator == "==":
+            return lambda variables: left(variables) == right(variables)
+        return lambda variables: left(variables) != right(variables)
+
+    def _match(self, left: _Operand, negate: bool) -> Predicate:
+        kind = self._peek()
+        if kind == "regex":
+            pattern: Pattern[str] = self._tokens[self._position][1]
+            self._position += 1
+
+            def matches(variables: Variables) -> bool:
+                value = left(variables)
+                return value is not None and pattern.search(value) is not None
+
+        elif kind == "variable":
+            right = self._operand()
+
+            def matches(variables: Variables) -> bool:
+                value, literal = left(variables), right(variables)
+                dynamic = _compile_regex(literal) if literal else None
+                return (
+                    value is not None
+                    and dynamic is not None
+                    and dynamic.search(value) is not None
+                )
+
+        else:
+            raise self._error("Expected a regular expression")
+
+        if negate:
+            return lambda variables: not matches(variables)
+        return matches
+
+    def _operand(self) -> _Operand:
+        if self._position >= len(self._tokens):
+            raise self._error("Unexpected end of expression")
+
+        kind, value, _ = self._tokens[self._position]
+        self._position += 1
+        if kind == "variable":
+            return lambda variables: variables.get(value)
+        if kind == "string" or kind == "null":
+            return lambda variables: value
+
+        self._position -= 1
+        if kind == "regex":
+            raise self._error("A regular expression must follow =~ or !~")
+        raise self._error("Expected a variable, string or null")
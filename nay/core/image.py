@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from copy import deepcopy
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Union
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from weakref import WeakValueDictionary
 
 
-@dataclass
+@dataclass(eq=False)
 class Image:
     """Represents the [Image](https://docs.gitlab.com/ee/ci/yaml/#image) keyword.
 
@@ -15,6 +15,10 @@ class Image:
     instances of this class, as it may lead to unpredictable changes in other references. Instead, use the
     `.with_tag()` and `.with_entrypoint()` methods to create modified copies for specific use cases.
 
+    Images are hashable and compare by their structural `fingerprint`, so they can be deduplicated with a
+    set or used as dictionary keys. Assigning to an attribute invalidates the cached fingerprint and the
+    cached result of `render()`, but in-place modifications of the `entrypoint` list are not tracked.
+
     Args:
         name (str): The fully qualified image name, including the repository and tag.
         tag (Optional[str]): Container image tag in the registry to use.
@@ -25,23 +29,35 @@ class Image:
     tag: Optional[str] = None
     entrypoint: Optional[List[str]] = None
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name not in ("_fingerprint", "_rendered"):
+            super().__setattr__("_fingerprint", None)
+            super().__setattr__("_rendered", None)
+
     def with_tag(self, tag: str) -> Image:
         """
         Returns a copy of that image with an altered tag.
         You can still use the original Image object with its original tag.
         """
-        copy = deepcopy(self)
-        copy.tag = tag
-        return copy
+        return replace(
+            self,
+            tag=tag,
+            entrypoint=list(self.entrypoint) if self.entrypoint is not None else None,
+        )
 
     def with_entrypoint(self, *entrypoint: str) -> Image:
         """
         Returns a copy of that image with an altered entrypoint.
         You can still use the original Image object with its original entrypoint.
         """
-        copy = deepcopy(self)
-        copy.entrypoint = list(entrypoint)
-        return copy
+        return replace(self, entrypoint=list(entrypoint))
+
+    def freeze(self) -> FrozenImage:
+        """
+        Returns the interned, immutable `FrozenImage` with the same content as this image.
+        """
+        return FrozenImage(self.name, self.tag, self.entrypoint)
 
     def render(self) -> Dict[str, Union[str, List[str]]]:
         """Return a representation of this Image object as a dictionary with static values.
@@ -49,9 +65,15 @@ class Image:
         The rendered representation is used by Nay to dump it
         in YAML format as part of the .gitlab-ci.yml pipeline.
 
+        The dictionary is cached until an attribute is reassigned and shared between all callers,
+        so it must not be altered.
+
         Returns:
             Dict[str, Union[str, List[str]]]: A dictionary representing the image object in Gitlab CI.
         """
+        if self._rendered is not None:
+            return self._rendered
+
         rendered: Dict[str, Union[str, List[str]]] = {}
 
         rendered["name"] = self.name + (f":{self.tag}" if self.tag else "")
@@ -59,6 +81,7 @@ class Image:
         if self.entrypoint:
             rendered["entrypoint"] = self.entrypoint
 
+        self._rendered = rendered
         return rendered
 
     def _equals(self, image: Optional[Image]) -> bool:
@@ -69,4 +92,171 @@ class Image:
         if not image:
             return False
 
-        return self.render() == image.render()
+        return self.fingerprint == image.fingerprint
+
+    @property
+    def fingerprint(self) -> Tuple[Any, ...]:
+        """A canonical, hashable representation of this image.
+
+        Two images with the same fingerprint render identically. The value is cached
+        until one of the attributes is reassigned.
+
+        Returns:
+            Tuple[Any, ...]: The structural fingerprint of this image.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = (
+                self.name + (f":{self.tag}" if self.tag else ""),
+                tuple(self.entrypoint) if self.entrypoint else None,
+            )
+        return self._fingerprint
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (Image, FrozenImage)):
+            return NotImplemented
+        return self is other or self.fingerprint == other.fingerprint
+
+    def __hash__(self) -> int:
+        return hash(self.fingerprint)
+
+
+class FrozenImage:
+    """An immutable, interned variant of `Image`.
+
+    Constructing a `FrozenImage` with the same content as an existing one returns the identical object,
+    so a base image that is derived hundreds of times is only held once in memory. Derivations like
+    `.with_tag()` share all unchanged fields with the original and never copy them.
+
+    A `FrozenImage` compares equal to an `Image` with the same fingerprint and can be used wherever
+    an `Image` is expected.
+
+    Args:
+        name (str): The fully qualified image name, including the repository and tag.
+        tag (Optional[str]): Container image tag in the registry to use.
+        entrypoint (Optional[Sequence[str]]): Overrides the container's entrypoint. Defaults to None.
+    """
+
+    __slots__ = (
+        "name",
+        "tag",
+        "entrypoint",
+        "_fingerprint",
+        "_hash",
+        "_rendered",
+        "__weakref__",
+    )
+
+    _pool: WeakValueDictionary[Tuple[Any, ...], FrozenImage] = WeakValueDictionary()
+
+    name: str
+    tag: Optional[str]
+    entrypoint: Optional[Tuple[str, ...]]
+
+    def __new__(
+        cls,
+        name: str,
+        tag: Optional[str] = None,
+        entrypoint: Optional[Sequence[str]] = None,
+    ) -> FrozenImage:
+        frozen_entrypoint = tuple(entrypoint) if entrypoint is not None else None
+        key = (name, tag, frozen_entrypoint)
+        image = cls._pool.get(key)
+        if image is None:
+            image = super().__new__(cls)
+            fingerprint = (
+                name + (f":{tag}" if tag else ""),
+                frozen_entrypoint if frozen_entrypoint else None,
+            )
+            for slot, value in (
+                ("name", name),
+                ("tag", tag),
+                ("entrypoint", frozen_entrypoint),
+                ("_fingerprint", fingerprint),
+                ("_hash", hash(fingerprint)),
+                ("_rendered", None),
+            ):
+                object.__setattr__(image, slot, value)
+            cls._pool[key] = image
+        return image
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"FrozenImage is immutable, cannot set '{name}'.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"FrozenImage is immutable, cannot delete '{name}'.")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (FrozenImage, (self.name, self.tag, self.entrypoint))
+
+    def __copy__(self) -> FrozenImage:
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> FrozenImage:
+        return self
+
+    def __repr__(self) -> str:
+        return f"FrozenImage(name={self.name!r}, tag={self.tag!r}, entrypoint={self.entrypoint!r})"
+
+    def with_tag(self, tag: str) -> FrozenImage:
+        """
+        Returns the interned image with an altered tag.
+        """
+        return FrozenImage(self.name, tag, self.entrypoint)
+
+    def with_entrypoint(self, *entrypoint: str) -> FrozenImage:
+        """
+        Returns the interned image with an altered entrypoint.
+        """
+        return FrozenImage(self.name, self.tag, entrypoint)
+
+    def thaw(self) -> Image:
+        """
+        Returns a mutable `Image` with the same content as this image.
+        """
+        return Image(
+            self.name,
+            self.tag,
+            list(self.entrypoint) if self.entrypoint is not None else None,
+        )
+
+    def render(self) -> Dict[str, Union[str, List[str]]]:
+        """Return a representation of this image as a dictionary with static values.
+
+        The dictionary is computed once and shared between all callers, so it must not be altered.
+
+        Returns:
+            Dict[str, Union[str, List[str]]]: A dictionary representing the image object in Gitlab CI.
+        """
+        if self._rendered is not None:
+            return self._rendered
+
+        rendered: Dict[str, Union[str, List[str]]] = {"name": self._fingerprint[0]}
+
+        if self.entrypoint:
+            rendered["entrypoint"] = list(self.entrypoint)
+
+        object.__setattr__(self, "_rendered", rendered)
+        return rendered
+
+    def _equals(self, image: Optional[Union[Image, FrozenImage]]) -> bool:
+        """
+        Returns:
+            bool: True if self equals `image`.
+        """
+        if not image:
+            return False
+
+        return self._fingerprint == image.fingerprint
+
+    @property
+    def fingerprint(self) -> Tuple[Any, ...]:
+        """The structural fingerprint of this image, see `Image.fingerprint`."""
+        return self._fingerprint
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (Image, FrozenImage)):
+            return NotImplemented
+        return self is other or self._fingerprint == other.fingerprint
+
+    def __hash__(self) -> int:
+        return self._hash
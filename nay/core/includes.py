@@ -0,0 +1,300 @@
+"""
+Resolves the [include](https://docs.gitlab.com/ee/ci/yaml/#include) keyword of `.gitlab-ci.yml` files.
+
+`IncludeResolver` reads the main configuration and all files it includes, directly or through other included
+files, and merges them like GitLab does: included files are merged in the order of the `include` entries and the
+including file overrides them. The files of one level of the include tree are read and parsed concurrently.
+
+Parsed files are kept in a `ParseCache` keyed by their path, modification time and size, so repeated runs in the
+same process, and files included from many places, are parsed only once:
+
+```python
+resolver = IncludeResolver("path/to/repository", mirror="path/to/mirror", project="group/project")
+loaded = resolver.load(".gitlab-ci.yml")  # a nay.core.loader.LoadedPipeline
+```
+
+`include:local` and files of the own project are read from the repository. `include:remote`, `include:template` and
+files of other projects are read from the mirror directory, which must contain them at `<host>/<path>` of the URL,
+`templates/<template>` and `<project>/<file>`, or `<project>/<ref>/<file>` if a `ref` is given. Like in GitLab,
+`include:local` entries of a file of another project are relative to that project.
+`rules` of include entries are not evaluated, so the files are always included.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import yaml
+
+from nay.core.exceptions import IncludeError
+from nay.core.loader import LoadedPipeline, Loader
+from nay.core.optimize import deep_merge
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+class ParseCache:
+    """Parsed YAML files keyed by their path. An entry is reused as long as the modification time and the size
+    of the file are unchanged.
+
+    The cache is thread-safe. The returned documents are shared between all callers, so they must not be altered.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str) -> Dict[str, Any]:
+        """Returns the parsed file.
+
+        Raises:
+            OSError: If the file cannot be read.
+            yaml.YAMLError: If the file is no valid YAML.
+            ValueError: If the file does not contain a mapping.
+        """
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry[1]
+
+        with open(path, encoding="utf-8") as stream:
+            document = yaml.load(stream, Loader=Loader) or {}
+        if not isinstance(document, dict):
+            raise ValueError("the file does not contain a mapping")
+
+        with self._lock:
+            self._entries[path] = (key, document)
+            self.misses += 1
+        return document
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+CACHE = ParseCache()
+"""The cache shared by all resolvers which are not given a cache of their own."""
+
+
+class IncludeResolver:
+    """Reads a `.gitlab-ci.yml` and merges all files it includes.
+
+    Args:
+        root (PathLike): The root directory of the repository, which local includes are relative to.
+        mirror (Optional[PathLike]): The directory containing remote includes, templates and files of other
+            projects. Defaults to None, which makes these includes fail.
+        project (Optional[str]): The path of the own project, like `group/project`. Files included from this
+            project are read from `root`. Defaults to None.
+        max_workers (Optional[int]): The maximum number of threads reading files. Defaults to the default of
+            `ThreadPoolExecutor`.
+        cache (Optional[ParseCache]): The cache of parsed files. Defaults to the shared `CACHE`.
+    """
+
+    def __init__(
+        self,
+        root: PathLike = ".",
+        *,
+        mirror: Optional[PathLike] = None,
+        project: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        cache: Optional[ParseCache] = None,
+    ) -> None:
+        self._root = os.path.realpath(root)
+        self._mirror = os.path.realpath(mirror) if mirror is not None else None
+        self._project = project
+        self._max_workers = max_workers
+        self._cache = cache if cache is not None else CACHE
+
+    def resolve(self, path: PathLike = ".gitlab-ci.yml") -> Dict[str, Any]:
+        """Read a configuration and merge it with all included files.
+
+        Args:
+            path (PathLike): The main configuration, relative to the root directory. Defaults to `.gitlab-ci.yml`.
+
+        Raises:
+            IncludeError: If a file cannot be read or parsed, or if the includes are circular.
+
+        Returns:
+            Dict[str, Any]: The merged configuration without the `include` keyword.
+        """
+        main = os.path.normpath(os.path.join(self._root, path))
+        documents: Dict[str, Dict[str, Any]] = {}
+        includes: Dict[str, List[str]] = {}
+        parents: Dict[str, Optional[str]] = {main: None}
+        # The root directory of the project containing every file, which its `include:local` entries are relative to.
+        bases: Dict[str, str] = {main: self._root}
+
+        frontier = [main]
+        with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
+            while frontier:
+                parsed = list(
+                    pool.map(lambda file: self._read(file, parents), frontier)
+                )
+                discovered: List[str] = []
+                for file, document in zip(frontier, parsed):
+                    documents[file] = document
+                    targets = self._targets(document, file, parents, bases[file])
+                    includes[file] = list(targets)
+                    for target, base in targets.items():
+                        if target not in parents:
+                            parents[target] = file
+                            bases[target] = base
+                            discovered.append(target)
+                frontier = discovered
+
+        return self._merge(main, documents, includes, (main,), {})
+
+    def load(self, path: PathLike = ".gitlab-ci.yml") -> LoadedPipeline:
+        """Like `resolve()`, but returns the merged configuration as `LoadedPipeline`."""
+        return LoadedPipeline(self.resolve(path))
+
+    def _chain(self, file: str, parents: Dict[str, Optional[str]]) -> List[str]:
+        chain: List[str] = []
+        current: Optional[str] = file
+        while current is not None:
+            chain.append(self._display(current))
+            current = parents.get(current)
+        return chain[::-1]
+
+    def _display(self, file: str) -> str:
+        for base in (self._root, self._mirror):
+            if base is not None and file.startswith(base + os.sep):
+                return os.path.relpath(file, base)
+        return file
+
+    def _read(self, file: str, parents: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        try:
+            return self._cache.get(file)
+        except FileNotFoundError:
+            reason = "the file does not exist"
+        except (OSError, yaml.YAMLError, ValueError) as error:
+            reason = str(error)
+        raise IncludeError(
+            self._display(file), reason, self._chain(parents[file] or file, parents)
+        )
+
+    def _targets(
+        self,
+        document: Dict[str, Any],
+        file: str,
+        parents: Dict[str, Optional[str]],
+        base: str,
+    ) -> Dict[str, str]:
+        """Returns the absolute paths of the files included by a document, in the order of the entries, with the
+        root directories of their projects.
+
+        `include:local` entries are relative to `base`, the root directory of the project containing the document.
+        """
+        entries = document.get("include") or []
+        if not isinstance(entries, list):
+            entries = [entries]
+
+        targets: Dict[str, str] = {}
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {"remote" if "://" in entry else "local": entry}
+            try:
+                paths, project = self._locate(entry, base)
+            except ValueError as error:
+                raise IncludeError(
+                    str(entry), str(error), self._chain(file, parents)
+                ) from None
+            for path in paths:
+                targets.setdefault(path, project)
+        return targets
+
+    def _locate(self, entry: Dict[str, Any], base: str) -> Tuple[List[str], str]:
+        """Returns the files of an include entry and the root directory of the project containing them."""
+        if "local" in entry:
+            return self._local(base, entry["local"]), base
+
+        if "project" in entry:
+            files = entry.get("file") or []
+            if isinstance(files, str):
+                files = [files]
+            if entry["project"] == self._project:
+                project = self._root
+            else:
+                project = os.path.normpath(
+                    os.path.join(
+                        self._mirrored(), entry["project"], entry.get("ref") or ""
+                    )
+                )
+            paths = [path for file in files for path in self._local(project, file)]
+            return paths, project
+
+        if "remote" in entry:
+            url = urlsplit(entry["remote"])
+            return [self._inside(self._mirrored(), url.netloc + url.path)], self._root
+
+        if "template" in entry:
+            template = f"templates/{entry['template']}"
+            return [self._inside(self._mirrored(), template)], self._root
+
+        raise ValueError("unknown include type")
+
+    def _mirrored(self) -> str:
+        if self._mirror is None:
+            raise ValueError("no mirror directory is configured")
+        return self._mirror
+
+    def _local(self, base: str, pattern: str) -> List[str]:
+        """Returns the files matching a path, which may contain wildcards, relative to a base directory."""
+        if not any(char in pattern for char in "*?["):
+            return [self._inside(base, pattern)]
+
+        matches = glob.glob(os.path.join(base, pattern.lstrip("/")), recursive=True)
+        return [
+            self._inside(base, os.path.relpath(match, base))
+            for match in sorted(matches)
+        ]
+
+    def _inside(self, base: str, path: str) -> str:
+        resolved = os.path.normpath(os.path.join(base, path.lstrip("/")))
+        if not resolved.startswith(base + os.sep):
+            raise ValueError("the path is outside of its directory")
+        return resolved
+
+    def _merge(
+        self,
+        file: str,
+        documents: Dict[str, Dict[str, Any]],
+        includes: Dict[str, List[str]],
+        chain: Tuple[str, ...],
+        merged: Dict[str, Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        if file in merged:
+            return merged[file]
+
+        result: Dict[str, Any] = {}
+        for target in includes[file]:
+            if target in chain:
+                cycle = [self._display(item) for item in chain + (target,)]
+                raise IncludeError(
+                    self._display(target), "the includes are circular", cycle
+                )
+            result = deep_merge(
+                result,
+                self._merge(target, documents, includes, chain + (target,), merged),
+            )
+        result = deep_merge(
+            result,
+            {key: value for key, value in documents[file].items() if key != "include"},
+        )
+
+        merged[file] = result
+        return result
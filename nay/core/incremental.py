@@ -0,0 +1,242 @@
+"""
+Regenerates pipeline files incrementally. Files whose inputs did not change are neither rendered nor rewritten.
+
+The inputs of every job are hashed from the fingerprints of its `Rule`, `Need` and `Image` objects, and the inputs of
+every pipeline from the hashes of its jobs, its stages and global variables, and the values of the environment
+variables passed as `environment`. The built pipeline already contains every value the generator read from the
+environment, so no environment variable is hashed by default; per-run values like `CI_PIPELINE_ID` would never let a
+file be skipped in CI. The hashes are stored in a cache file next to the generated files:
+
+- If the hash of a pipeline is unchanged and its file still has the content written last time, the pipeline is
+  skipped without rendering it.
+- Otherwise the pipeline is rendered. If the YAML equals the content of the file, the file is not touched, so its
+  modification time and all caches depending on it are kept. Changed files are replaced atomically.
+
+In check mode nothing is written, which lets CI jobs verify that the committed files are up to date:
+
+```
+python -m nay.core.incremental --check my_project.ci:pipelines
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from nay.core import writer
+from nay.core.pipeline import Pipeline
+from nay.core.variables import EnvironmentSnapshot
+
+CACHE_VERSION = 2
+"""Increased whenever the cache format or the hashed inputs change, which invalidates all existing caches."""
+
+DEFAULT_CACHE_PATH = ".nay-cache.json"
+
+
+def _hash(value: Any) -> str:
+    return hashlib.sha256(repr(value).encode("utf-8")).hexdigest()
+
+
+def _file_digest(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as stream:
+            return hashlib.sha256(stream.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def job_keys(pipeline: Pipeline) -> Dict[str, str]:
+    """Returns the content hashes of the inputs of all jobs of a pipeline by their names."""
+    return {job.name: _hash(job.fingerprint) for job in pipeline.jobs}
+
+
+def pipeline_key(
+    pipeline: Pipeline,
+    jobs: Mapping[str, str],
+    environment: Mapping[str, str],
+) -> str:
+    """Compute the content hash of the inputs of a pipeline.
+
+    Args:
+        pipeline (Pipeline): The pipeline.
+        jobs (Mapping[str, str]): The hashes of its jobs, as returned by `job_keys()`.
+        environment (Mapping[str, str]): The environment variables the pipeline depends on.
+
+    Returns:
+        str: The hexadecimal SHA-256 hash.
+    """
+    return _hash(
+        (
+            CACHE_VERSION,
+            tuple(pipeline.stages),
+            tuple(pipeline.variables.items()),
+            tuple(jobs.items()),
+            tuple(sorted(environment.items())),
+        )
+    )
+
+
+@dataclass
+class RegenerationReport:
+    """The outcome of `regenerate()`.
+
+    Args:
+        written (List[str]): The files which were written, or would be written in check mode.
+        unchanged (List[str]): The files which were rendered, but whose content did not change.
+        skipped (List[str]): The files whose inputs did not change, so they were not rendered.
+        changed_jobs (Dict[str, List[str]]): The names of new or changed jobs by the written files.
+    """
+
+    written: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    changed_jobs: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.written)
+
+
+def _load_cache(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as stream:
+            cache = json.load(stream)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("files", {})
+
+
+def regenerate(
+    outputs: Mapping[str, Pipeline],
+    *,
+    cache_path: str = DEFAULT_CACHE_PATH,
+    check: bool = False,
+    environment: Optional[Iterable[str]] = None,
+    snapshot: Optional[EnvironmentSnapshot] = None,
+) -> RegenerationReport:
+    """Write the pipelines which changed since the last run.
+
+    Args:
+        outputs (Mapping[str, Pipeline]): The pipelines by the paths of their YAML files.
+        cache_path (str): The path of the cache file. Defaults to `.nay-cache.json`.
+        check (bool): Only report which files would be written, without writing files or the cache.
+            Defaults to False.
+        environment (Optional[Iterable[str]]): The names of additional environment variables whose values are
+            hashed, for inputs which are not part of the built pipelines. Defaults to None, which hashes none.
+        snapshot (Optional[EnvironmentSnapshot]): The environment to read these variables from. Defaults to the
+            active snapshot or a new snapshot of `os.environ`.
+
+    Returns:
+        RegenerationReport: Which files were written, unchanged or skipped.
+    """
+    values: Dict[str, str] = {}
+    if environment is not None:
+        snapshot = snapshot if snapshot is not None else EnvironmentSnapshot.current()
+        values = {key: snapshot.get(key) or "" for key in environment}
+
+    cache = _load_cache(cache_path)
+    new_cache: Dict[str, Any] = {}
+    report = RegenerationReport()
+
+    for path, pipeline in outputs.items():
+        jobs = job_keys(pipeline)
+        key = pipeline_key(pipeline, jobs, values)
+        entry = cache.get(path, {})
+        digest = _file_digest(path)
+
+        if (
+            entry.get("key") == key
+            and digest is not None
+            and entry.get("digest") == digest
+        ):
+            report.skipped.append(path)
+            new_cache[path] = entry
+            continue
+
+        content = pipeline.to_yaml()
+        new_digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        new_cache[path] = {"key": key, "digest": new_digest, "jobs": jobs}
+
+        if new_digest == digest:
+            report.unchanged.append(path)
+            continue
+
+        previous: Dict[str, str] = entry.get("jobs", {})
+        report.written.append(path)
+        report.changed_jobs[path] = [
+            name for name, job_key in jobs.items() if previous.get(name) != job_key
+        ]
+        if not check:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with writer.atomic_stream(path) as stream:
+                stream.write(content)
+
+    if not check and new_cache != cache:
+        with writer.atomic_stream(cache_path) as stream:
+            json.dump({"version": CACHE_VERSION, "files": new_cache}, stream, indent=2)
+
+    return report
+
+
+def _load_outputs(reference: str) -> Mapping[str, Pipeline]:
+    """Import `module:function` and call the function, which returns the pipelines by their paths."""
+    module_name, _, attribute = reference.partition(":")
+    if not attribute:
+        raise ValueError(
+            f"Expected a reference like 'module:function', got '{reference}'."
+        )
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Regenerate the pipeline files returned by a function, given as `module:function`.
+
+    Returns:
+        int: The exit code, which is 1 in check mode if any file would change.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m nay.core.incremental",
+        description="Regenerate only the pipeline files whose inputs changed.",
+    )
+    parser.add_argument(
+        "outputs",
+        help="a function returning the pipelines by their paths, like 'my_project.ci:pipelines'",
+    )
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="the cache file")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="write nothing and exit with 1 if any file would change",
+    )
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    report = regenerate(
+        _load_outputs(args.outputs), cache_path=args.cache, check=args.check
+    )
+
+    for path in report.written:
+        verb = "would write" if args.check else "wrote"
+        print(
+            f"{verb} {path} ({', '.join(report.changed_jobs[path]) or 'global keywords'})"
+        )
+    print(
+        f"{len(report.written)} changed, {len(report.unchanged)} unchanged, "
+        f"{len(report.skipped)} skipped"
+    )
+    return 1 if args.check and report.changed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
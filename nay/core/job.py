@@ -0,0 +1,470 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, cast
+
+from nay.core.exceptions import ScriptArgumentNotAllowedError
+from nay.core.image import FrozenImage, Image
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+from nay.core.rules import FrozenRule, Rule
+
+_UNSET: Any = object()
+
+RenderCache = Dict[Any, Any]
+"""Maps keyword objects to their rendered dictionaries during a pipeline-level render pass."""
+
+
+def _render_shared(keyword: Any, cache: Optional[RenderCache]) -> Any:
+    """Render a keyword object, reusing the dictionary of an equal object rendered before.
+
+    Args:
+        keyword (Any): A `Rule`, `Need` or `Image` object.
+        cache (Optional[RenderCache]): The cache of the current render pass. If None, the object is rendered directly.
+
+    Returns:
+        Any: The rendered dictionary, shared between all equal keyword objects of the render pass.
+    """
+    if cache is None:
+        return keyword.render()
+
+    rendered = cache.get(keyword)
+    if rendered is None:
+        rendered = cache[keyword] = keyword.render()
+    return rendered
+
+
+class Job:
+    """Represents a GitLab CI [job](https://docs.gitlab.com/ee/ci/jobs/).
+
+    Args:
+        name (str): The name of the job, which is its key in the `.gitlab-ci.yml`.
+        script (Union[str, List[str]]): The shell script(s) executed by the runner.
+        stage (Optional[str]): The stage of the job. Defaults to None, which GitLab treats as `test`.
+        image (Optional[Union[Image, FrozenImage, str]]): The Docker image to run the job in. Defaults to None.
+        rules (Optional[List[Rule]]): The rules deciding whether the job is created. Defaults to None.
+        needs (Optional[List[Need]]): The jobs or pipelines this job depends on. An empty list renders
+            `needs: []`, which lets the job start immediately. Defaults to None.
+        variables (Optional[Dict[str, str]]): Variables of the job. Defaults to None.
+        tags (Optional[List[str]]): Tags to select the runner. Defaults to None.
+        matrix (Optional[Matrix]): Runs the job once for every variant of the matrix, see
+            [parallel:matrix](https://docs.gitlab.com/ee/ci/yaml/#parallelmatrix). Defaults to None.
+
+    Jobs are designed to be created by the ten thousands. Their attributes are stored in `__slots__`, and the lists
+    and dictionaries of a job are never modified in place: every method adding scripts, rules, needs, variables or
+    tags replaces the list with a modified copy. The lists can therefore be shared by reference between jobs, which
+    `derive()` does to create jobs from a template in constant time and memory. The lists returned by the properties
+    are shared as well and must not be altered.
+    """
+
+    __slots__ = (
+        "_name",
+        "_stage",
+        "_image",
+        "_scripts",
+        "_rules",
+        "_needs",
+        "_variables",
+        "_tags",
+        "_matrix",
+    )
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        script: Union[str, List[str]],
+        stage: Optional[str] = None,
+        image: Optional[Union[Image, FrozenImage, str]] = None,
+        rules: Optional[List[Union[Rule, FrozenRule]]] = None,
+        needs: Optional[List[Need]] = None,
+        variables: Optional[Dict[str, str]] = None,
+        tags: Optional[List[str]] = None,
+        matrix: Optional[Matrix] = None,
+    ) -> None:
+        if not name:
+            raise ValueError("The job `name` must not be empty.")
+
+        self._name = name
+        self._stage = stage
+        self._scripts: List[str] = [script] if isinstance(script, str) else list(script)
+        self._image: Optional[Union[Image, FrozenImage]] = None
+        self._rules: List[Union[Rule, FrozenRule]] = list(rules) if rules else []
+        self._needs: Optional[List[Need]] = list(needs) if needs is not None else None
+        self._variables: Dict[str, str] = dict(variables) if variables else {}
+        self._tags: List[str] = list(tags) if tags else []
+        self._matrix = matrix
+
+        if image is not None:
+            self.set_image(image)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def stage(self) -> Optional[str]:
+        return self._stage
+
+    @property
+    def image(self) -> Optional[Union[Image, FrozenImage]]:
+        return self._image
+
+    @property
+    def rules(self) -> List[Union[Rule, FrozenRule]]:
+        return self._rules
+
+    @property
+    def needs(self) -> Optional[List[Need]]:
+        return self._needs
+
+    @property
+    def scripts(self) -> List[str]:
+        return self._scripts
+
+    @property
+    def variables(self) -> Dict[str, str]:
+        return self._variables
+
+    @property
+    def tags(self) -> List[str]:
+        return self._tags
+
+    @property
+    def matrix(self) -> Optional[Matrix]:
+        return self._matrix
+
+    @property
+    def fingerprint(self) -> Tuple[Any, ...]:
+        """A canonical, hashable representation of this job.
+
+        It is built from the fingerprints of the `Image`, `Rule`, `Need` and `Matrix` objects of the job. Jobs
+        are mutable, so unlike those objects the fingerprint is computed on every access.
+
+        Returns:
+            Tuple[Any, ...]: The structural fingerprint of this job.
+        """
+        return (
+            type(self).__name__,
+            self._name,
+            self._stage,
+            self._image.fingerprint if self._image is not None else None,
+            tuple(rule.fingerprint for rule in self._rules),
+            (
+                tuple(need.fingerprint for need in self._needs)
+                if self._needs is not None
+                else None
+            ),
+            tuple(self._scripts),
+            tuple(self._variables.items()),
+            tuple(self._tags),
+            self._matrix.fingerprint if self._matrix is not None else None,
+        )
+
+    def derive(
+        self,
+        name: str,
+        *,
+        script: Union[str, List[str]] = _UNSET,
+        stage: Optional[str] = _UNSET,
+        image: Optional[Union[Image, FrozenImage, str]] = _UNSET,
+        rules: Optional[List[Union[Rule, FrozenRule]]] = _UNSET,
+        needs: Optional[List[Need]] = _UNSET,
+        variables: Optional[Dict[str, str]] = _UNSET,
+        tags: Optional[List[str]] = _UNSET,
+        matrix: Optional[Matrix] = _UNSET,
+    ) -> Job:
+        """Create a new job from this job as a template.
+
+        The new job shares the image and the lists of scripts, rules, needs, variables and tags of this job by
+        reference, unless they are replaced by arguments. Modifying one of the jobs afterwards does not affect
+        the other, because the lists are copied on write.
+
+        ```python
+        template = Job(name=".test", script="pytest", stage="test", image="python:3.11", rules=rules)
+        jobs = [template.derive(f"test-{shard}").add_variables(SHARD=str(shard)) for shard in range(100)]
+        ```
+
+        Args:
+            name (str): The name of the new job.
+            script (Union[str, List[str]]): Replaces the scripts. Defaults to the scripts of this job.
+            stage (Optional[str]): Replaces the stage. Defaults to the stage of this job.
+            image (Optional[Union[Image, FrozenImage, str]]): Replaces the image. Defaults to the image of this job.
+            rules (Optional[List[Rule]]): Replaces the rules. Defaults to the rules of this job.
+            needs (Optional[List[Need]]): Replaces the needs. Defaults to the needs of this job.
+            variables (Optional[Dict[str, str]]): Replaces the variables. Defaults to the variables of this job.
+            tags (Optional[List[str]]): Replaces the tags. Defaults to the tags of this job.
+            matrix (Optional[Matrix]): Replaces the matrix. Defaults to the matrix of this job.
+
+        Raises:
+            ValueError: If `name` is empty.
+
+        Returns:
+            Job: The new job, of the same class as this job.
+        """
+        if not name:
+            raise ValueError("The job `name` must not be empty.")
+
+        job = cast(Job, object.__new__(type(self)))
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if slot != "__weakref__" and hasattr(self, slot):
+                    setattr(job, slot, getattr(self, slot))
+        if hasattr(self, "__dict__"):
+            job.__dict__.update(self.__dict__)
+        job._name = name
+
+        if script is not _UNSET:
+            job._scripts = [script] if isinstance(script, str) else list(script)
+        if stage is not _UNSET:
+            job._stage = stage
+        if image is not _UNSET:
+            job._image = None
+            if image is not None:
+                job.set_image(image)
+        if rules is not _UNSET:
+            job._rules = list(rules) if rules else []
+        if needs is not _UNSET:
+            job._needs = list(needs) if needs is not None else None
+        if variables is not _UNSET:
+            job._variables = dict(variables) if variables else {}
+        if tags is not _UNSET:
+            job._tags = list(tags) if tags else []
+        if matrix is not _UNSET:
+            job._matrix = matrix
+        return job
+
+    def variants(self) -> Iterator[Job]:
+        """Generate the jobs GitLab creates for the variants of the matrix of this job.
+
+        The variants are generated one at a time. They are named like `test: [aws, monitoring]`, have the
+        variables of their variant added, and share the image, scripts, rules, needs and tags of this job.
+
+        Yields:
+            Job: One job per variant, or this job if it has no matrix.
+        """
+        if self._matrix is None:
+            yield self
+            return
+
+        for variables in self._matrix:
+            yield self.derive(
+                Matrix.variant_name(self._name, variables),
+                variables={**self._variables, **variables},
+                matrix=None,
+            )
+
+    def set_image(self, image: Union[Image, FrozenImage, str]) -> Job:
+        """Sets the image of this job.
+
+        Args:
+            image (Union[Image, FrozenImage, str]): The image object or the name of the image.
+
+        Returns:
+            Job: The modified Job object.
+        """
+        self._image = Image(image) if isinstance(image, str) else image
+        return self
+
+    def prepend_scripts(self, *scripts: str) -> Job:
+        """Inserts one or more scripts before the current scripts.
+
+        Returns:
+            Job: The modified Job object.
+        """
+        self._scripts = [*scripts, *self._scripts]
+        return self
+
+    def append_scripts(self, *scripts: str) -> Job:
+        """Adds one or more scripts after the current scripts.
+
+        Returns:
+            Job: The modified Job object.
+        """
+        self._scripts = [*self._scripts, *scripts]
+        return self
+
+    def append_rules(self, *rules: Union[Rule, FrozenRule]) -> Job:
+        """Adds one or more rules after the current rules.
+
+        Returns:
+            Job: The modified Job object.
+        """
+        self._rules = [*self._rules, *rules]
+        return self
+
+    def prepend_rules(self, *rules: Union[Rule, FrozenRule]) -> Job:
+        """Inserts one or more rules before the current rules.
+
+        Returns:
+            Job: The modified Job object.
+        """
+        self._rules = [*rules, *self._rules]
+        return self
+
+    def add_needs(self, *needs: Need) -> Job:
+        """Adds one or more needs to this job.
+
+        Returns:
+            Job: The modified Job object.
+        """
+        self._needs = [*(self._needs or ()), *needs]
+        return self
+
+    def set_needs(self, needs: Optional[List[Need]]) -> Job:
+        """Replaces the needs of this job.
+
+        Args:
+            needs (Optional[List[Need]]): The new needs. None removes the `needs` keyword, an empty list
+                renders `needs: []`.
+
+        Returns:
+            Job: The modified Job object.
+        """
+        self._needs = list(needs) if needs is not None else None
+        return self
+
+    def add_variables(self, **variables: str) -> Job:
+        """Adds one or more variables to this job.
+
+        Returns:
+            Job: The modified Job object.
+        """
+        self._variables = {**self._variables, **variables}
+        return self
+
+    def set_matrix(self, matrix: Optional[Matrix]) -> Job:
+        """Sets or removes the `parallel:matrix` of this job.
+
+        Returns:
+            Job: The modified Job object.
+        """
+        self._matrix = matrix
+        return self
+
+    def add_tags(self, *tags: str) -> Job:
+        """Adds one or more runner tags to this job.
+
+        Returns:
+            Job: The modified Job object.
+        """
+        self._tags = [*self._tags, *tags]
+        return self
+
+    def render(self, *, cache: Optional[RenderCache] = None) -> Dict[str, Any]:
+        """Return a representation of this Job object as a dictionary with static values.
+
+        The rendered `Rule`, `Need` and `Image` dictionaries are taken from the render caches of these objects
+        and are shared with every other job using them, so the result must not be altered.
+
+        Args:
+            cache (Optional[RenderCache]): The cache of a pipeline-level render pass. When given, equal keyword
+                objects are rendered once and all jobs reference the same dictionary. Defaults to None.
+
+        Returns:
+            Dict[str, Any]: A dictionary representing the job object in GitLab CI.
+        """
+        rendered_job: Dict[str, Any] = {}
+
+        if self._stage:
+            rendered_job["stage"] = self._stage
+
+        if self._image is not None:
+            rendered_job["image"] = _render_shared(self._image, cache)
+
+        if self._variables:
+            rendered_job["variables"] = self._variables
+
+        if self._tags:
+            rendered_job["tags"] = self._tags
+
+        if self._matrix is not None:
+            rendered_job["parallel"] = {"matrix": _render_shared(self._matrix, cache)}
+
+        if self._rules:
+            rendered_job["rules"] = [
+                _render_shared(rule, cache) for rule in self._rules
+            ]
+
+        if self._needs is not None:
+            rendered_job["needs"] = [
+                _render_shared(need, cache) for need in self._needs
+            ]
+
+        rendered_job["script"] = self._scripts
+        return rendered_job
+
+
+class TriggerJob(Job):
+    """Represents a job which triggers a [child pipeline](https://docs.gitlab.com/ee/ci/pipelines/downstream_pipelines.html#parent-child-pipelines)
+    from a YAML file, which was generated as artifact by another job of the same pipeline.
+
+    Args:
+        name (str): The name of the job.
+        artifact (str): The path of the YAML file of the child pipeline within the artifacts.
+        job (str): The name of the job which generated the artifact.
+        strategy (Optional[str]): `depend` makes the trigger job mirror the status of the child pipeline.
+            Defaults to `depend`.
+        **kwargs (Any): Further arguments of `Job`, like `stage`, `rules` or `needs`.
+
+    Raises:
+        ScriptArgumentNotAllowedError: If `script` is passed, because trigger jobs have no script.
+    """
+
+    __slots__ = ("_artifact", "_artifact_job", "_strategy")
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        artifact: str,
+        job: str,
+        strategy: Optional[str] = "depend",
+        **kwargs: Any,
+    ) -> None:
+        if "script" in kwargs:
+            raise ScriptArgumentNotAllowedError()
+
+        super().__init__(name=name, script=[], **kwargs)
+        self._artifact = artifact
+        self._artifact_job = job
+        self._strategy = strategy
+
+    @property
+    def artifact(self) -> str:
+        return self._artifact
+
+    @property
+    def artifact_job(self) -> str:
+        return self._artifact_job
+
+    @property
+    def strategy(self) -> Optional[str]:
+        return self._strategy
+
+    @property
+    def fingerprint(self) -> Tuple[Any, ...]:
+        return super().fingerprint + (
+            self._artifact,
+            self._artifact_job,
+            self._strategy,
+        )
+
+    def render(self, *, cache: Optional[RenderCache] = None) -> Dict[str, Any]:
+        """Return a representation of this TriggerJob object as a dictionary with static values.
+
+        Args:
+            cache (Optional[RenderCache]): The cache of a pipeline-level render pass. Defaults to None.
+
+        Returns:
+            Dict[str, Any]: A dictionary representing the trigger job in GitLab CI.
+        """
+        rendered_job = super().render(cache=cache)
+        del rendered_job["script"]
+
+        trigger: Dict[str, Any] = {
+            "include": [{"artifact": self._artifact, "job": self._artifact_job}]
+        }
+        if self._strategy:
+            trigger["strategy"] = self._strategy
+        rendered_job["trigger"] = trigger
+        return rendered_job
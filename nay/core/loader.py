@@ -0,0 +1,421 @@
+"""
+Loads existing `.gitlab-ci.yml` files into `Job`, `Rule`, `Need`, `Image` and `Matrix` objects.
+
+The YAML is parsed with the C implementation of PyYAML if it is available, which resolves anchors, aliases and `<<`
+merge keys. `extends`, `default` and [!reference](https://docs.gitlab.com/ee/ci/yaml/yaml_optimization.html#reference-tags)
+tags are resolved like GitLab does. Jobs are only built when they are accessed, so loading a huge file and looking at
+a few jobs does not create objects for all other jobs:
+
+```python
+loaded = load(".gitlab-ci.yml")
+job = loaded["deploy"]  # only this job, its rules, needs and image are built
+pipeline = loaded.to_pipeline()  # builds all jobs
+```
+
+Equal rules, needs, images and matrices are loaded as one shared object. Keywords which are not modelled by `Job`,
+like `artifacts` or `cache`, are available through `LoadedPipeline.unsupported()`. Keys of the loaded keywords which
+are not modelled, like `needs:optional` or `image:pull_policy`, are reported by `LoadedPipeline.dropped()`, and
+`LoadedPipeline.to_pipeline()` refuses to build a pipeline which would silently lose them.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import IO, Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+import yaml
+
+from nay.core.exceptions import UnsupportedKeywordError
+from nay.core.image import Image
+from nay.core.job import Job
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+from nay.core.optimize import (
+    LEGACY_GLOBAL_KEYWORDS,
+    default_keywords,
+    expand_job,
+    freeze,
+    is_job,
+    resolve_extends,
+)
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule, When
+
+SUPPORTED_KEYWORDS = frozenset(
+    {
+        "extends",
+        "image",
+        "inherit",
+        "needs",
+        "parallel",
+        "rules",
+        "script",
+        "stage",
+        "tags",
+        "variables",
+    }
+)
+"""The job keywords which are loaded into `Job` objects. `extends` and `inherit` are resolved while loading."""
+
+SUPPORTED_KEYS = {
+    "image": frozenset({"name", "entrypoint"}),
+    "needs": frozenset({"job", "project", "ref", "pipeline", "artifacts", "parallel"}),
+    "parallel": frozenset({"matrix"}),
+    "rules": frozenset(
+        {"if", "when", "allow_failure", "changes", "exists", "variables"}
+    ),
+}
+"""The keys of the job keywords which are loaded into `Image`, `Need`, `Matrix` and `Rule` objects."""
+
+SUPPORTED_RULE_KEYS = {
+    "allow_failure": frozenset(),
+    "changes": frozenset({"paths"}),
+    "exists": frozenset({"paths"}),
+}
+"""The keys of the dictionary forms of rule keywords which are loaded into `Rule` objects. `allow_failure:exit_codes`
+is loaded as `allow_failure: true`, and `changes:compare_to` is not loaded."""
+
+_MAX_REFERENCE_DEPTH = 10
+
+Source = Union[str, "os.PathLike[str]", IO[str]]
+"""A file path or an open text stream."""
+
+
+class Reference:
+    """A `!reference` tag, which is replaced by the referenced value when a job is built.
+
+    Args:
+        path (Tuple[str, ...]): The name of the job or template followed by the keys to the referenced value.
+    """
+
+    __slots__ = ("path",)
+
+    def __init__(self, path: Tuple[str, ...]) -> None:
+        self.path = path
+
+    def __repr__(self) -> str:
+        return f"Reference({list(self.path)!r})"
+
+
+class Loader(getattr(yaml, "CSafeLoader", yaml.SafeLoader)):  # type: ignore[misc]
+    """The YAML loader for `.gitlab-ci.yml` files, which understands `!reference` tags."""
+
+
+def _construct_reference(loader: yaml.SafeLoader, node: yaml.Node) -> Reference:
+    return Reference(tuple(str(item) for item in loader.construct_sequence(node)))  # type: ignore[arg-type]
+
+
+Loader.add_constructor("!reference", _construct_reference)
+
+
+def _variables(value: Any) -> Dict[str, str]:
+    """Normalize variables, which may be numbers or dictionaries with a `value` and a `description`."""
+    variables: Dict[str, str] = {}
+    for key, item in (value or {}).items():
+        if isinstance(item, dict):
+            item = item.get("value", "")
+        if isinstance(item, bool):
+            item = "true" if item else "false"
+        variables[key] = "" if item is None else str(item)
+    return variables
+
+
+def _flatten(value: Any) -> List[str]:
+    """Flatten nested script lists, which result from `!reference` tags and anchors."""
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        return [str(value)]
+    return [line for item in value for line in _flatten(item)]
+
+
+def _paths(value: Any) -> Optional[List[str]]:
+    """Returns the paths of `changes` and `exists`, which may be lists or dictionaries with `paths`."""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        value = value.get("paths") or []
+    return [str(path) for path in value]
+
+
+def image_from_config(value: Union[str, Dict[str, Any]]) -> Image:
+    """Create an `Image` from the `image` keyword of a `.gitlab-ci.yml`."""
+    if isinstance(value, str):
+        return Image(name=value)
+    entrypoint = value.get("entrypoint")
+    return Image(
+        name=value["name"], entrypoint=list(entrypoint) if entrypoint else None
+    )
+
+
+def rule_from_config(value: Dict[str, Any]) -> Rule:
+    """Create a `Rule` from an entry of the `rules` keyword of a `.gitlab-ci.yml`.
+
+    `allow_failure:exit_codes` is loaded as `allow_failure: true`, and `changes:compare_to` is not loaded. Both are
+    reported by `LoadedPipeline.dropped()`.
+    """
+    return Rule(
+        if_statement=value.get("if"),
+        when=When(value.get("when", When.ON_SUCCESS.value)),
+        allow_failure=bool(value.get("allow_failure", False)),
+        changes=_paths(value.get("changes")),
+        exists=_paths(value.get("exists")),
+        variables=_variables(value.get("variables")) or None,
+    )
+
+
+def matrix_from_config(value: List[Dict[str, Any]]) -> Matrix:
+    """Create a `Matrix` from the entries of `parallel:matrix` of a `.gitlab-ci.yml`."""
+    return Matrix(
+        *(
+            {
+                key: (
+                    [str(item) for item in values]
+                    if isinstance(values, list)
+                    else str(values)
+                )
+                for key, values in entry.items()
+            }
+            for entry in value
+        )
+    )
+
+
+def need_from_config(value: Union[str, Dict[str, Any]]) -> Need:
+    """Create a `Need` from an entry of the `needs` keyword of a `.gitlab-ci.yml`."""
+    if isinstance(value, str):
+        return Need(job=value)
+    parallel = (value.get("parallel") or {}).get("matrix")
+    return Need(
+        job=value.get("job"),
+        project=value.get("project"),
+        ref=value.get("ref"),
+        pipeline=value.get("pipeline"),
+        artifacts=value.get("artifacts", True),
+        parallel=matrix_from_config(parallel) if parallel else None,
+    )
+
+
+class LoadedPipeline(Mapping[str, Job]):
+    """A loaded `.gitlab-ci.yml`, which maps the names of its jobs to `Job` objects built on first access.
+
+    Hidden jobs, whose names start with a dot, are templates and are not part of the mapping.
+
+    Args:
+        config (Dict[str, Any]): The parsed YAML document.
+
+    Raises:
+        ValueError: If the document is not a mapping.
+    """
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        if not isinstance(config, dict):
+            raise ValueError("A .gitlab-ci.yml must contain a mapping.")
+
+        self._config = config
+        self._defaults = default_keywords(config)
+        self._resolved: Dict[str, Dict[str, Any]] = {}
+        self._expanded: Dict[str, Dict[str, Any]] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._keywords: Dict[Any, Any] = {}
+        self._names = [
+            key
+            for key, value in config.items()
+            if key != "default"
+            and key not in LEGACY_GLOBAL_KEYWORDS
+            and is_job(key, value)
+        ]
+        self._name_set = frozenset(self._names)
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """The parsed YAML document, with anchors resolved but `extends` and `!reference` tags unresolved."""
+        return self._config
+
+    @property
+    def variables(self) -> Dict[str, str]:
+        return _variables(self._config.get("variables"))
+
+    @property
+    def stages(self) -> List[str]:
+        return list(self._config.get("stages") or [])
+
+    def __getitem__(self, name: str) -> Job:
+        job = self._jobs.get(name)
+        if job is None:
+            if name not in self._name_set:
+                raise KeyError(name)
+            job = self._jobs[name] = self._build(name)
+        return job
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def built(self) -> List[str]:
+        """The names of the jobs which were built so far."""
+        return list(self._jobs)
+
+    def expanded(self, name: str) -> Dict[str, Any]:
+        """Returns the configuration of a job with `extends`, `default` and `!reference` tags resolved.
+
+        Raises:
+            KeyError: If there is no such job.
+            ValueError: If `extends` or `!reference` tags refer to unknown jobs or are circular.
+        """
+        expanded = self._expanded.get(name)
+        if expanded is None:
+            if name not in self._name_set:
+                raise KeyError(name)
+            job = expand_job(name, self._config, self._defaults, self._resolved)
+            expanded = self._expanded[name] = self._dereference(job, 0)
+        return expanded
+
+    def unsupported(self, name: str) -> Dict[str, Any]:
+        """Returns the keywords of a job which are not loaded into its `Job` object."""
+        return {
+            key: value
+            for key, value in self.expanded(name).items()
+            if key not in SUPPORTED_KEYWORDS
+        }
+
+    def dropped(self, name: str) -> Dict[str, List[Any]]:
+        """Returns the keys of the `image`, `needs`, `parallel` and `rules` of a job which are not loaded.
+
+        The keys are named like `needs:optional` or `rules:changes:compare_to`, and map to their values in every
+        entry of the keyword which has them. A `parallel` number is reported as `parallel`.
+
+        Raises:
+            KeyError: If there is no such job.
+            ValueError: If `extends` or `!reference` tags refer to unknown jobs or are circular.
+        """
+        config = self.expanded(name)
+        dropped: Dict[str, List[Any]] = {}
+        for keyword, keys in SUPPORTED_KEYS.items():
+            value = config.get(keyword)
+            if (
+                keyword == "parallel"
+                and value is not None
+                and not isinstance(value, dict)
+            ):
+                dropped["parallel"] = [value]
+                continue
+            for entry in value if isinstance(value, list) else [value]:
+                if not isinstance(entry, dict):
+                    continue
+                for key, item in entry.items():
+                    if key not in keys:
+                        dropped.setdefault(f"{keyword}:{key}", []).append(item)
+                if keyword != "rules":
+                    continue
+                for key, nested_keys in SUPPORTED_RULE_KEYS.items():
+                    nested = entry.get(key)
+                    if not isinstance(nested, dict):
+                        continue
+                    for nested_key, item in nested.items():
+                        if nested_key not in nested_keys:
+                            path = f"rules:{key}:{nested_key}"
+                            dropped.setdefault(path, []).append(item)
+        return dropped
+
+    def to_pipeline(self, *, strict: bool = True) -> Pipeline:
+        """Build all jobs and return them as `Pipeline` with the global variables and the stages of the document.
+
+        Args:
+            strict (bool): Raise if keys of the loaded keywords are dropped, see `dropped()`. Keywords of the
+                jobs which are not modelled at all, see `unsupported()`, are never an error. Defaults to True.
+
+        Raises:
+            UnsupportedKeywordError: If `strict` is set and a job uses keys which cannot be loaded.
+        """
+        if strict:
+            dropped = {name: list(self.dropped(name)) for name in self._names}
+            dropped = {name: keys for name, keys in dropped.items() if keys}
+            if dropped:
+                raise UnsupportedKeywordError(dropped)
+
+        pipeline = Pipeline(variables=self.variables, stages=self.stages)
+        pipeline.add_children(*(self[name] for name in self._names))
+        return pipeline
+
+    def _dereference(self, value: Any, depth: int) -> Any:
+        if isinstance(value, Reference):
+            if depth >= _MAX_REFERENCE_DEPTH:
+                raise ValueError(f"!reference tags are nested too deeply: {value!r}.")
+            target, *keys = value.path
+            if not isinstance(self._config.get(target), dict):
+                raise ValueError(f"!reference to the unknown job '{target}'.")
+            resolved: Any = resolve_extends(target, self._config, self._resolved, ())
+            for key in keys:
+                if not isinstance(resolved, dict) or key not in resolved:
+                    raise ValueError(f"!reference to the unknown key {value!r}.")
+                resolved = resolved[key]
+            return self._dereference(resolved, depth + 1)
+        if isinstance(value, dict):
+            return {key: self._dereference(item, depth) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._dereference(item, depth) for item in value]
+        return value
+
+    def _shared(self, kind: str, value: Any, factory: Any) -> Any:
+        """Build a keyword object, or return the equal object built before."""
+        key = (kind, freeze(value))
+        keyword = self._keywords.get(key)
+        if keyword is None:
+            keyword = self._keywords[key] = factory(value)
+        return keyword
+
+    def _build(self, name: str) -> Job:
+        config = self.expanded(name)
+
+        image = config.get("image")
+        needs = config.get("needs")
+        parallel = config.get("parallel")
+        matrix = parallel.get("matrix") if isinstance(parallel, dict) else None
+
+        return Job(
+            name=name,
+            script=_flatten(config.get("script")),
+            stage=config.get("stage"),
+            image=self._shared("image", image, image_from_config) if image else None,
+            rules=[
+                self._shared("rule", rule, rule_from_config)
+                for rule in config.get("rules") or ()
+            ],
+            needs=(
+                [self._shared("need", need, need_from_config) for need in needs]
+                if needs is not None
+                else None
+            ),
+            variables=_variables(config.get("variables")),
+            tags=[str(tag) for tag in _flatten(config.get("tags"))],
+            matrix=(
+                self._shared("matrix", matrix, matrix_from_config) if matrix else None
+            ),
+        )
+
+
+def loads(document: str) -> LoadedPipeline:
+    """Load a `.gitlab-ci.yml` from a string.
+
+    Raises:
+        yaml.YAMLError: If the document is no valid YAML.
+        ValueError: If the document is not a mapping.
+    """
+    return LoadedPipeline(yaml.load(document, Loader=Loader) or {})
+
+
+def load(source: Source) -> LoadedPipeline:
+    """Load a `.gitlab-ci.yml` from a file path or an open text stream.
+
+    Raises:
+        yaml.YAMLError: If the document is no valid YAML.
+        ValueError: If the document is not a mapping.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as stream:
+            return LoadedPipeline(yaml.load(stream, Loader=Loader) or {})
+    return LoadedPipeline(yaml.load(source, Loader=Loader) or {})
@@ -0,0 +1,175 @@
+"""
+The [parallel:matrix](https://docs.gitlab.com/ee/ci/yaml/#parallelmatrix) keyword, which runs a job once for every
+combination of variable values.
+
+The variants of a matrix are never materialized. Every variant has an index, which is the position of its values in
+a mixed radix number system, so variants are computed from their index and indices from their values in time linear
+in the number of variables:
+
+```python
+matrix = Matrix({"PROVIDER": "aws", "STACK": ["monitoring", "app1"]}, {"PROVIDER": "gcp", "STACK": "data"})
+len(matrix)  # 3
+matrix[1]  # {"PROVIDER": "aws", "STACK": "app1"}
+matrix.index({"PROVIDER": "gcp", "STACK": "data"})  # 2
+```
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+MatrixEntry = Mapping[str, Union[str, Sequence[str]]]
+"""One entry of `parallel:matrix`, which maps variable names to a value or a list of values."""
+
+
+class _Entry:
+    """The variables of one matrix entry with the positions of their values."""
+
+    __slots__ = ("keys", "values", "positions", "size")
+
+    def __init__(self, entry: MatrixEntry) -> None:
+        if not entry:
+            raise ValueError("A matrix entry must define at least one variable.")
+
+        self.keys: Tuple[str, ...] = tuple(entry)
+        self.values: Tuple[Tuple[str, ...], ...] = tuple(
+            (value,) if isinstance(value, str) else tuple(value)
+            for value in entry.values()
+        )
+        if not all(self.values):
+            raise ValueError("Every matrix variable needs at least one value.")
+
+        self.positions: Tuple[Dict[str, int], ...] = tuple(
+            {value: position for position, value in reversed(list(enumerate(values)))}
+            for values in self.values
+        )
+        self.size = 1
+        for values in self.values:
+            self.size *= len(values)
+
+    def decode(self, index: int) -> Dict[str, str]:
+        digits: List[str] = []
+        for values in reversed(self.values):
+            index, digit = divmod(index, len(values))
+            digits.append(values[digit])
+        return dict(zip(self.keys, reversed(digits)))
+
+    def encode(self, variables: Mapping[str, str]) -> Optional[int]:
+        if len(variables) != len(self.keys):
+            return None
+
+        index = 0
+        for key, values, positions in zip(self.keys, self.values, self.positions):
+            position = positions.get(variables.get(key))  # type: ignore[arg-type]
+            if position is None:
+                return None
+            index = index * len(values) + position
+        return index
+
+
+class Matrix:
+    """Represents the GitLab CI [parallel:matrix](https://docs.gitlab.com/ee/ci/yaml/#parallelmatrix) keyword.
+
+    Matrices behave like read-only sequences of their variants, which are dictionaries of variable values. The
+    variants are computed on access and are not stored.
+
+    Args:
+        *entries (MatrixEntry): The entries of the matrix. Each entry maps variable names to a value or a list of
+            values, and contributes one variant for every combination of these values.
+
+    Raises:
+        ValueError: If there are no entries, or an entry or a variable has no values.
+    """
+
+    def __init__(self, *entries: MatrixEntry) -> None:
+        if not entries:
+            raise ValueError("A matrix needs at least one entry.")
+
+        self._entries = [_Entry(entry) for entry in entries]
+        self._offsets: List[int] = []
+        self._size = 0
+        for entry in self._entries:
+            self._offsets.append(self._size)
+            self._size += entry.size
+
+        self._fingerprint: Optional[Tuple[Any, ...]] = None
+        self._rendered: Optional[List[Dict[str, Union[str, List[str]]]]] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> Dict[str, str]:
+        """Returns the variables of the variant at the given index.
+
+        Raises:
+            IndexError: If the index is out of range.
+        """
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(f"The matrix has no variant with index {index}.")
+
+        for entry, offset in zip(reversed(self._entries), reversed(self._offsets)):
+            if index >= offset:
+                return entry.decode(index - offset)
+        raise AssertionError("unreachable")
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for entry in self._entries:
+            for index in range(entry.size):
+                yield entry.decode(index)
+
+    def index(self, variables: Mapping[str, str]) -> Optional[int]:
+        """Find the index of the variant with the given variables.
+
+        Args:
+            variables (Mapping[str, str]): The values of all variables of the variant.
+
+        Returns:
+            Optional[int]: The index of the first variant with these values, or None if there is no such variant.
+        """
+        for entry, offset in zip(self._entries, self._offsets):
+            index = entry.encode(variables)
+            if index is not None:
+                return offset + index
+        return None
+
+    @staticmethod
+    def variant_name(job: str, variables: Mapping[str, str]) -> str:
+        """Returns the name GitLab gives the variant of a job, like `test: [aws, monitoring]`."""
+        return f"{job}: [{', '.join(variables.values())}]"
+
+    @property
+    def fingerprint(self) -> Tuple[Any, ...]:
+        """A canonical, hashable representation of this matrix."""
+        if self._fingerprint is None:
+            self._fingerprint = tuple(
+                tuple(zip(entry.keys, entry.values)) for entry in self._entries
+            )
+        return self._fingerprint
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Matrix):
+            return NotImplemented
+        return self is other or self.fingerprint == other.fingerprint
+
+    def __hash__(self) -> int:
+        return hash(self.fingerprint)
+
+    def render(self) -> List[Dict[str, Union[str, List[str]]]]:
+        """Return a representation of this Matrix object as a list of dictionaries with static values.
+
+        The list is cached and shared between all callers, so it must not be altered.
+
+        Returns:
+            List[Dict[str, Union[str, List[str]]]]: The entries of `parallel:matrix`.
+        """
+        if self._rendered is None:
+            self._rendered = [
+                {
+                    key: values[0] if len(values) == 1 else list(values)
+                    for key, values in zip(entry.keys, entry.values)
+                }
+                for entry in self._entries
+            ]
+        return self._rendered
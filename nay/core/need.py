@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from typing import Dict, Optional, Union
+from typing import Any, Dict, Optional, Tuple
 
+from nay.core.matrix import Matrix
 from nay.core.variables import PredefinedVariables
 
 
@@ -16,12 +17,19 @@ class Need:
         pipeline (str, optional): The CI_PIPELINE_ID of another pipeline to depend on, or the name of another project
             to mirror the status of an upstream pipeline. Must be provided if `job` is not set. Defaults to None.
         artifacts (bool): Whether to download artifacts from the `job` to depend on. Defaults to True.
+        parallel (Matrix, optional): Selects the variants of a `parallel:matrix` job to depend on, see
+            [needs:parallel:matrix](https://docs.gitlab.com/ee/ci/yaml/#needsparallelmatrix). Defaults to None,
+            which depends on all variants.
+
+    Needs are hashable and compare by their structural `fingerprint`, so duplicated needs
+    can be removed with a set or a dictionary lookup.
 
     Raises:
         ValueError: If neither `job` nor `pipeline` is set.
         ValueError: If `ref` is set but `project` is missing.
         ValueError: If `pipeline` equals the CI_PIPELINE_ID of the own project.
         ValueError: If both `project` and `pipeline` are set.
+        ValueError: If `parallel` is set but `job` is missing.
     """
 
     def __init__(
@@ -32,6 +40,7 @@ class Need:
         ref: Optional[str] = None,
         pipeline: Optional[str] = None,
         artifacts: bool = True,
+        parallel: Optional[Matrix] = None,
     ):
         if not job and not pipeline:
             raise ValueError("At least one of `job` or `pipeline` must be set.")
@@ -44,6 +53,9 @@ class Need:
                 "Needs accepts either `project` or `pipeline` but not both."
             )
 
+        if parallel is not None and not job:
+            raise ValueError("'parallel' parameter requires the 'job' parameter.")
+
         if pipeline and pipeline == PredefinedVariables.CI_PIPELINE_ID:
             raise ValueError(
                 "The pipeline attribute does not accept the current pipeline ($CI_PIPELINE_ID). "
@@ -55,21 +67,100 @@ class Need:
         self._ref = ref
         self._artifacts = artifacts
         self._pipeline = pipeline
+        self._parallel = parallel
 
         if self._project and not self._ref:
             self._ref = "main"
 
-    def render(self) -> Dict[str, Union[str, bool]]:
+        self._fingerprint: Optional[Tuple[Any, ...]] = None
+        self._rendered: Optional[Dict[str, Any]] = None
+
+    @property
+    def job(self) -> Optional[str]:
+        return self._job
+
+    @property
+    def project(self) -> Optional[str]:
+        return self._project
+
+    @property
+    def ref(self) -> Optional[str]:
+        return self._ref
+
+    @property
+    def pipeline(self) -> Optional[str]:
+        return self._pipeline
+
+    @property
+    def artifacts(self) -> bool:
+        return self._artifacts
+
+    @property
+    def parallel(self) -> Optional[Matrix]:
+        return self._parallel
+
+    @property
+    def is_local(self) -> bool:
+        """True if this need refers to a job of the same pipeline."""
+        return bool(self._job) and not self._project and not self._pipeline
+
+    @property
+    def fingerprint(self) -> Tuple[Any, ...]:
+        """A canonical, hashable representation of this need.
+
+        Two needs with the same fingerprint render identically.
+
+        Returns:
+            Tuple[Any, ...]: The structural fingerprint of this need.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = (
+                self._job,
+                self._artifacts if self._job else None,
+                self._project,
+                self._ref if self._project else None,
+                self._pipeline,
+                self._parallel.fingerprint if self._parallel is not None else None,
+            )
+        return self._fingerprint
+
+    def with_artifacts(self, artifacts: bool) -> Need:
+        """
+        Returns a copy of that need which downloads the artifacts of the job or not.
+        You can still use the original Need object with its original setting.
+        """
+        return Need(
+            self._job,
+            project=self._project,
+            ref=self._ref,
+            pipeline=self._pipeline,
+            artifacts=artifacts,
+            parallel=self._parallel,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Need):
+            return NotImplemented
+        return self is other or self.fingerprint == other.fingerprint
+
+    def __hash__(self) -> int:
+        return hash(self.fingerprint)
+
+    def render(self) -> Dict[str, Any]:
         """Return a representation of this Need object as dictionary with static values.
 
         The rendered representation is used by the gcip to dump it
         in YAML format as part of the .gitlab-ci.yml pipeline.
 
+        The dictionary is cached and shared between all callers, so it must not be altered.
+
         Returns:
             Dict[str, Any]: A dictionary representing the need object in Gitlab CI.
         """
+        if self._rendered is not None:
+            return self._rendered
 
-        rendered_need: Dict[str, Union[str, bool]] = {}
+        rendered_need: Dict[str, Any] = {}
 
         if self._job:
             rendered_need.update(
@@ -79,12 +170,16 @@ class Need:
                 }
             )
 
+        if self._parallel is not None:
+            rendered_need["parallel"] = {"matrix": self._parallel.render()}
+
         if self._project and self._ref:
             rendered_need.update({"project": self._project, "ref": self._ref})
 
         if self._pipeline:
             rendered_need["pipeline"] = self._pipeline
 
+        self._rendered = rendered_need
         return rendered_need
 
     def _equals(self, need: Optional[Need]) -> bool:
@@ -95,4 +190,4 @@ class Need:
         if not need:
             return False
 
-        return self.render() == need.render()
+        return self.fingerprint == need.fingerprint
@@ -0,0 +1,548 @@
+"""
+Optimization passes which shrink or simplify generated pipelines without changing their semantics.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import yaml
+
+from nay.core import writer
+from nay.core.exceptions import FactoringMismatchError
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+from nay.core.pipeline import RESERVED_KEYWORDS, Pipeline
+
+DEFAULT_KEYWORDS = (
+    "image",
+    "services",
+    "before_script",
+    "after_script",
+    "cache",
+    "artifacts",
+    "retry",
+    "timeout",
+    "interruptible",
+    "tags",
+    "hooks",
+    "id_tokens",
+)
+"""Job keywords which can be set in the [default](https://docs.gitlab.com/ee/ci/yaml/#default) section."""
+
+EXTENDS_KEYWORDS = (
+    "image",
+    "services",
+    "before_script",
+    "script",
+    "after_script",
+    "rules",
+    "needs",
+    "variables",
+    "cache",
+    "artifacts",
+    "tags",
+)
+"""Job keywords which are factored into hidden template jobs referenced by `extends`."""
+
+LEGACY_GLOBAL_KEYWORDS = ("image", "services", "cache", "before_script", "after_script")
+"""Deprecated top-level keywords, which GitLab applies like the keywords of the `default` section."""
+
+TEMPLATE_PREFIX = ".nay-"
+"""The name prefix of the hidden template jobs created by `factor()`."""
+
+
+@dataclass
+class FactoringReport:
+    """The result of `factor()`.
+
+    Args:
+        yaml (str): The factored pipeline.
+        bytes_before (int): The size of the pipeline YAML before factoring.
+        bytes_after (int): The size of the factored pipeline YAML.
+        defaults (List[str]): The keywords moved to the `default` section.
+        templates (List[str]): The names of the hidden template jobs created for `extends`.
+        anchors (int): The number of YAML anchors in the factored pipeline.
+    """
+
+    yaml: str
+    bytes_before: int
+    bytes_after: int
+    defaults: List[str]
+    templates: List[str]
+    anchors: int
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+class ArtifactPolicy(Enum):
+    """Decides what `reduce_needs()` does with redundant needs which download artifacts.
+
+    A job only receives the artifacts of the jobs it needs directly. Removing a redundant need with
+    `artifacts: true` therefore changes the artifacts available to the job, even if the order of execution stays
+    the same.
+
+    Attributes:
+        KEEP (str): Keep the need as it is. Only redundant needs without artifacts are removed.
+        DEMOTE (str): Keep the need but set `artifacts` to False, for jobs which do not use the artifacts.
+        DROP (str): Remove the need like every other redundant need.
+    """
+
+    KEEP = "keep"
+    DEMOTE = "demote"
+    DROP = "drop"
+
+
+@dataclass
+class NeedsReductionReport:
+    """The result of `reduce_needs()`.
+
+    Args:
+        removed (List[Tuple[str, str]]): The removed redundant needs as tuples of the needed job and the job
+            needing it.
+        demoted (List[Tuple[str, str]]): The needs whose artifact download was disabled.
+        kept (List[Tuple[str, str]]): The redundant needs kept for their artifacts.
+        downloads_removed (int): The number of artifact downloads removed or disabled.
+        duplicates (List[Tuple[str, str]]): The duplicated needs merged into an earlier need of the same job.
+    """
+
+    removed: List[Tuple[str, str]] = field(default_factory=list)
+    demoted: List[Tuple[str, str]] = field(default_factory=list)
+    kept: List[Tuple[str, str]] = field(default_factory=list)
+    downloads_removed: int = 0
+    duplicates: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def edges_removed(self) -> int:
+        return len(self.removed)
+
+
+def reduce_needs(
+    pipeline: Pipeline, *, artifacts: ArtifactPolicy = ArtifactPolicy.KEEP
+) -> NeedsReductionReport:
+    """Remove the needs which are implied by other needs, which is the transitive reduction of the needs graph.
+
+    If job `a` needs `b` and `b` needs `c`, an additional need of `a` on `c` does not change the order of
+    execution, but costs GitLab scheduling work. Such needs are removed from the jobs. Duplicated needs of the
+    same job are merged into the first of them, which downloads the artifacts if any of them does. Redundant needs
+    which download artifacts are handled according to `artifacts`.
+
+    Args:
+        pipeline (Pipeline): The pipeline whose jobs are modified.
+        artifacts (ArtifactPolicy): What to do with redundant needs with `artifacts: true`.
+            Defaults to `ArtifactPolicy.KEEP`.
+
+    Raises:
+        CyclicNeedsError: If the needs form a cycle.
+
+    Returns:
+        NeedsReductionReport: The removed and demoted needs.
+    """
+    # Variants of `parallel:matrix` jobs are nodes of their own, so that needs of different variants of one job
+    # are told apart. All variants of a job have the same needs, so the first one stands for the job.
+    graph = pipeline.needs_graph(expand_matrix=True)
+    redundant = set(graph.redundant_edges())
+
+    report = NeedsReductionReport()
+    for job in pipeline.jobs:
+        if not job.needs:
+            continue
+
+        # Merge the duplicated needs of a job first, downloading the artifacts if any of them does.
+        merged: List[Need] = []
+        positions: Dict[Tuple[Optional[str], Optional[Matrix]], int] = {}
+        changed = False
+        for need in job.needs:
+            if not need.is_local:
+                merged.append(need)
+                continue
+            key = (need.job, need.parallel)
+            position = positions.get(key)
+            if position is None:
+                positions[key] = len(merged)
+                merged.append(need)
+                continue
+            report.duplicates.append((str(need.job), job.name))
+            if need.artifacts and not merged[position].artifacts:
+                merged[position] = merged[position].with_artifacts(True)
+            changed = True
+
+        node = (
+            job.name
+            if job.matrix is None
+            else Matrix.variant_name(job.name, job.matrix[0])
+        )
+        needs: List[Need] = []
+        for need in merged:
+            targets = graph.targets(need) if need.is_local else []
+            if not targets or any(
+                (target, node) not in redundant for target in targets
+            ):
+                needs.append(need)
+                continue
+
+            edge = (str(need.job), job.name)
+            if not need.artifacts or artifacts is ArtifactPolicy.DROP:
+                report.removed.append(edge)
+                report.downloads_removed += need.artifacts
+                changed = True
+            elif artifacts is ArtifactPolicy.DEMOTE:
+                needs.append(need.with_artifacts(False))
+                report.demoted.append(edge)
+                report.downloads_removed += 1
+                changed = True
+            else:
+                report.kept.append(edge)
+                needs.append(need)
+
+        if changed:
+            job.set_needs(needs)
+
+    return report
+
+
+def factor(
+    pipeline: Union[Pipeline, Dict[str, Any]],
+    *,
+    use_default: bool = True,
+    use_extends: bool = True,
+    use_anchors: bool = True,
+    min_occurrences: int = 2,
+) -> FactoringReport:
+    """Factor repeated sub-structures of a pipeline into `default`, hidden `extends` templates and YAML anchors.
+
+    The passes are applied in the order of the arguments:
+
+    1. A keyword which every job sets, like `image`, is moved to the `default` section with its most common
+       value. Jobs with another value keep their own, which overrides the default.
+    2. Keyword values which several jobs share, like the same `rules` list, are moved to a hidden template job
+       like `.nay-rules-1`, which the jobs reference with `extends`. This is only done if it saves bytes.
+    3. All remaining equal lists and dictionaries are written once as YAML anchor and referenced by aliases.
+
+    Jobs which already use `extends` or `inherit` are left untouched. Finally, the factored pipeline is
+    loaded again and expanded, to guarantee that it is equivalent to the original one.
+
+    Args:
+        pipeline (Union[Pipeline, Dict[str, Any]]): The pipeline or its rendered dictionary.
+        use_default (bool): Factor keywords into the `default` section. Defaults to True.
+        use_extends (bool): Factor keyword values into hidden templates. Defaults to True.
+        use_anchors (bool): Write equal sub-structures as YAML anchors. Defaults to True.
+        min_occurrences (int): The minimal number of jobs which must share a value to be factored. Defaults to 2.
+
+    Raises:
+        FactoringMismatchError: If the factored pipeline is not equivalent to the original one.
+
+    Returns:
+        FactoringReport: The factored pipeline and the bytes saved.
+    """
+    rendered = pipeline.render() if isinstance(pipeline, Pipeline) else pipeline
+
+    factored = {
+        key: dict(value) if is_job(key, value) else value
+        for key, value in rendered.items()
+    }
+    jobs = {key: value for key, value in factored.items() if is_job(key, value)}
+    candidates = {
+        key: job
+        for key, job in jobs.items()
+        if "extends" not in job and "inherit" not in job
+    }
+
+    defaults: List[str] = []
+    if use_default and len(candidates) == len(jobs):
+        defaults = _factor_default(factored, jobs, min_occurrences)
+
+    templates: Dict[str, Dict[str, Any]] = {}
+    if use_extends:
+        templates = _factor_extends(factored, candidates, min_occurrences)
+
+    if templates:
+        header = {
+            key: value for key, value in factored.items() if not is_job(key, value)
+        }
+        header.update(templates)
+        header.update(
+            (key, value) for key, value in factored.items() if is_job(key, value)
+        )
+        factored = header
+
+    if use_anchors:
+        factored = _share_equal_subtrees(factored, {})
+
+    factored_yaml = writer.dump(factored, anchors=use_anchors)
+    _verify(rendered, factored_yaml)
+
+    return FactoringReport(
+        yaml=factored_yaml,
+        bytes_before=len(writer.dump(rendered).encode("utf-8")),
+        bytes_after=len(factored_yaml.encode("utf-8")),
+        defaults=defaults,
+        templates=list(templates),
+        anchors=_count_anchors(factored_yaml) if use_anchors else 0,
+    )
+
+
+def expand(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Expand the `default` section and `extends` keywords of a pipeline like GitLab does.
+
+    Hidden jobs, the `default` section and the deprecated global keywords are removed from the result,
+    as their content has been applied to the jobs.
+
+    Args:
+        config (Dict[str, Any]): The pipeline configuration, like the rendered pipeline or the loaded YAML.
+
+    Raises:
+        ValueError: If a job extends an unknown job or the `extends` chain is circular.
+
+    Returns:
+        Dict[str, Any]: The pipeline with every job containing all of its keywords.
+    """
+    defaults = default_keywords(config)
+    resolved: Dict[str, Dict[str, Any]] = {}
+    expanded: Dict[str, Any] = {}
+    for key, value in config.items():
+        if key == "default" or key in LEGACY_GLOBAL_KEYWORDS or key.startswith("."):
+            continue
+        if not is_job(key, value):
+            expanded[key] = value
+            continue
+        expanded[key] = expand_job(key, config, defaults, resolved)
+
+    return expanded
+
+
+def default_keywords(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the keywords of the `default` section, including the deprecated global keywords."""
+    defaults = {key: config[key] for key in LEGACY_GLOBAL_KEYWORDS if key in config}
+    defaults.update(config.get("default") or {})
+    return defaults
+
+
+def expand_job(
+    name: str,
+    config: Dict[str, Any],
+    defaults: Dict[str, Any],
+    resolved: Dict[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Expand the `extends` keyword and the defaults of a single job.
+
+    Args:
+        name (str): The name of the job.
+        config (Dict[str, Any]): The pipeline configuration.
+        defaults (Dict[str, Any]): The result of `default_keywords()` for the configuration.
+        resolved (Dict[str, Dict[str, Any]]): The jobs and templates resolved so far, which is updated and can be
+            shared between calls for the same configuration.
+
+    Raises:
+        ValueError: If the job extends an unknown job or the `extends` chain is circular.
+
+    Returns:
+        Dict[str, Any]: The job containing all of its keywords.
+    """
+    job = dict(resolve_extends(name, config, resolved, ()))
+    inherit = (job.get("inherit") or {}).get("default", True)
+    for keyword, default in defaults.items():
+        if keyword not in job and (
+            inherit is True or (isinstance(inherit, list) and keyword in inherit)
+        ):
+            job[keyword] = default
+    return job
+
+
+def is_job(key: str, value: Any) -> bool:
+    """Returns whether a top-level entry of a rendered pipeline is a job, not a global keyword or a template."""
+    return (
+        isinstance(value, dict)
+        and key not in RESERVED_KEYWORDS
+        and not key.startswith(".")
+    )
+
+
+def freeze(value: Any) -> Any:
+    """Return a hashable representation of a rendered value."""
+    if isinstance(value, dict):
+        return ("dict", tuple((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, list):
+        return ("list", tuple(freeze(item) for item in value))
+    return value
+
+
+def _count_anchors(document: str) -> int:
+    return sum(
+        1
+        for event in yaml.parse(document)
+        if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent))
+        and event.anchor
+    )
+
+
+def _entry_size(keyword: str, value: Any) -> int:
+    """The approximate number of bytes of a keyword entry inside a job."""
+    entry = writer.dump({keyword: value})
+    return len(entry) + 2 * entry.count("\n")
+
+
+def _factor_default(
+    factored: Dict[str, Any], jobs: Dict[str, Dict[str, Any]], min_occurrences: int
+) -> List[str]:
+    default = dict(factored.get("default") or {})
+    moved: List[str] = []
+
+    for keyword in DEFAULT_KEYWORDS:
+        if (
+            keyword in default
+            or keyword in factored
+            or not all(keyword in job for job in jobs.values())
+        ):
+            continue
+
+        groups: Dict[Any, List[str]] = defaultdict(list)
+        for name, job in jobs.items():
+            groups[freeze(job[keyword])].append(name)
+        names = max(groups.values(), key=len)
+        if len(names) < min_occurrences:
+            continue
+
+        default[keyword] = jobs[names[0]][keyword]
+        for name in names:
+            del jobs[name][keyword]
+        moved.append(keyword)
+
+    if moved:
+        factored["default"] = default
+    return moved
+
+
+def _factor_extends(
+    factored: Dict[str, Any],
+    candidates: Dict[str, Dict[str, Any]],
+    min_occurrences: int,
+) -> Dict[str, Dict[str, Any]]:
+    templates: Dict[str, Dict[str, Any]] = {}
+
+    for keyword in EXTENDS_KEYWORDS:
+        groups: Dict[Any, List[str]] = defaultdict(list)
+        for name, job in candidates.items():
+            if keyword in job:
+                groups[freeze(job[keyword])].append(name)
+
+        for names in groups.values():
+            if len(names) < min_occurrences:
+                continue
+
+            template = f"{TEMPLATE_PREFIX}{keyword}-{len(templates) + 1}"
+            while template in factored:
+                template += "-"
+            value = candidates[names[0]][keyword]
+            size = _entry_size(keyword, value)
+            reference = len(template) + 14
+            if len(names) * size <= size + len(template) + 2 + len(names) * reference:
+                continue
+
+            templates[template] = {keyword: value}
+            for name in names:
+                job = candidates[name]
+                del job[keyword]
+                extends = job.pop("extends", [])
+                # `extends` is placed first, so the job reads like its template plus its own keywords.
+                job_items = list(job.items())
+                job.clear()
+                job["extends"] = [*extends, template]
+                job.update(job_items)
+
+    return templates
+
+
+def _share_equal_subtrees(value: Any, pool: Dict[Any, Any], min_size: int = 24) -> Any:
+    """Replace all equal lists and dictionaries by one object, so that they are dumped as anchor and aliases."""
+    if isinstance(value, dict):
+        shared: Any = {
+            key: _share_equal_subtrees(item, pool, min_size)
+            for key, item in value.items()
+        }
+    elif isinstance(value, list):
+        shared = [_share_equal_subtrees(item, pool, min_size) for item in value]
+    else:
+        return value
+
+    key = freeze(shared)
+    existing = pool.get(key)
+    if existing is not None:
+        return existing
+    if len(repr(key)) >= min_size:
+        pool[key] = shared
+    return shared
+
+
+def _verify(rendered: Dict[str, Any], factored_yaml: str) -> None:
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    original: Dict[str, Any] = expand(rendered)
+    factored: Dict[str, Any] = expand(yaml.load(factored_yaml, Loader=loader) or {})
+
+    for name in original.keys() | factored.keys():
+        if original.get(name) != factored.get(name):
+            raise FactoringMismatchError(name)
+
+
+def resolve_extends(
+    name: str,
+    config: Dict[str, Any],
+    resolved: Dict[str, Dict[str, Any]],
+    chain: Tuple[str, ...] = (),
+) -> Dict[str, Any]:
+    """Merge the job `name` of a rendered pipeline with the jobs it `extends`, recursively.
+
+    Args:
+        name (str): The name of the job.
+        config (Dict[str, Any]): The rendered pipeline.
+        resolved (Dict[str, Dict[str, Any]]): The jobs resolved so far by their names, which is updated.
+        chain (Tuple[str, ...]): The jobs extending this job, to detect cycles. Defaults to ().
+
+    Raises:
+        ValueError: If the `extends` are circular or refer to an unknown job.
+
+    Returns:
+        Dict[str, Any]: The job without `extends`.
+    """
+    if name in resolved:
+        return resolved[name]
+    if name in chain:
+        raise ValueError(f"Circular `extends`: {' -> '.join(chain + (name,))}.")
+
+    job = config.get(name)
+    if not isinstance(job, dict):
+        if not chain:
+            raise ValueError(f"Unknown job '{name}'.")
+        raise ValueError(f"The job '{chain[-1]}' extends the unknown job '{name}'.")
+
+    parents = job.get("extends") or []
+    if isinstance(parents, str):
+        parents = [parents]
+
+    merged: Dict[str, Any] = {}
+    for parent in parents:
+        merged = deep_merge(
+            merged, resolve_extends(parent, config, resolved, chain + (name,))
+        )
+    merged = deep_merge(
+        merged, {key: value for key, value in job.items() if key != "extends"}
+    )
+
+    resolved[name] = merged
+    return merged
+
+
+def deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge like `extends`: dictionaries are merged recursively, all other values are replaced."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
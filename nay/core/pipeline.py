@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from nay.core import OrderedSetType, writer
+from nay.core.changes import FileMatcher
+from nay.core.children import ChildBuilder, ChildResult, generate_children
+from nay.core.dag import NeedsGraph
+from nay.core.exceptions import ChildPipelineError
+from nay.core.expansion import VariableExpander
+from nay.core.expressions import evaluate_rules
+from nay.core.job import Job, RenderCache, TriggerJob
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+from nay.core.rules import When
+from nay.core.variables import EnvironmentSnapshot
+
+RESERVED_KEYWORDS = frozenset(
+    {
+        "after_script",
+        "before_script",
+        "cache",
+        "default",
+        "image",
+        "include",
+        "services",
+        "stages",
+        "variables",
+        "workflow",
+    }
+)
+"""Global keywords of the `.gitlab-ci.yml`, which cannot be used as job names."""
+
+
+class Pipeline:
+    """Represents a GitLab CI pipeline, which is the content of the `.gitlab-ci.yml` file.
+
+    Args:
+        variables (Optional[Dict[str, str]]): Global variables of the pipeline. Defaults to None.
+        stages (Optional[List[str]]): The stages in their order of execution, like the `stages` keyword of a loaded
+            `.gitlab-ci.yml`. Stages of jobs which are not listed are appended. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        *,
+        variables: Optional[Dict[str, str]] = None,
+        stages: Optional[List[str]] = None,
+    ) -> None:
+        self._jobs: Dict[str, Job] = {}
+        self._variables: Dict[str, str] = dict(variables) if variables else {}
+        self._stages: List[str] = list(stages) if stages else []
+
+    @property
+    def jobs(self) -> List[Job]:
+        """The jobs of this pipeline in insertion order."""
+        return list(self._jobs.values())
+
+    @property
+    def variables(self) -> Dict[str, str]:
+        return self._variables
+
+    @property
+    def stages(self) -> List[str]:
+        """The stages given to the pipeline, followed by the stages of all other jobs in the order of their first
+        appearance.
+
+        Jobs without a stage belong to GitLab's default `test` stage. The `.pre` and `.post`
+        stages are always available and therefore not listed. If no stages are given and no job sets a stage, the
+        list is empty and the `stages` keyword is omitted.
+        """
+        if not self._stages and not any(job.stage for job in self._jobs.values()):
+            return []
+
+        stages: OrderedSetType = dict.fromkeys(self._stages)
+        for job in self._jobs.values():
+            stage = job.stage or "test"
+            if stage not in (".pre", ".post"):
+                stages[stage] = None
+        return list(stages)
+
+    def get_job(self, name: str) -> Job:
+        """Returns the job with the given name.
+
+        Raises:
+            KeyError: If the pipeline has no job with that name.
+        """
+        return self._jobs[name]
+
+    def add_children(self, *jobs: Job) -> Pipeline:
+        """Adds one or more jobs to this pipeline.
+
+        Raises:
+            ValueError: If the job name is a reserved global keyword or already used by another job.
+
+        Returns:
+            Pipeline: The modified Pipeline object.
+        """
+        for job in jobs:
+            if job.name in RESERVED_KEYWORDS:
+                raise ValueError(f"The job name '{job.name}' is a reserved keyword.")
+            if job.name in self._jobs:
+                raise ValueError(
+                    f"The pipeline already contains a job named '{job.name}'."
+                )
+            self._jobs[job.name] = job
+        return self
+
+    def add_child_pipelines(
+        self,
+        builders: Mapping[str, ChildBuilder],
+        *,
+        directory: str = "children",
+        stage: Optional[str] = None,
+        artifact_job: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        snapshot: Optional[EnvironmentSnapshot] = None,
+    ) -> List[ChildResult]:
+        """Generate child pipelines in parallel and add a trigger job for each of them to this pipeline.
+
+        The children are built and written by a pool of worker processes, see `nay.core.children`. The trigger
+        jobs are named `trigger-<name>` and are added in the order of `builders`. They include the YAML files
+        as artifacts of `artifact_job`, which must be the job of this pipeline running the generator and must
+        publish `directory` as artifacts.
+
+        Args:
+            builders (Mapping[str, ChildBuilder]): Picklable functions building the child pipelines by their names.
+            directory (str): The directory the YAML files are written to, relative to the project directory like
+                all artifact paths. Defaults to `children`.
+            stage (Optional[str]): The stage of the trigger jobs. Defaults to None.
+            artifact_job (Optional[str]): The name of the job generating the children. Defaults to the
+                predefined variable `CI_JOB_NAME` of the snapshot, so it is required outside of a pipeline.
+            max_workers (Optional[int]): The number of worker processes. Defaults to the number of CPUs.
+            snapshot (Optional[EnvironmentSnapshot]): The environment the builders run in. Defaults to the active
+                snapshot or a new snapshot of `os.environ`.
+
+        Raises:
+            ValueError: If `directory` is absolute, or `artifact_job` is missing outside of a pipeline.
+            ChildPipelineError: If one or more builders failed. The successful children are written, but no
+                trigger jobs are added.
+
+        Returns:
+            List[ChildResult]: The results in the order of `builders`.
+        """
+        if os.path.isabs(directory):
+            raise ValueError(
+                f"The directory of the child pipelines must be relative to the project directory, got '{directory}'."
+            )
+        snapshot = snapshot if snapshot is not None else EnvironmentSnapshot.current()
+        if not artifact_job:
+            if not snapshot.get("CI"):
+                raise ValueError(
+                    "`artifact_job` is required when not running within a GitLab CI pipeline."
+                )
+            artifact_job = snapshot["CI_JOB_NAME"]
+
+        results = generate_children(
+            builders, directory, max_workers=max_workers, snapshot=snapshot
+        )
+
+        failures = {result.name: result.error for result in results if not result.ok}
+        if failures:
+            raise ChildPipelineError(failures)  # type: ignore[arg-type]
+
+        self.add_children(
+            *(
+                TriggerJob(
+                    name=f"trigger-{result.name}",
+                    artifact=result.path,
+                    job=artifact_job,
+                    stage=stage,
+                )
+                for result in results
+            )
+        )
+        return results
+
+    def needs_graph(self, *, expand_matrix: bool = False) -> NeedsGraph:
+        """Returns the graph of the jobs of this pipeline and their needs.
+
+        The graph is built from the current state of the jobs, so it must be requested again after
+        adding jobs or needs.
+
+        Args:
+            expand_matrix (bool): Add one node per variant of `parallel:matrix` jobs instead of one node per job.
+                Defaults to False.
+
+        Returns:
+            NeedsGraph: The indexed graph of the jobs.
+        """
+        return NeedsGraph(self._jobs.values(), expand_matrix=expand_matrix)
+
+    def file_matcher(self) -> FileMatcher:
+        """Compile the `changes` and `exists` patterns of the rules of all jobs into one index.
+
+        The index can be reused to match many changesets against the same pipeline.
+
+        Returns:
+            FileMatcher: The index of all patterns.
+        """
+        return FileMatcher(rule for job in self._jobs.values() for rule in job.rules)
+
+    def evaluate_rules(
+        self,
+        variables: Mapping[str, str],
+        *,
+        changed: Optional[Iterable[str]] = None,
+        existing: Optional[Iterable[str]] = None,
+        matcher: Optional[FileMatcher] = None,
+    ) -> Dict[str, When]:
+        """Predict which jobs GitLab creates for a pipeline with the given variables.
+
+        The rules of every job are evaluated with the given variables, which take precedence over the variables
+        of the job, which in turn take precedence over the global variables of this pipeline. References between
+        the variables are expanded with a `nay.core.expansion.VariableExpander`.
+
+        Args:
+            variables (Mapping[str, str]): The variables of the simulated pipeline, like `CI_COMMIT_BRANCH`
+                and `CI_PIPELINE_SOURCE`. An `EnvironmentSnapshot` can be passed as well. Its variables are taken as
+                they are set, without placeholders, and have the lowest precedence, like the environment of a job.
+            changed (Optional[Iterable[str]]): The files changed by the push or merge request. Defaults to None,
+                which considers all `changes` clauses matching.
+            existing (Optional[Iterable[str]]): All files of the repository. Defaults to None, which considers
+                all `exists` clauses matching.
+            matcher (Optional[FileMatcher]): An index returned by `file_matcher()` to reuse. Defaults to None.
+
+        Raises:
+            ExpressionSyntaxError: If the `if` expression of a rule is invalid.
+            VariableCycleError: If variables reference each other in a cycle.
+
+        Returns:
+            Dict[str, When]: The `when` of every job by its name. Jobs which are not created are `When.NEVER`.
+        """
+        files = None
+        if changed is not None or existing is not None:
+            files = (matcher or self.file_matcher()).match(changed, existing)
+
+        if isinstance(variables, EnvironmentSnapshot):
+            expander = VariableExpander(self, predefined=dict(variables))
+        else:
+            expander = VariableExpander(self, overrides=variables)
+        return {
+            name: evaluate_rules(job.rules, expander.job(job), files)
+            for name, job in self._jobs.items()
+        }
+
+    def add_variables(self, **variables: str) -> Pipeline:
+        """Adds one or more global variables to this pipeline.
+
+        Returns:
+            Pipeline: The modified Pipeline object.
+        """
+        self._variables.update(variables)
+        return self
+
+    def iter_render(self, *, expand_matrix: bool = False) -> Iterator[Tuple[str, Any]]:
+        """Render this pipeline lazily, one top-level entry at a time.
+
+        This is the pipeline-level render pass. Every `Rule`, `Need` and `Image` is rendered once per
+        distinct fingerprint, and all jobs using equal objects reference the same rendered dictionary.
+
+        Args:
+            expand_matrix (bool): Render every variant of `parallel:matrix` jobs as a job of its own, like
+                GitLab expands them. The variants are generated one at a time and are not kept. Needs of matrix
+                jobs are replaced by needs of their variants, or of the variants selected by `needs:parallel:matrix`,
+                so that the rendered pipeline can be loaded again. Defaults to False.
+
+        Yields:
+            Tuple[str, Any]: The top-level keys of the `.gitlab-ci.yml` and their rendered values.
+        """
+        stages = self.stages
+        if stages:
+            yield "stages", stages
+
+        if self._variables:
+            yield "variables", self._variables
+
+        matrices: Dict[str, Matrix] = {}
+        if expand_matrix:
+            matrices = {
+                name: job.matrix
+                for name, job in self._jobs.items()
+                if job.matrix is not None
+            }
+
+        cache: RenderCache = {}
+        for name, job in self._jobs.items():
+            if matrices and job.needs:
+                needs = _variant_needs(job.needs, matrices)
+                if needs is not job.needs:
+                    job = job.derive(name, needs=needs)
+            if expand_matrix and job.matrix is not None:
+                for variant in job.variants():
+                    yield variant.name, variant.render(cache=cache)
+            else:
+                yield name, job.render(cache=cache)
+
+    def render(self, *, expand_matrix: bool = False) -> Dict[str, Any]:
+        """Return a representation of this Pipeline object as a dictionary with static values.
+
+        See `iter_render()` for how keyword objects are shared between jobs.
+
+        Args:
+            expand_matrix (bool): Render the variants of `parallel:matrix` jobs as jobs. Defaults to False.
+
+        Returns:
+            Dict[str, Any]: A dictionary representing the whole `.gitlab-ci.yml`.
+        """
+        return dict(self.iter_render(expand_matrix=expand_matrix))
+
+    def to_yaml(self, *, expand_matrix: bool = False) -> str:
+        """Dump the fully rendered pipeline dictionary to YAML.
+
+        Args:
+            expand_matrix (bool): Render the variants of `parallel:matrix` jobs as jobs. Defaults to False.
+
+        Returns:
+            str: The content of the `.gitlab-ci.yml`.
+        """
+        return writer.dump(self.render(expand_matrix=expand_matrix))
+
+    def write_yaml(
+        self,
+        target: writer.Target = ".gitlab-ci.yml",
+        *,
+        verify: bool = False,
+        expand_matrix: bool = False,
+    ) -> None:
+        """Write this pipeline as YAML to a file or an open text stream like `sys.stdout`.
+
+        The pipeline is streamed job by job instead of rendering the whole dictionary first.
+        The output is byte-identical to `to_yaml()`.
+
+        Args:
+            target (writer.Target): The file path or text stream. Defaults to `.gitlab-ci.yml`.
+            verify (bool): Enforce that the streamed output is byte-identical to `to_yaml()`. This renders
+                the pipeline twice. Defaults to False.
+            expand_matrix (bool): Write the variants of `parallel:matrix` jobs as jobs. Defaults to False.
+
+        Raises:
+            RenderMismatchError: If `verify` is set and the outputs differ.
+        """
+        writer.write(self, target, verify=verify, expand_matrix=expand_matrix)
+
+
+def _variant_needs(needs: List[Need], matrices: Mapping[str, Matrix]) -> List[Need]:
+    """Replace the needs of `parallel:matrix` jobs by needs of their variants.
+
+    Args:
+        needs (List[Need]): The needs of a job.
+        matrices (Mapping[str, Matrix]): The matrices of the jobs of the pipeline by job name.
+
+    Returns:
+        List[Need]: The needs with the variants, or `needs` itself if none of them needs a matrix job.
+    """
+    if not any(need.is_local and need.job in matrices for need in needs):
+        return needs
+
+    expanded: List[Need] = []
+    for need in needs:
+        matrix = matrices.get(need.job) if need.is_local else None
+        if matrix is None:
+            expanded.append(need)
+            continue
+        if need.parallel is None:
+            selected = list(matrix)
+        else:
+            # Name the variants like the needed job does, also if `needs:parallel:matrix` orders its keys differently.
+            selected = []
+            for variables in need.parallel:
+                index = matrix.index(variables)
+                selected.append(variables if index is None else matrix[index])
+        expanded += [
+            Need(Matrix.variant_name(need.job, variables), artifacts=need.artifacts)
+            for variables in selected
+        ]
+    return expanded
@@ -0,0 +1,261 @@
+"""
+Opt-in instrumentation of pipeline generation.
+
+Within a `profile()` context, the `render()`, `_equals()` and derivation methods of the keyword classes, `Job`,
+`Pipeline` and the lookups of `EnvProxy` and `OptionalEnvProxy` are wrapped to record their number of calls and
+their durations. The wrappers are installed when the context is entered and removed when it exits, so there is no
+overhead at all while profiling is disabled:
+
+```python
+with profile() as profiler:
+    pipeline.write_yaml("generated.yml")
+
+print(profiler.summary())
+profiler.write_chrome_trace("trace.json")  # open in chrome://tracing or https://ui.perfetto.dev
+```
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from nay.core.image import FrozenImage, Image
+from nay.core.job import Job, TriggerJob
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+from nay.core.pipeline import Pipeline
+from nay.core.rules import FrozenRule, Rule
+from nay.core.variables import EnvProxy, OptionalEnvProxy
+
+INSTRUMENTED: List[Tuple[type, str, str]] = [
+    *((cls, "render", "render") for cls in (Image, FrozenImage, Rule, FrozenRule)),
+    *((cls, "render", "render") for cls in (Need, Matrix, Job, TriggerJob)),
+    *(
+        (cls, "_equals", "equals")
+        for cls in (Image, FrozenImage, Rule, FrozenRule, Need)
+    ),
+    *(
+        (cls, name, "derive")
+        for cls in (Image, FrozenImage)
+        for name in ("with_tag", "with_entrypoint")
+    ),
+    *(
+        (cls, name, "derive")
+        for cls in (Rule, FrozenRule)
+        for name in ("never", "add_variables")
+    ),
+    (Job, "derive", "derive"),
+    (EnvProxy, "__get__", "environment"),
+    (OptionalEnvProxy, "__get__", "environment"),
+    *((Pipeline, name, "pipeline") for name in ("render", "to_yaml", "write_yaml")),
+]
+"""The instrumented methods as tuples of the class, the method name and the category of the recorded events."""
+
+_lock = threading.Lock()
+_active: Optional[Profiler] = None
+
+
+@dataclass
+class Stat:
+    """The aggregated measurements of one instrumented method or job.
+
+    Args:
+        calls (int): The number of calls.
+        total (float): The time spent in the calls, including nested instrumented calls, in seconds.
+        own (float): The time spent in the calls, excluding nested instrumented calls, in seconds.
+    """
+
+    calls: int = 0
+    total: float = 0.0
+    own: float = 0.0
+
+
+class Profiler:
+    """Records the calls of the instrumented methods while active. Use `profile()` to activate a profiler.
+
+    Args:
+        trace (bool): Keep every call as event for `write_chrome_trace()`. Without it, only the aggregated
+            statistics are kept, which needs constant memory. Defaults to True.
+    """
+
+    def __init__(self, *, trace: bool = True) -> None:
+        self._trace = trace
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Stat] = {}
+        self.jobs: Dict[str, Stat] = {}
+        self.templates: Dict[str, int] = {}
+        self.events: List[Dict[str, Any]] = []
+
+    def _stack(self) -> List[float]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(
+        self,
+        label: str,
+        category: str,
+        start: float,
+        duration: float,
+        nested: float,
+        args: Dict[str, Any],
+    ) -> None:
+        with self._lock:
+            stat = self.stats.setdefault(label, Stat())
+            stat.calls += 1
+            stat.total += duration
+            stat.own += duration - nested
+
+            job = args.get("job")
+            if job is not None and label == "Job.render":
+                job_stat = self.jobs.setdefault(job, Stat())
+                job_stat.calls += 1
+                job_stat.total += duration
+                job_stat.own += duration - nested
+            template = args.get("template")
+            if template is not None:
+                self.templates[template] = self.templates.get(template, 0) + 1
+
+            if self._trace:
+                self.events.append(
+                    {
+                        "name": label,
+                        "cat": category,
+                        "ph": "X",
+                        "ts": (start - self._origin) * 1e6,
+                        "dur": duration * 1e6,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                        "args": args,
+                    }
+                )
+
+    def _wrap(self, cls: type, name: str, category: str) -> Callable[..., Any]:
+        method = cls.__dict__[name]
+        label = f"{cls.__name__}.{name}"
+        profiler = self
+
+        @functools.wraps(method)
+        def wrapper(obj: Any, *args: Any, **kwargs: Any) -> Any:
+            stack = profiler._stack()
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return method(obj, *args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += duration
+                profiler._record(
+                    label, category, start, duration, nested, _describe(obj, name)
+                )
+
+        return wrapper
+
+    def _install(self) -> List[Tuple[type, str, Any]]:
+        originals = []
+        for cls, name, category in INSTRUMENTED:
+            originals.append((cls, name, cls.__dict__[name]))
+            setattr(cls, name, self._wrap(cls, name, category))
+        return originals
+
+    def summary(self, limit: int = 10) -> str:
+        """Format the statistics as a table.
+
+        The first table lists the instrumented methods by their own time, the second the jobs whose rendering
+        took longest, and the third the templates most jobs were derived from.
+
+        Args:
+            limit (int): The maximum number of jobs and templates listed. Defaults to 10.
+
+        Returns:
+            str: The tables.
+        """
+        lines = [
+            f"{'method':<28}{'calls':>10}{'total ms':>12}{'own ms':>12}{'per call us':>14}"
+        ]
+        for label, stat in sorted(self.stats.items(), key=lambda item: -item[1].own):
+            lines.append(
+                f"{label:<28}{stat.calls:>10}{stat.total * 1e3:>12.2f}{stat.own * 1e3:>12.2f}"
+                f"{stat.total / stat.calls * 1e6:>14.2f}"
+            )
+
+        if self.jobs:
+            lines += ["", f"{'job':<40}{'renders':>10}{'total ms':>12}"]
+            slowest = sorted(self.jobs.items(), key=lambda item: -item[1].total)[:limit]
+            for job, stat in slowest:
+                lines.append(f"{job[:40]:<40}{stat.calls:>10}{stat.total * 1e3:>12.2f}")
+
+        if self.templates:
+            lines += ["", f"{'template':<40}{'derived':>10}"]
+            popular = sorted(self.templates.items(), key=lambda item: -item[1])[:limit]
+            for template, count in popular:
+                lines.append(f"{template[:40]:<40}{count:>10}")
+
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Write the recorded events in the Chrome trace event format.
+
+        Raises:
+            RuntimeError: If the profiler was created with `trace=False`.
+        """
+        if not self._trace:
+            raise RuntimeError(
+                "The profiler was created without `trace`, so no events were kept."
+            )
+        with open(path, "w", encoding="utf-8") as stream:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, stream)
+
+
+def _describe(obj: Any, method: str) -> Dict[str, Any]:
+    """Returns the arguments of the event of a call, which identify the job, template or variable."""
+    if isinstance(obj, Job):
+        if method in ("derive", "variants"):
+            return {"template": obj.name}
+        return {"job": obj.name}
+    if isinstance(obj, (EnvProxy, OptionalEnvProxy)):
+        return {"variable": obj._key}
+    return {}
+
+
+@contextmanager
+def profile(*, trace: bool = True) -> Iterator[Profiler]:
+    """Instrument the generation of pipelines while the context is active.
+
+    Only one profiler can be active at a time, because the instrumentation applies to the whole process.
+
+    Args:
+        trace (bool): Keep every call as event for `Profiler.write_chrome_trace()`. Defaults to True.
+
+    Raises:
+        RuntimeError: If another profiler is already active.
+
+    Yields:
+        Profiler: The profiler collecting the measurements.
+    """
+    global _active
+
+    with _lock:
+        if _active is not None:
+            raise RuntimeError("Another profiler is already active.")
+        profiler = _active = Profiler(trace=trace)
+        originals = profiler._install()
+    try:
+        yield profiler
+    finally:
+        with _lock:
+            for cls, name, method in originals:
+                setattr(cls, name, method)
+            _active = None
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from copy import deepcopy
 from enum import Enum
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from weakref import WeakValueDictionary
 
 
 class When(Enum):
@@ -46,6 +46,11 @@ class Rule:
         exists (list of str, optional): List of file patterns to check for the existence of files. Default is None.
         variables (dict, optional): Dictionary of custom variables to be used in the condition. Default is an empty dictionary.
 
+    Rules are hashable and compare by their structural `fingerprint`, so duplicated rules can be
+    removed with a set or a dictionary lookup. The fingerprint is cached and invalidated by the
+    mutating methods of this class, like `add_variables()`. The same applies to the cached
+    result of `render()`.
+
     See Also:
         - GitLab CI/CD [Rules](https://docs.gitlab.com/ee/ci/yaml/#rules) documentation
     """
@@ -60,6 +65,10 @@ class Rule:
         exists: Optional[List[str]] = None,
         variables: Optional[Dict[str, str]] = None,
     ) -> None:
+        self._fingerprint: Optional[Tuple[Any, ...]] = None
+        self._rendered: Optional[
+            Dict[str, Union[str, bool, List[str], Dict[str, str]]]
+        ] = None
         self.if_statement = if_statement
         self._changes = changes
         self._when = when
@@ -87,9 +96,14 @@ class Rule:
         Returns:
             Rule: A new rule object with `when` set to `When.NEVER`.
         """
-        rule_copy = deepcopy(self)
-        rule_copy._when = When.NEVER
-        return rule_copy
+        return Rule(
+            if_statement=self._if_statement,
+            when=When.NEVER,
+            allow_failure=self._allow_failure,
+            changes=self._changes,
+            exists=self._exists,
+            variables=self._variables,
+        )
 
     def add_variables(self, **variables: str) -> Rule:
         """Adds one or more variables to the rule.
@@ -103,10 +117,80 @@ class Rule:
         Returns:
             Rule: The modified Rule object.
         """
-        self._variables.update(variables)
+        # Copy on write, the variables dict may be shared with rules derived by `never()`.
+        self._variables = {**self._variables, **variables}
+        self._fingerprint = None
+        self._rendered = None
         return self
 
-    def _equals(self, rule: Optional[Rule]) -> bool:
+    def freeze(self) -> FrozenRule:
+        """Returns the interned, immutable `FrozenRule` with the same content as this rule."""
+        return FrozenRule(
+            if_statement=self._if_statement,
+            when=self._when,
+            allow_failure=self._allow_failure,
+            changes=self._changes,
+            exists=self._exists,
+            variables=self._variables,
+        )
+
+    @property
+    def if_statement(self) -> Optional[str]:
+        """The conditional expression of this rule."""
+        return self._if_statement
+
+    @if_statement.setter
+    def if_statement(self, value: Optional[str]) -> None:
+        self._if_statement = value
+        self._fingerprint = None
+        self._rendered = None
+
+    @property
+    def when(self) -> When:
+        return self._when
+
+    @property
+    def allow_failure(self) -> bool:
+        return self._allow_failure
+
+    @property
+    def changes(self) -> Optional[Sequence[str]]:
+        return self._changes
+
+    @property
+    def exists(self) -> Optional[Sequence[str]]:
+        return self._exists
+
+    @property
+    def fingerprint(self) -> Tuple[Any, ...]:
+        """A canonical, hashable representation of this rule.
+
+        Two rules with the same fingerprint render identically. The value is cached
+        until the rule is modified.
+
+        Returns:
+            Tuple[Any, ...]: The structural fingerprint of this rule.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = (
+                self._if_statement or None,
+                tuple(self._changes) if self._changes else None,
+                tuple(self._exists) if self._exists else None,
+                tuple(sorted(self._variables.items())),
+                self._when.value,
+                self._allow_failure,
+            )
+        return self._fingerprint
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (Rule, FrozenRule)):
+            return NotImplemented
+        return self is other or self.fingerprint == other.fingerprint
+
+    def __hash__(self) -> int:
+        return hash(self.fingerprint)
+
+    def _equals(self, rule: Optional[Union[Rule, FrozenRule]]) -> bool:
         """Check if this rule equals another rule.
 
         Args:
@@ -118,7 +202,7 @@ class Rule:
         if not rule:
             return False
 
-        return self.render() == rule.render()
+        return self.fingerprint == rule.fingerprint
 
     def render(self) -> Dict[str, Union[str, bool, List[str], Dict[str, str]]]:
         """Return a representation of this Rule object as a dictionary with static values.
@@ -126,9 +210,15 @@ class Rule:
         The rendered representation is used by the GitLab CI/CD pipeline to dump it
         in YAML format as part of the .gitlab-ci.yml file.
 
+        The dictionary is cached until the rule is modified and shared between all callers,
+        so it must not be altered.
+
         Returns:
             Dict[str, Union[str, bool, List[str], Dict[str, str]]]: A dictionary representing the rule object in GitLab CI.
         """
+        if self._rendered is not None:
+            return self._rendered
+
         rendered_rule: Dict[str, Union[str, bool, List[str], Dict[str, str]]] = {}
         if self.if_statement:
             rendered_rule.update({"if": self.if_statement})
@@ -148,4 +238,250 @@ class Rule:
                 "allow_failure": self._allow_failure,
             }
         )
+        self._rendered = rendered_rule
+        return rendered_rule
+
+
+class FrozenRule:
+    """An immutable, interned variant of `Rule`.
+
+    Constructing a `FrozenRule` with the same content as an existing one returns the identical object.
+    Often-used rules like `on_main` and their `.never()` counterparts therefore exist only once, no matter
+    how often they are derived. Derivations share all unchanged fields with the original rule.
+
+    A `FrozenRule` compares equal to a `Rule` with the same fingerprint and accepts the same arguments.
+    As it cannot be modified, `.add_variables()` returns a new rule instead of altering this one.
+
+    See Also:
+        - `Rule` for the description of the arguments.
+    """
+
+    __slots__ = (
+        "_if_statement",
+        "_when",
+        "_allow_failure",
+        "_changes",
+        "_exists",
+        "_variables",
+        "_fingerprint",
+        "_hash",
+        "_rendered",
+        "__weakref__",
+    )
+
+    _pool: WeakValueDictionary[Tuple[Any, ...], FrozenRule] = WeakValueDictionary()
+
+    _changes: Optional[Tuple[str, ...]]
+    _exists: Optional[Tuple[str, ...]]
+    _variables: Tuple[Tuple[str, str], ...]
+
+    def __new__(
+        cls,
+        *,
+        if_statement: Optional[str] = None,
+        when: When = When.ON_SUCCESS,
+        allow_failure: bool = False,
+        changes: Optional[Sequence[str]] = None,
+        exists: Optional[Sequence[str]] = None,
+        variables: Optional[Dict[str, str]] = None,
+    ) -> FrozenRule:
+        return cls._intern(
+            if_statement,
+            when,
+            allow_failure,
+            tuple(changes) if changes is not None else None,
+            tuple(exists) if exists is not None else None,
+            tuple(variables.items()) if variables else (),
+        )
+
+    @classmethod
+    def _intern(
+        cls,
+        if_statement: Optional[str],
+        when: When,
+        allow_failure: bool,
+        changes: Optional[Tuple[str, ...]],
+        exists: Optional[Tuple[str, ...]],
+        variables: Tuple[Tuple[str, str], ...],
+    ) -> FrozenRule:
+        key = (if_statement, when, allow_failure, changes, exists, variables)
+        rule = cls._pool.get(key)
+        if rule is None:
+            rule = super().__new__(cls)
+            fingerprint = (
+                if_statement or None,
+                changes if changes else None,
+                exists if exists else None,
+                tuple(sorted(variables)),
+                when.value,
+                allow_failure,
+            )
+            for slot, value in (
+                ("_if_statement", if_statement),
+                ("_when", when),
+                ("_allow_failure", allow_failure),
+                ("_changes", changes),
+                ("_exists", exists),
+                ("_variables", variables),
+                ("_fingerprint", fingerprint),
+                ("_hash", hash(fingerprint)),
+                ("_rendered", None),
+            ):
+                object.__setattr__(rule, slot, value)
+            cls._pool[key] = rule
+        return rule
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"FrozenRule is immutable, cannot set '{name}'.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"FrozenRule is immutable, cannot delete '{name}'.")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (
+            FrozenRule._intern,
+            (
+                self._if_statement,
+                self._when,
+                self._allow_failure,
+                self._changes,
+                self._exists,
+                self._variables,
+            ),
+        )
+
+    def __copy__(self) -> FrozenRule:
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> FrozenRule:
+        return self
+
+    def __repr__(self) -> str:
+        return f"FrozenRule({self.render()!r})"
+
+    @property
+    def if_statement(self) -> Optional[str]:
+        """The conditional expression of this rule."""
+        return self._if_statement
+
+    def never(self) -> FrozenRule:
+        """Returns the interned rule with the `when` attribute set to `When.NEVER`.
+
+        See `Rule.never()` for an explanation of the use case.
+
+        Returns:
+            FrozenRule: The rule with `when` set to `When.NEVER`.
+        """
+        return FrozenRule._intern(
+            self._if_statement,
+            When.NEVER,
+            self._allow_failure,
+            self._changes,
+            self._exists,
+            self._variables,
+        )
+
+    def add_variables(self, **variables: str) -> FrozenRule:
+        """Returns the interned rule with one or more variables added.
+
+        Args:
+            **variables (str): Each variable is provided as a keyword argument.
+
+        Returns:
+            FrozenRule: A rule with the variables of this rule and the given ones.
+        """
+        return FrozenRule._intern(
+            self._if_statement,
+            self._when,
+            self._allow_failure,
+            self._changes,
+            self._exists,
+            tuple({**dict(self._variables), **variables}.items()),
+        )
+
+    def thaw(self) -> Rule:
+        """Returns a mutable `Rule` with the same content as this rule."""
+        return Rule(
+            if_statement=self._if_statement,
+            when=self._when,
+            allow_failure=self._allow_failure,
+            changes=list(self._changes) if self._changes is not None else None,
+            exists=list(self._exists) if self._exists is not None else None,
+            variables=dict(self._variables),
+        )
+
+    @property
+    def when(self) -> When:
+        return self._when
+
+    @property
+    def allow_failure(self) -> bool:
+        return self._allow_failure
+
+    @property
+    def changes(self) -> Optional[Sequence[str]]:
+        return self._changes
+
+    @property
+    def exists(self) -> Optional[Sequence[str]]:
+        return self._exists
+
+    @property
+    def fingerprint(self) -> Tuple[Any, ...]:
+        """The structural fingerprint of this rule, see `Rule.fingerprint`."""
+        return self._fingerprint
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (Rule, FrozenRule)):
+            return NotImplemented
+        return self is other or self._fingerprint == other.fingerprint
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def _equals(self, rule: Optional[Union[Rule, FrozenRule]]) -> bool:
+        """Check if this rule equals another rule.
+
+        Args:
+            rule (Rule, optional): The other rule to compare to.
+
+        Returns:
+            bool: True if self equals `rule`.
+        """
+        if not rule:
+            return False
+
+        return self._fingerprint == rule.fingerprint
+
+    def render(self) -> Dict[str, Union[str, bool, List[str], Dict[str, str]]]:
+        """Return a representation of this rule as a dictionary with static values.
+
+        The dictionary is computed once and shared between all callers, so it must not be altered.
+
+        Returns:
+            Dict[str, Union[str, bool, List[str], Dict[str, str]]]: A dictionary representing the rule object in GitLab CI.
+        """
+        if self._rendered is not None:
+            return self._rendered
+
+        rendered_rule: Dict[str, Union[str, bool, List[str], Dict[str, str]]] = {}
+        if self._if_statement:
+            rendered_rule["if"] = self._if_statement
+
+        if self._changes:
+            rendered_rule["changes"] = list(self._changes)
+
+        if self._exists:
+            rendered_rule["exists"] = list(self._exists)
+
+        if self._variables:
+            rendered_rule["variables"] = dict(self._variables)
+
+        rendered_rule.update(
+            {
+                "when": self._when.value,
+                "allow_failure": self._allow_failure,
+            }
+        )
+        object.__setattr__(self, "_rendered", rendered_rule)
         return rendered_rule
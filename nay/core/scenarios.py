@@ -0,0 +1,221 @@
+"""
+Evaluates the rules of all jobs of a pipeline against many scenarios at once, like every combination of branch,
+pipeline source, tag and merge request labels, to find jobs which never or always run.
+
+Outcomes are stored as bitmasks, one bit per scenario. Equal rule lists are evaluated once, and every distinct
+`if` expression is evaluated once per scenario, no matter how many jobs use it:
+
+```python
+scenarios = [
+    {"CI_COMMIT_BRANCH": branch, "CI_PIPELINE_SOURCE": source}
+    for branch in ("main", "feature")
+    for source in ("push", "web", "schedule")
+]
+matrix = simulate(pipeline, scenarios)
+matrix.never_scheduled()  # jobs which are not created in any scenario
+```
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Dict, Hashable, List, Mapping, Sequence, Tuple, Union
+
+from nay.core.expansion import VariableExpander
+from nay.core.expressions import compile_expression
+from nay.core.pipeline import Pipeline
+from nay.core.rules import FrozenRule, Rule, When
+
+WHEN_CODES: List[When] = list(When)
+"""The `When` members by the codes used in `ScenarioMatrix.to_numpy()`."""
+
+
+class ScenarioMatrix:
+    """The outcomes of the rules of all jobs of a pipeline for all scenarios.
+
+    Args:
+        jobs (List[str]): The job names in pipeline order.
+        scenario_count (int): The number of scenarios.
+        masks (Dict[str, Dict[When, int]]): For every job and `When`, the bitmask of the scenarios with that outcome.
+        rule_groups (List[List[str]]): The job names grouped by identical rule lists.
+    """
+
+    def __init__(
+        self,
+        jobs: List[str],
+        scenario_count: int,
+        masks: Dict[str, Dict[When, int]],
+        rule_groups: List[List[str]],
+    ) -> None:
+        self._jobs = jobs
+        self._scenario_count = scenario_count
+        self._masks = masks
+        self._rule_groups = rule_groups
+        self._all = (1 << scenario_count) - 1
+
+    @property
+    def jobs(self) -> List[str]:
+        return list(self._jobs)
+
+    @property
+    def scenario_count(self) -> int:
+        return self._scenario_count
+
+    def mask(self, job: str, when: When) -> int:
+        """Returns the bitmask of the scenarios in which the rules of the job result in `when`.
+
+        Bit `i` of the mask stands for the scenario at index `i`.
+        """
+        return self._masks[job].get(when, 0)
+
+    def scheduled_mask(self, job: str) -> int:
+        """Returns the bitmask of the scenarios in which the job is created."""
+        return self._all & ~self.mask(job, When.NEVER)
+
+    def outcome(self, job: str, scenario: int) -> When:
+        """Returns the outcome of the rules of the job in the scenario at the given index."""
+        if not 0 <= scenario < self._scenario_count:
+            raise IndexError(f"There is no scenario with index {scenario}.")
+        for when, mask in self._masks[job].items():
+            if mask >> scenario & 1:
+                return when
+        return When.NEVER
+
+    def outcomes(self, job: str) -> List[When]:
+        """Returns the outcomes of the rules of the job for all scenarios."""
+        return [self.outcome(job, scenario) for scenario in range(self._scenario_count)]
+
+    def never_scheduled(self) -> List[str]:
+        """Returns the jobs which are not created in any scenario."""
+        return [job for job in self._jobs if self.scheduled_mask(job) == 0]
+
+    def always_scheduled(self) -> List[str]:
+        """Returns the jobs which are created in every scenario."""
+        return [job for job in self._jobs if self.scheduled_mask(job) == self._all]
+
+    def identical_rule_sets(self) -> List[List[str]]:
+        """Returns groups of at least two jobs with identical rule lists."""
+        return [list(group) for group in self._rule_groups if len(group) > 1]
+
+    def equivalent_jobs(self) -> List[List[str]]:
+        """Returns groups of at least two jobs with identical outcomes in all scenarios, even if their rules differ."""
+        groups: Dict[Tuple[Tuple[str, int], ...], List[str]] = defaultdict(list)
+        for job in self._jobs:
+            key = tuple(
+                sorted(
+                    (when.value, mask)
+                    for when, mask in self._masks[job].items()
+                    if mask
+                )
+            )
+            groups[key].append(job)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def to_numpy(self) -> Any:
+        """Returns the outcomes as NumPy array with one row per job and one column per scenario.
+
+        The values are the indices of the outcomes in `WHEN_CODES`.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        try:
+            import numpy
+        except ImportError as error:
+            raise ImportError(
+                "ScenarioMatrix.to_numpy() requires NumPy, install it with `pip install numpy`."
+            ) from error
+
+        matrix = numpy.full(
+            (len(self._jobs), self._scenario_count),
+            WHEN_CODES.index(When.NEVER),
+            dtype=numpy.uint8,
+        )
+        size = (self._scenario_count + 7) // 8
+        for row, job in enumerate(self._jobs):
+            for when, mask in self._masks[job].items():
+                bits = numpy.frombuffer(mask.to_bytes(size, "little"), numpy.uint8)
+                selected = numpy.unpackbits(bits, bitorder="little").astype(bool)
+                matrix[row, selected[: self._scenario_count]] = WHEN_CODES.index(when)
+        return matrix
+
+
+def simulate(
+    pipeline: Pipeline, scenarios: Sequence[Mapping[str, str]]
+) -> ScenarioMatrix:
+    """Evaluate the rules of all jobs of a pipeline for every scenario.
+
+    Like `Pipeline.evaluate_rules()`, the variables of a scenario take precedence over the job variables and the
+    global variables of the pipeline, and references between the variables are expanded. `changes` and `exists`
+    clauses are considered matching.
+
+    Args:
+        pipeline (Pipeline): The pipeline to simulate.
+        scenarios (Sequence[Mapping[str, str]]): The variables of every scenario.
+
+    Raises:
+        ExpressionSyntaxError: If the `if` expression of a rule is invalid.
+        VariableCycleError: If variables reference each other in a cycle.
+
+    Returns:
+        ScenarioMatrix: The outcomes for all jobs and scenarios.
+    """
+    all_scenarios = (1 << len(scenarios)) - 1
+    expander = VariableExpander(pipeline)
+    contexts: Dict[Hashable, List[Mapping[str, str]]] = {}
+    expression_masks: Dict[Tuple[Hashable, str], int] = {}
+    group_masks: Dict[Hashable, Dict[When, int]] = {}
+    groups: Dict[Hashable, List[str]] = defaultdict(list)
+    masks: Dict[str, Dict[When, int]] = {}
+
+    def expression_mask(variables_key: Hashable, expression: str) -> int:
+        key = (variables_key, expression)
+        mask = expression_masks.get(key)
+        if mask is None:
+            predicate = compile_expression(expression)
+            mask = 0
+            for index, context in enumerate(contexts[variables_key]):
+                if predicate(context):
+                    mask |= 1 << index
+            expression_masks[key] = mask
+        return mask
+
+    def evaluate(
+        rules: Sequence[Union[Rule, FrozenRule]], variables_key: Hashable
+    ) -> Dict[When, int]:
+        if not rules:
+            return {When.ON_SUCCESS: all_scenarios}
+
+        outcome: Dict[When, int] = defaultdict(int)
+        remaining = all_scenarios
+        for rule in rules:
+            matched = remaining
+            if rule.if_statement:
+                matched &= expression_mask(variables_key, rule.if_statement)
+            outcome[rule.when] |= matched
+            remaining &= ~matched
+            if not remaining:
+                break
+        outcome[When.NEVER] |= remaining
+        return dict(outcome)
+
+    for job in pipeline.jobs:
+        variables_key = tuple(job.variables.items())
+        if variables_key not in contexts:
+            scope = expander.job(job)
+            contexts[variables_key] = [scope.child(scenario) for scenario in scenarios]
+
+        rules_key = tuple(rule.fingerprint for rule in job.rules)
+        groups[rules_key].append(job.name)
+        group_key = (rules_key, variables_key)
+        outcome = group_masks.get(group_key)
+        if outcome is None:
+            outcome = group_masks[group_key] = evaluate(job.rules, variables_key)
+        masks[job.name] = outcome
+
+    return ScenarioMatrix(
+        [job.name for job in pipeline.jobs],
+        len(scenarios),
+        masks,
+        list(groups.values()),
+    )
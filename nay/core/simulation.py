@@ -0,0 +1,425 @@
+"""
+Simulates the execution of a pipeline on a limited pool of runners, to plan `needs`, stages and runner capacity
+without running the pipeline.
+
+Jobs start when all jobs they need have finished, or for jobs without `needs`, when all jobs of the earlier stages
+have finished. Started jobs occupy a runner for their estimated duration; jobs which are ready but find no free
+runner wait in a queue and are picked in pipeline order, like GitLab picks the oldest pending job. The simulation
+is a discrete-event loop over a priority queue of job completions, so its cost depends on the number of jobs, not
+on their durations:
+
+```python
+simulator = Simulator(
+    pipeline,
+    durations={"build": 300, "test": (120, 180, 600)},  # seconds, or (low, mode, high) estimates
+    runners=4,
+    variables={"CI_COMMIT_BRANCH": "main", "CI_PIPELINE_SOURCE": "push"},
+)
+result = simulator.run()
+result.makespan, result.critical_path
+simulator.monte_carlo(1000).percentile(90)
+```
+
+Which jobs are created is decided by their rules, see `Pipeline.evaluate_rules()`. Manual jobs are not started
+unless `run_manual` is set, and jobs needing them are reported as blocked. Every variant of a `parallel:matrix`
+job is a job of its own. Needs of jobs which are not created are ignored.
+"""
+
+from __future__ import annotations
+
+import heapq
+import random
+import statistics
+from dataclasses import dataclass, field
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from nay.core.dag import NeedsGraph, find_cycle
+from nay.core.exceptions import CyclicNeedsError
+from nay.core.matrix import Matrix
+from nay.core.pipeline import Pipeline
+from nay.core.rules import When
+
+Duration = Union[float, Tuple[float, float, float], Callable[[random.Random], float]]
+"""A fixed duration, a `(low, mode, high)` estimate drawn from a triangular distribution, or a function
+drawing a duration from the given random number generator."""
+
+DEFAULT_POOL = "default"
+"""The name of the pool of runners for jobs without a tag of a dedicated pool."""
+
+_STARTED = (When.ON_SUCCESS, When.ALWAYS, When.DELAYED)
+
+
+def triangular(
+    low: float, mode: float, high: float
+) -> Callable[[random.Random], float]:
+    """Returns a function drawing durations from a triangular distribution, for three-point estimates."""
+    return lambda rng: rng.triangular(low, high, mode)
+
+
+@dataclass
+class SimulationResult:
+    """The outcome of one simulated execution.
+
+    Args:
+        makespan (float): The time from the creation of the pipeline until its last job finished.
+        start (Dict[str, float]): The start time of every started job.
+        finish (Dict[str, float]): The finish time of every started job.
+        queue_wait (Dict[str, float]): How long every started job waited for a runner after it was ready.
+        utilization (Dict[str, float]): The share of the makespan the runners of every pool were busy.
+        critical_path (List[str]): The chain of jobs which determined the makespan. Every job on it became ready
+            when its predecessor finished.
+        blocked (List[str]): The jobs which never started, because they wait for manual jobs.
+    """
+
+    makespan: float
+    start: Dict[str, float]
+    finish: Dict[str, float]
+    queue_wait: Dict[str, float]
+    utilization: Dict[str, float]
+    critical_path: List[str]
+    blocked: List[str] = field(default_factory=list)
+
+    @property
+    def total_queue_wait(self) -> float:
+        return sum(self.queue_wait.values())
+
+
+@dataclass
+class MonteCarloResult:
+    """The aggregated outcome of many simulated executions with random durations.
+
+    Args:
+        makespans (List[float]): The makespan of every run.
+        utilization (Dict[str, float]): The mean utilization of every pool of runners.
+        mean_queue_wait (float): The mean of the total queue wait of the runs.
+        critical (Dict[str, float]): The share of the runs in which a job was on the critical path, for every job
+            which was on it at least once, by descending share.
+    """
+
+    makespans: List[float]
+    utilization: Dict[str, float]
+    mean_queue_wait: float
+    critical: Dict[str, float]
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.makespans)
+
+    def percentile(self, percent: float) -> float:
+        """Returns the makespan not exceeded by the given percentage of the runs, like 90 for the P90."""
+        ordered = sorted(self.makespans)
+        index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+@dataclass
+class _Run:
+    start: List[float]
+    ready: List[float]
+    finish: List[float]
+    cause: List[int]
+    busy: List[float]
+    makespan: float
+    last: int
+
+
+class Simulator:
+    """Simulates the execution of a pipeline. The graph of the jobs is built once and shared by all runs.
+
+    Args:
+        pipeline (Pipeline): The pipeline to simulate.
+        durations (Optional[Mapping[str, Duration]]): The estimated durations by job name. Variants of
+            `parallel:matrix` jobs can be given by their variant name, like `test: [3.12]`, or by the name of
+            the job. Defaults to None.
+        default_duration (Duration): The duration of jobs missing in `durations`. Defaults to 60.
+        runners (int): The number of runners of the default pool. Defaults to 1.
+        pools (Optional[Mapping[str, int]]): The number of runners of dedicated pools by a tag. Jobs with one of
+            these tags run on the pool of the first of them, all other jobs on the default pool. Defaults to None.
+        variables (Optional[Mapping[str, str]]): The variables the rules are evaluated with. Defaults to None.
+        outcomes (Optional[Mapping[str, When]]): The outcome of the rules of every job, like the result of
+            `Pipeline.evaluate_rules()`, which replaces the evaluation. Jobs missing are started. Defaults to None.
+        run_manual (bool): Start manual jobs like other jobs. Defaults to False.
+
+    Raises:
+        ValueError: If a pool has no runners.
+        CyclicNeedsError: If the needs of the started jobs form a cycle, also through the stages of jobs
+            without needs, like a job needing a job of a later stage.
+    """
+
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        *,
+        durations: Optional[Mapping[str, Duration]] = None,
+        default_duration: Duration = 60.0,
+        runners: int = 1,
+        pools: Optional[Mapping[str, int]] = None,
+        variables: Optional[Mapping[str, str]] = None,
+        outcomes: Optional[Mapping[str, When]] = None,
+        run_manual: bool = False,
+    ) -> None:
+        self._pools = [DEFAULT_POOL, *(pools or {})]
+        self._capacity = [runners, *(pools or {}).values()]
+        if any(capacity < 1 for capacity in self._capacity):
+            raise ValueError("Every pool needs at least one runner.")
+
+        if outcomes is None:
+            outcomes = pipeline.evaluate_rules(variables or {})
+        durations = durations or {}
+        jobs = [
+            job
+            for job in pipeline.jobs
+            if outcomes.get(job.name, When.ON_SUCCESS) in (*_STARTED, When.MANUAL)
+        ]
+        graph = NeedsGraph(jobs, expand_matrix=True)
+        self._names = graph.names
+        self._job_count = len(self._names)
+
+        stages = [".pre", *(pipeline.stages or ["test"]), ".post"]
+        stage_rank = {stage: index for index, stage in enumerate(stages)}
+        barrier_count = len(stage_rank)
+
+        self._pool: List[int] = []
+        self._manual: List[bool] = []
+        self._fixed: List[float] = []
+        self._random: List[Tuple[int, Callable[[random.Random], float]]] = []
+        node_stage: List[int] = []
+        uses_stages: List[bool] = []
+
+        for job in jobs:
+            variants = (
+                [
+                    Matrix.variant_name(job.name, values)
+                    for values in job.matrix  # type: ignore[union-attr]
+                ]
+                if job.matrix is not None
+                else [job.name]
+            )
+            pool = next(
+                (
+                    index
+                    for index, tag in enumerate(self._pools)
+                    if index and tag in job.tags
+                ),
+                0,
+            )
+            manual = not run_manual and outcomes.get(job.name) == When.MANUAL
+            for name in variants:
+                duration = durations.get(
+                    name, durations.get(job.name, default_duration)
+                )
+                if callable(duration):
+                    self._random.append((len(self._fixed), duration))
+                    duration = 0.0
+                elif isinstance(duration, tuple):
+                    self._random.append((len(self._fixed), triangular(*duration)))
+                    duration = 0.0
+                self._fixed.append(float(duration))
+                self._pool.append(pool)
+                self._manual.append(manual)
+                node_stage.append(stage_rank[job.stage or "test"])
+                uses_stages.append(job.needs is None)
+
+        # Nodes after the jobs are the barriers of the stages, which finish when all jobs of their stage and
+        # the barrier of the previous stage have finished. Jobs without needs wait for the previous barrier.
+        node_count = self._job_count + barrier_count
+        self._successors: List[List[int]] = [[] for _ in range(node_count)]
+        self._indegree = [0] * node_count
+
+        def edge(source: int, target: int) -> None:
+            self._successors[source].append(target)
+            self._indegree[target] += 1
+
+        for index, name in enumerate(self._names):
+            for needed in graph.needs(name):
+                edge(graph.index(needed), index)
+            stage = node_stage[index]
+            if uses_stages[index] and stage > 0:
+                edge(self._job_count + stage - 1, index)
+            if not self._manual[index]:
+                edge(index, self._job_count + stage)
+        for stage in range(1, barrier_count):
+            edge(self._job_count + stage - 1, self._job_count + stage)
+
+        # The barriers are part of the cycle check: a job needing a job of a later stage waits for its own stage.
+        cycle = find_cycle(self._successors)
+        if cycle:
+            names = [*self._names, *(f"stage {stage}" for stage in stages)]
+            raise CyclicNeedsError([names[node] for node in cycle])
+        self._roots = [node for node in range(node_count) if not self._indegree[node]]
+
+    @property
+    def jobs(self) -> List[str]:
+        """The names of the simulated jobs, with one name per variant of `parallel:matrix` jobs."""
+        return list(self._names)
+
+    def _durations(self, rng: random.Random) -> List[float]:
+        durations = self._fixed[:]
+        for index, draw in self._random:
+            durations[index] = draw(rng)
+        return durations
+
+    def _simulate(self, durations: List[float]) -> _Run:
+        job_count = self._job_count
+        successors, pools, manual = self._successors, self._pool, self._manual
+        indegree = self._indegree[:]
+        node_count = len(indegree)
+        start = [-1.0] * job_count
+        ready_at = [0.0] * job_count
+        finish = [-1.0] * node_count
+        cause = [-1] * node_count
+        busy = [0.0] * len(self._capacity)
+        free = self._capacity[:]
+        queues: List[List[int]] = [[] for _ in free]
+        events: List[Tuple[float, int]] = []
+        pending = self._roots[:]
+        now = 0.0
+
+        while True:
+            while pending:
+                node = pending.pop()
+                if node >= job_count:
+                    finish[node] = now
+                    for successor in successors[node]:
+                        indegree[successor] -= 1
+                        if not indegree[successor]:
+                            cause[successor] = node
+                            pending.append(successor)
+                elif not manual[node]:
+                    ready_at[node] = now
+                    heapq.heappush(queues[pools[node]], node)
+
+            for pool, queue in enumerate(queues):
+                while queue and free[pool]:
+                    node = heapq.heappop(queue)
+                    free[pool] -= 1
+                    start[node] = now
+                    busy[pool] += durations[node]
+                    heapq.heappush(events, (now + durations[node], node))
+
+            if not events:
+                break
+            now = events[0][0]
+            while events and events[0][0] == now:
+                node = heapq.heappop(events)[1]
+                finish[node] = now
+                free[pools[node]] += 1
+                for successor in successors[node]:
+                    indegree[successor] -= 1
+                    if not indegree[successor]:
+                        cause[successor] = node
+                        pending.append(successor)
+
+        last = max(range(job_count), key=finish.__getitem__, default=-1)
+        if last >= 0 and finish[last] < 0:
+            last = -1
+        makespan = finish[last] if last >= 0 else 0.0
+        return _Run(start, ready_at, finish, cause, busy, makespan, last)
+
+    def _critical(self, run: _Run) -> List[int]:
+        path: List[int] = []
+        node = run.last
+        while node >= 0:
+            if node < self._job_count:
+                path.append(node)
+            node = run.cause[node]
+        return path[::-1]
+
+    def _utilization(self, busy: Sequence[float], makespan: float) -> Dict[str, float]:
+        return {
+            pool: busy[index] / (capacity * makespan) if makespan else 0.0
+            for index, (pool, capacity) in enumerate(zip(self._pools, self._capacity))
+        }
+
+    def run(
+        self, seed: Optional[int] = None, *, rng: Optional[random.Random] = None
+    ) -> SimulationResult:
+        """Simulate one execution.
+
+        Args:
+            seed (Optional[int]): The seed for random durations. Defaults to None.
+            rng (Optional[random.Random]): The random number generator for random durations, instead of a seed.
+                Defaults to None.
+
+        Returns:
+            SimulationResult: The outcome of the execution.
+        """
+        durations = self._durations(rng or random.Random(seed))
+        run = self._simulate(durations)
+        names = self._names
+        started = [index for index in range(self._job_count) if run.start[index] >= 0]
+        return SimulationResult(
+            makespan=run.makespan,
+            start={names[index]: run.start[index] for index in started},
+            finish={names[index]: run.finish[index] for index in started},
+            queue_wait={
+                names[index]: run.start[index] - run.ready[index] for index in started
+            },
+            utilization=self._utilization(run.busy, run.makespan),
+            critical_path=[names[index] for index in self._critical(run)],
+            blocked=[
+                names[index]
+                for index in range(self._job_count)
+                if run.start[index] < 0 and not self._manual[index]
+            ],
+        )
+
+    def monte_carlo(self, runs: int, *, seed: int = 0) -> MonteCarloResult:
+        """Simulate many executions with random durations.
+
+        Args:
+            runs (int): The number of executions.
+            seed (int): The seed of the random durations, which makes the result reproducible. Defaults to 0.
+
+        Raises:
+            ValueError: If `runs` is not positive.
+
+        Returns:
+            MonteCarloResult: The aggregated outcome.
+        """
+        if runs < 1:
+            raise ValueError("At least one run is required.")
+
+        rng = random.Random(seed)
+        makespans: List[float] = []
+        utilization_sums = [0.0] * len(self._capacity)
+        total_wait = 0.0
+        critical = [0] * self._job_count
+
+        for _ in range(runs):
+            durations = self._durations(rng)
+            run = self._simulate(durations)
+            makespans.append(run.makespan)
+            for pool, share in enumerate(
+                self._utilization(run.busy, run.makespan).values()
+            ):
+                utilization_sums[pool] += share
+            total_wait += sum(
+                start - ready
+                for start, ready in zip(run.start, run.ready)
+                if start >= 0
+            )
+            for index in self._critical(run):
+                critical[index] += 1
+
+        ranked = sorted(
+            (index for index, count in enumerate(critical) if count),
+            key=lambda index: -critical[index],
+        )
+        return MonteCarloResult(
+            makespans=makespans,
+            utilization={
+                pool: total / runs for pool, total in zip(self._pools, utilization_sums)
+            },
+            mean_queue_wait=total_wait / runs,
+            critical={self._names[index]: critical[index] / runs for index in ranked},
+        )
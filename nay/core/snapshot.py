@@ -0,0 +1,591 @@
+"""
+A compact binary snapshot of a built pipeline, which is reloaded without running the generator again.
+
+```python
+snapshot.dump(generate_pipeline(), "pipeline.nay")
+
+with Snapshot.open("pipeline.nay") as loaded:
+    loaded["test"].render()  # decodes only this job
+    pipeline = loaded.to_pipeline()
+```
+
+A snapshot contains the global variables, the stages and the jobs of a pipeline, including their `Image`, `Rule`, `Need` and
+`Matrix` objects. Every string is stored once in a string table, and every object once in an object table: images
+and rules by identity, because they can be modified, and all other objects by their content, so lists shared between
+jobs by `Job.derive()` and equal needs are stored once. The loaded pipeline shares these objects again, so its
+`render()` output equals the output of the original pipeline and its render caches work the same way.
+
+The file is memory mapped and read in place. Opening it reads the fixed size header, strings and objects are decoded
+on first access, and each of them only once.
+
+The layout, in little endian byte order, is:
+
+- the header: the magic `NAYSNAP\\0`, the format version, the numbers of strings and objects, the root object, the
+  number of words of the object table and the size of the string data,
+- the offsets of the strings in the string data, one more than there are strings,
+- the offsets of the objects in the object words,
+- the object words, each object starting with its kind,
+- the UTF-8 encoded string data.
+
+References to strings and objects are their index plus one, and zero is None. Snapshots of another format version
+are rejected.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from nay.core.exceptions import SnapshotError
+from nay.core.image import FrozenImage, Image
+from nay.core.job import Job, TriggerJob
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+from nay.core.pipeline import Pipeline
+from nay.core.rules import FrozenRule, Rule, When
+
+MAGIC = b"NAYSNAP\0"
+
+FORMAT_VERSION = 2
+"""The version of the snapshot format, which is increased with every incompatible change."""
+
+_HEADER = struct.Struct("<8sHHIIIII")
+
+_WHEN = list(When)
+
+_STRINGS, _DICT, _OBJECTS, _RULE, _FROZEN_RULE = 1, 2, 3, 4, 5
+_IMAGE, _FROZEN_IMAGE, _NEED, _MATRIX, _JOB, _TRIGGER_JOB, _PIPELINE = range(6, 13)
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+class _Encoder:
+    """Collects the string table and the object table of a snapshot."""
+
+    def __init__(self) -> None:
+        self.strings: Dict[str, int] = {}
+        self.records: List[Tuple[int, ...]] = []
+        self._content: Dict[Tuple[int, ...], int] = {}
+        self._identity: Dict[int, Tuple[Any, int]] = {}
+
+    def string(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        if not isinstance(value, str):
+            raise SnapshotError(f"expected a string, got {value!r}")
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index + 1
+
+    def record(self, words: Tuple[int, ...], *, shared: bool = True) -> int:
+        """Add an object, or return the reference of an equal object if the object is `shared`."""
+        if shared:
+            index = self._content.get(words)
+            if index is not None:
+                return index + 1
+            self._content[words] = len(self.records)
+        self.records.append(words)
+        return len(self.records)
+
+    def memoized(self, value: Any, encode: Callable[[Any], int]) -> int:
+        """Encode an object once, no matter how many jobs reference it."""
+        memo = self._identity.get(id(value))
+        if memo is None:
+            memo = self._identity[id(value)] = (value, encode(value))
+        return memo[1]
+
+    def strings_list(self, values: Optional[Sequence[str]]) -> int:
+        if values is None:
+            return 0
+        return self.memoized(
+            values,
+            lambda values: self.record(
+                (_STRINGS, len(values), *map(self.string, values))
+            ),
+        )
+
+    def dictionary(self, values: Mapping[str, str]) -> int:
+        def encode(values: Mapping[str, str]) -> int:
+            words = [_DICT, len(values)]
+            for key, value in values.items():
+                words += (self.string(key), self.string(value))
+            return self.record(tuple(words))
+
+        return self.memoized(values, encode)
+
+    def objects(
+        self, values: Optional[Sequence[Any]], encode: Callable[[Any], int]
+    ) -> int:
+        if values is None:
+            return 0
+        return self.memoized(
+            values,
+            lambda values: self.record((_OBJECTS, len(values), *map(encode, values))),
+        )
+
+    def matrix(self, matrix: Optional[Matrix]) -> int:
+        def encode(matrix: Matrix) -> int:
+            words = [_MATRIX, len(matrix.fingerprint)]
+            for entry in matrix.fingerprint:
+                words.append(len(entry))
+                for key, values in entry:
+                    words += (self.string(key), self.strings_list(values))
+            return self.record(tuple(words))
+
+        return self.memoized(matrix, encode) if matrix is not None else 0
+
+    def image(self, image: Optional[Union[Image, FrozenImage]]) -> int:
+        def encode(image: Union[Image, FrozenImage]) -> int:
+            frozen = isinstance(image, FrozenImage)
+            return self.record(
+                (
+                    _FROZEN_IMAGE if frozen else _IMAGE,
+                    self.string(image.name),
+                    self.string(image.tag),
+                    self.strings_list(image.entrypoint),
+                ),
+                shared=frozen,
+            )
+
+        return self.memoized(image, encode) if image is not None else 0
+
+    def rule(self, rule: Union[Rule, FrozenRule]) -> int:
+        def encode(rule: Union[Rule, FrozenRule]) -> int:
+            frozen = isinstance(rule, FrozenRule)
+            variables = rule.render().get("variables") or {}
+            return self.record(
+                (
+                    _FROZEN_RULE if frozen else _RULE,
+                    self.string(rule.if_statement),
+                    _WHEN.index(rule.when),
+                    int(rule.allow_failure),
+                    self.strings_list(rule.changes),
+                    self.strings_list(rule.exists),
+                    self.dictionary(variables),  # type: ignore[arg-type]
+                ),
+                shared=frozen,
+            )
+
+        return self.memoized(rule, encode)
+
+    def need(self, need: Need) -> int:
+        return self.memoized(
+            need,
+            lambda need: self.record(
+                (
+                    _NEED,
+                    self.string(need.job),
+                    self.string(need.project),
+                    self.string(need.ref),
+                    self.string(need.pipeline),
+                    int(need.artifacts),
+                    self.matrix(need.parallel),
+                )
+            ),
+        )
+
+    def job(self, job: Job) -> int:
+        if type(job) not in (Job, TriggerJob):
+            raise SnapshotError(
+                f"the job '{job.name}' is a {type(job).__name__}, only Job and TriggerJob are supported"
+            )
+
+        words = [
+            _TRIGGER_JOB if isinstance(job, TriggerJob) else _JOB,
+            self.string(job.name),
+            self.string(job.stage),
+            self.image(job.image),
+            self.objects(job.rules, self.rule),
+            self.objects(job.needs, self.need),
+            self.strings_list(job.scripts),
+            self.dictionary(job.variables),
+            self.strings_list(job.tags),
+            self.matrix(job.matrix),
+        ]
+        if isinstance(job, TriggerJob):
+            words += (
+                self.string(job.artifact),
+                self.string(job.artifact_job),
+                self.string(job.strategy),
+            )
+        return self.record(tuple(words), shared=False)
+
+    def pipeline(self, pipeline: Pipeline) -> int:
+        return self.record(
+            (
+                _PIPELINE,
+                self.dictionary(pipeline.variables),
+                self.objects(pipeline.jobs, self.job),
+                self.strings_list(pipeline.stages),
+            ),
+            shared=False,
+        )
+
+
+def _words(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+def dumps(pipeline: Pipeline) -> bytes:
+    """Serialize a pipeline to a binary snapshot.
+
+    Args:
+        pipeline (Pipeline): The pipeline, whose jobs must be `Job` or `TriggerJob` objects.
+
+    Raises:
+        SnapshotError: If the pipeline contains other job classes, or variables which are not strings.
+
+    Returns:
+        bytes: The snapshot.
+    """
+    encoder = _Encoder()
+    root = encoder.pipeline(pipeline)
+
+    data = [string.encode("utf-8") for string in encoder.strings]
+    string_offsets = array("I", [0])
+    for encoded in data:
+        string_offsets.append(string_offsets[-1] + len(encoded))
+
+    object_offsets = array("I")
+    words = array("I")
+    for record in encoder.records:
+        object_offsets.append(len(words))
+        words.extend(record)
+
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        0,
+        len(encoder.strings),
+        len(encoder.records),
+        root,
+        len(words),
+        string_offsets[-1],
+    )
+    return b"".join(
+        (
+            header,
+            _words(string_offsets),
+            _words(object_offsets),
+            _words(words),
+            *data,
+        )
+    )
+
+
+def dump(pipeline: Pipeline, path: PathLike) -> None:
+    """Write a binary snapshot of a pipeline to a file, see `dumps()`."""
+    with open(path, "wb") as stream:
+        stream.write(dumps(pipeline))
+
+
+class Snapshot(Mapping[str, Job]):
+    """A binary snapshot of a pipeline, whose jobs are decoded on first access.
+
+    Decoded objects are kept, so every job, rule or list is decoded once and shared like in the original pipeline.
+
+    Args:
+        buffer (Any): The snapshot, as bytes or any other object supporting the buffer protocol, like an `mmap`.
+
+    Raises:
+        SnapshotError: If the buffer is no snapshot, is truncated or has another format version.
+    """
+
+    def __init__(self, buffer: Any) -> None:
+        self._views: List[memoryview] = [memoryview(buffer)]
+        self._mmap: Optional[mmap.mmap] = None
+        try:
+            self._load(self._views[0])
+        except Exception:
+            # Release the views, so that the caller can close the buffer, like the memory map of `open()`.
+            self.close()
+            raise
+
+    def _load(self, view: memoryview) -> None:
+        """Check the header and set up the views of the tables and of the string data."""
+        if len(view) < _HEADER.size:
+            raise SnapshotError("the data is too short")
+
+        (
+            magic,
+            version,
+            _,
+            string_count,
+            object_count,
+            root,
+            word_count,
+            data_size,
+        ) = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise SnapshotError("the data is no pipeline snapshot")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(
+                f"the format version is {version}, expected {FORMAT_VERSION}"
+            )
+
+        tables = string_count + 1 + object_count + word_count
+        end = _HEADER.size + 4 * tables
+        if len(view) != end + data_size:
+            raise SnapshotError("the data is truncated")
+
+        table = self._view(view[_HEADER.size : end])
+        if sys.byteorder == "little":
+            words = self._view(table.cast("I"))
+        else:
+            swapped = array("I", table)
+            swapped.byteswap()
+            words = self._view(memoryview(swapped))
+        self._string_offsets = self._view(words[: string_count + 1])
+        self._object_offsets = self._view(
+            words[string_count + 1 : string_count + 1 + object_count]
+        )
+        self._words = self._view(words[string_count + 1 + object_count :])
+        self._data = self._view(view[end:])
+
+        self._strings: List[Optional[str]] = [None] * string_count
+        self._objects: List[Any] = [None] * object_count
+        self._root = root
+        self._jobs: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def open(cls, path: PathLike) -> Snapshot:
+        """Memory map a snapshot file. Close the snapshot, or use it as context manager, to unmap the file.
+
+        Raises:
+            SnapshotError: If the file is no snapshot, is truncated or has another format version.
+        """
+        with open(path, "rb") as stream:
+            try:
+                mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise SnapshotError("the file is empty") from None
+        try:
+            snapshot = cls(mapped)
+        except SnapshotError:
+            mapped.close()
+            raise
+        snapshot._mmap = mapped
+        return snapshot
+
+    def close(self) -> None:
+        """Release the buffer. Jobs which were decoded before stay usable."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _view(self, view: memoryview) -> memoryview:
+        """Keep a view of the buffer, which is released by `close()`."""
+        self._views.append(view)
+        return view
+
+    def __getitem__(self, name: str) -> Job:
+        return self._object(self._job_refs()[name])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._job_refs())
+
+    def __len__(self) -> int:
+        return len(self._job_refs())
+
+    @property
+    def variables(self) -> Dict[str, str]:
+        """The global variables of the pipeline."""
+        return self._object(self._word(self._root, 1))
+
+    @property
+    def stages(self) -> List[str]:
+        """The stages of the pipeline in their order of execution."""
+        return list(self._object(self._word(self._root, 3)))
+
+    def to_pipeline(self) -> Pipeline:
+        """Decode all jobs and returns them as pipeline."""
+        pipeline = Pipeline(variables=self.variables, stages=self.stages)
+        pipeline.add_children(*(self[name] for name in self))
+        return pipeline
+
+    def _job_refs(self) -> Dict[str, int]:
+        """The references of the jobs by their names, which are decoded without decoding the jobs."""
+        if self._jobs is None:
+            jobs = self._word(self._root, 2)
+            offset = self._object_offsets[jobs - 1]
+            count = self._words[offset + 1]
+            refs = self._words[offset + 2 : offset + 2 + count]
+            self._jobs = {self._string(self._word(ref, 1)): ref for ref in refs}
+        return self._jobs
+
+    def _word(self, ref: int, position: int) -> int:
+        return self._words[self._object_offsets[ref - 1] + position]
+
+    def _string(self, ref: int) -> Optional[str]:
+        if ref == 0:
+            return None
+        value = self._strings[ref - 1]
+        if value is None:
+            start, end = self._string_offsets[ref - 1], self._string_offsets[ref]
+            value = self._strings[ref - 1] = str(self._data[start:end], "utf-8")
+        return value
+
+    def _object(self, ref: int) -> Any:
+        if ref == 0:
+            return None
+        value = self._objects[ref - 1]
+        if value is None:
+            offset = self._object_offsets[ref - 1]
+            kind = self._words[offset]
+            value = self._objects[ref - 1] = _DECODERS[kind](self, offset + 1)
+        return value
+
+    def _strings_list(self, offset: int) -> List[str]:
+        count = self._words[offset]
+        return [self._string(ref) for ref in self._words[offset + 1 : offset + 1 + count]]  # type: ignore[misc]
+
+    def _dictionary(self, offset: int) -> Dict[str, str]:
+        count = self._words[offset]
+        refs = self._words[offset + 1 : offset + 1 + 2 * count]
+        return {
+            self._string(refs[index]): self._string(refs[index + 1])  # type: ignore[misc]
+            for index in range(0, 2 * count, 2)
+        }
+
+    def _objects_list(self, offset: int) -> List[Any]:
+        count = self._words[offset]
+        return [
+            self._object(ref) for ref in self._words[offset + 1 : offset + 1 + count]
+        ]
+
+    def _rule(self, offset: int, cls: Any = Rule) -> Union[Rule, FrozenRule]:
+        words = self._words[offset : offset + 6]
+        return cls(
+            if_statement=self._string(words[0]),
+            when=_WHEN[words[1]],
+            allow_failure=bool(words[2]),
+            changes=self._object(words[3]),
+            exists=self._object(words[4]),
+            variables=self._object(words[5]),
+        )
+
+    def _frozen_rule(self, offset: int) -> FrozenRule:
+        return self._rule(offset, FrozenRule)  # type: ignore[return-value]
+
+    def _image(self, offset: int, cls: Any = Image) -> Union[Image, FrozenImage]:
+        words = self._words[offset : offset + 3]
+        return cls(
+            self._string(words[0]), self._string(words[1]), self._object(words[2])
+        )
+
+    def _frozen_image(self, offset: int) -> FrozenImage:
+        return self._image(offset, FrozenImage)  # type: ignore[return-value]
+
+    def _need(self, offset: int) -> Need:
+        words = self._words[offset : offset + 6]
+        return Need(
+            self._string(words[0]),
+            project=self._string(words[1]),
+            ref=self._string(words[2]),
+            pipeline=self._string(words[3]),
+            artifacts=bool(words[4]),
+            parallel=self._object(words[5]),
+        )
+
+    def _matrix(self, offset: int) -> Matrix:
+        entries = []
+        for _ in range(self._words[offset]):
+            count = self._words[offset + 1]
+            refs = self._words[offset + 2 : offset + 2 + 2 * count]
+            entries.append(
+                {
+                    self._string(refs[index]): self._object(refs[index + 1])
+                    for index in range(0, 2 * count, 2)
+                }
+            )
+            offset += 1 + 2 * count
+        return Matrix(*entries)
+
+    def _job(self, offset: int, cls: Any = Job) -> Job:
+        words = self._words[offset : offset + 9]
+        # Like `Job.derive()`, the constructor is bypassed, so the decoded lists stay shared between jobs.
+        job = object.__new__(cls)
+        job._name = self._string(words[0])
+        job._stage = self._string(words[1])
+        job._image = self._object(words[2])
+        job._rules = self._object(words[3])
+        job._needs = self._object(words[4])
+        job._scripts = self._object(words[5])
+        job._variables = self._object(words[6])
+        job._tags = self._object(words[7])
+        job._matrix = self._object(words[8])
+        return job
+
+    def _trigger_job(self, offset: int) -> TriggerJob:
+        job = self._job(offset, TriggerJob)
+        words = self._words[offset + 9 : offset + 12]
+        job._artifact = self._string(words[0])  # type: ignore[attr-defined]
+        job._artifact_job = self._string(words[1])  # type: ignore[attr-defined]
+        job._strategy = self._string(words[2])  # type: ignore[attr-defined]
+        return job  # type: ignore[return-value]
+
+
+_DECODERS: Dict[int, Callable[[Snapshot, int], Any]] = {
+    _STRINGS: Snapshot._strings_list,
+    _DICT: Snapshot._dictionary,
+    _OBJECTS: Snapshot._objects_list,
+    _RULE: Snapshot._rule,
+    _FROZEN_RULE: Snapshot._frozen_rule,
+    _IMAGE: Snapshot._image,
+    _FROZEN_IMAGE: Snapshot._frozen_image,
+    _NEED: Snapshot._need,
+    _MATRIX: Snapshot._matrix,
+    _JOB: Snapshot._job,
+    _TRIGGER_JOB: Snapshot._trigger_job,
+}
+"""Decode the fields of an object, which start after its kind."""
+
+
+def loads(data: bytes) -> Pipeline:
+    """Deserialize a pipeline from a binary snapshot.
+
+    Raises:
+        SnapshotError: If the data is no snapshot, is truncated or has another format version.
+    """
+    snapshot = Snapshot(data)
+    try:
+        return snapshot.to_pipeline()
+    finally:
+        snapshot.close()
+
+
+def load(path: PathLike) -> Pipeline:
+    """Read a pipeline from a snapshot file, which is memory mapped while it is decoded.
+
+    Raises:
+        SnapshotError: If the file is no snapshot, is truncated or has another format version.
+    """
+    with Snapshot.open(path) as snapshot:
+        return snapshot.to_pipeline()
@@ -1,5 +1,32 @@
+from __future__ import annotations
+
 import os
-from typing import Any, Optional
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional
+
+_active_snapshot: ContextVar[Optional[EnvironmentSnapshot]] = ContextVar(
+    "nay_environment_snapshot", default=None
+)
+
+
+def _resolve(key: str, environ: Mapping[str, str]) -> str:
+    """Resolve a predefined variable with the semantics described in `EnvProxy`.
+
+    Raises:
+        KeyError: If running within a pipeline and the variable is not set.
+    """
+    if environ.get("CI"):  # When running within a Gitlab CI pipeline
+        return environ[key]
+
+    # Indicate that we are not running within a pipeline by
+    # returning an empty string
+    if key == "CI":
+        return ""
+
+    # In the case we are not running within a pipeline ($CI is empty)
+    # for all other variables, we return a dummy value which
+    # explicitly describes this state
+    return environ.get(key, "notRunningInAPipeline")
 
 
 class EnvProxy:
@@ -32,6 +59,8 @@ class EnvProxy:
     `CI_*` variables, except for the `CI` variable itself, where an empty string is returned to indicate that we are not
     running within a pipeline.
 
+    While an `EnvironmentSnapshot` is active, the value is taken from the snapshot instead of the environment.
+
     Args:
         key (str): The name of the environment variable to query when its value is requested.
     """
@@ -40,18 +69,11 @@ class EnvProxy:
         self._key = key
 
     def __get__(self, obj: Any, objtype: Any = None) -> str:
-        if os.getenv("CI"):  # When running within a Gitlab CI pipeline
-            return os.environ[self._key]
-
-        # Indicate that we are not running within a pipeline by
-        # returning an empty string
-        if self._key == "CI":
-            return ""
+        snapshot = _active_snapshot.get()
+        if snapshot is not None:
+            return snapshot[self._key]
 
-        # In the case we are not running within a pipeline ($CI is empty)
-        # for all other variables, we return a dummy value which
-        # explicitly describes this state
-        return os.getenv(self._key, "notRunningInAPipeline")
+        return _resolve(self._key, os.environ)
 
 
 class OptionalEnvProxy:
@@ -67,13 +89,17 @@ class OptionalEnvProxy:
 
     The purpose of this class is to delay the execution of `os.getenv()`. In the upper example `myvar` is
     only set to this `OptionalEnvProxy` object. The value itself is retrieved with `os.getenv()` in the moment
-    when `myvar` is used.
+    when `myvar` is used. While an `EnvironmentSnapshot` is active, the value is taken from the snapshot instead.
     """
 
     def __init__(self, key: str) -> None:
         self._key = key
 
     def __get__(self, obj: Any, objtype: Any = None) -> Optional[str]:
+        snapshot = _active_snapshot.get()
+        if snapshot is not None:
+            return snapshot.get(self._key)
+
         return os.getenv(self._key)
 
 
@@ -85,3 +111,140 @@ class PredefinedVariables:
     CI_PIPELINE_ID: EnvProxy = EnvProxy("CI_PIPELINE_ID")
     CI_JOB_NAME: EnvProxy = EnvProxy("CI_JOB_NAME")
     CI_COMMIT_REF_SLUG: EnvProxy = EnvProxy("CI_COMMIT_REF_SLUG")
+
+
+class EnvironmentSnapshot(Mapping[str, str]):
+    """A snapshot of the environment, which resolves all `PredefinedVariables` once.
+
+    Reading `PredefinedVariables` queries the environment on every access. A snapshot resolves all of them
+    once when it is created, with the same semantics as `EnvProxy`, and serves them from a compact mapping.
+    Overrides allow to generate pipelines offline for a simulated environment, without touching `os.environ`.
+
+    The snapshot can be passed around explicitly and queried like `PredefinedVariables`:
+
+    ```python
+    snapshot = EnvironmentSnapshot({"CI_COMMIT_REF_SLUG": "main"})
+    if snapshot.CI_COMMIT_REF_SLUG == "main":
+        ...
+    ```
+
+    Or it is activated as context manager, which makes all `EnvProxy` and `OptionalEnvProxy` objects read from it.
+    Activation is local to the current thread or asyncio task, so one process can render many pipelines for
+    different environments at the same time:
+
+    ```python
+    with EnvironmentSnapshot.simulate(CI="true", CI_COMMIT_REF_SLUG="feature", CI_PIPELINE_ID="42"):
+        pipeline = build_pipeline()  # PredefinedVariables.CI_COMMIT_REF_SLUG == "feature"
+    ```
+
+    The snapshot is a read-only mapping of the environment it was taken from. Iterating it, `in` and `get()` see the
+    variables as they are set, so `dict(snapshot)` is a copy of that environment. Only looking up a variable applies
+    the semantics of `EnvProxy`, which resolves a missing variable to a placeholder outside of a pipeline.
+
+    By default the whole environment is copied. GitLab passes every CI/CD variable of a job, including trigger and
+    project variables like `DEPLOY_ENV`, as environment variable, and rules, `OptionalEnvProxy` objects and the
+    builders of child pipelines may read any of them. Pass `keys` to keep only the predefined variables and the
+    given ones, which makes the snapshot smaller to hold and to send to child pipeline workers.
+
+    Args:
+        overrides (Optional[Mapping[str, str]]): Variables which take precedence over the environment. Defaults to None.
+        environ (Optional[Mapping[str, str]]): The environment to take the variables from. Defaults to `os.environ`.
+        keys (Optional[Iterable[str]]): The variables to keep besides the `PredefinedVariables` and the overrides.
+            Defaults to None, which keeps all variables.
+    """
+
+    def __init__(
+        self,
+        overrides: Optional[Mapping[str, str]] = None,
+        *,
+        environ: Optional[Mapping[str, str]] = None,
+        keys: Optional[Iterable[str]] = None,
+    ) -> None:
+        environ = os.environ if environ is None else environ
+        if keys is None:
+            source = dict(environ)
+        else:
+            source = {
+                key: environ[key]
+                for key in dict.fromkeys([*_predefined_keys(), "CI", *keys])
+                if key in environ
+            }
+        if overrides:
+            source.update(overrides)
+
+        self._environ = source
+        self._values: Dict[str, str] = {}
+        self._tokens: List[Token[Optional[EnvironmentSnapshot]]] = []
+
+        for key in _predefined_keys():
+            if key in source or not source.get("CI"):
+                self._values[key] = _resolve(key, source)
+
+    @classmethod
+    def simulate(cls, **variables: str) -> EnvironmentSnapshot:
+        """Returns a snapshot which contains only the given variables and ignores `os.environ`.
+
+        Set `CI` to a non-empty value to simulate a pipeline execution, where missing variables raise a `KeyError`.
+        """
+        return cls(environ=variables)
+
+    @staticmethod
+    def active() -> Optional[EnvironmentSnapshot]:
+        """Returns the snapshot activated in the current context, if any."""
+        return _active_snapshot.get()
+
+    @classmethod
+    def current(cls) -> EnvironmentSnapshot:
+        """Returns the snapshot activated in the current context, or a new snapshot of `os.environ`."""
+        snapshot = _active_snapshot.get()
+        return snapshot if snapshot is not None else cls()
+
+    def __getitem__(self, key: str) -> str:
+        value = self._values.get(key)
+        if value is None:
+            value = self._values[key] = _resolve(key, self._environ)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._environ
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._environ)
+
+    def __len__(self) -> int:
+        return len(self._environ)
+
+    def __getattr__(self, name: str) -> str:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Returns the raw value of a variable like `os.getenv()`, without the semantics of `EnvProxy`."""
+        return self._environ.get(key, default)
+
+    def as_dict(self) -> Dict[str, str]:
+        """Returns all resolved predefined variables."""
+        return dict(self._values)
+
+    def __enter__(self) -> EnvironmentSnapshot:
+        self._tokens.append(_active_snapshot.set(self))
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _active_snapshot.reset(self._tokens.pop())
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The resolved values are derived from the environment and not worth sending to another process.
+        return {"_environ": self._environ, "_values": {}, "_tokens": []}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+
+
+def _predefined_keys() -> List[str]:
+    return [
+        value._key
+        for value in vars(PredefinedVariables).values()
+        if isinstance(value, EnvProxy)
+    ]
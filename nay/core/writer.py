@@ -0,0 +1,180 @@
+"""
+Writes pipelines as YAML, either by dumping the fully rendered pipeline dictionary
+or by streaming the pipeline job by job.
+
+PyYAML is imported when the first document is dumped, not when this module is imported, so building
+pipelines does not pay for it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterable, Iterator, Tuple, Union
+
+from nay.core.exceptions import RenderMismatchError
+
+if TYPE_CHECKING:
+    from nay.core.pipeline import Pipeline
+
+Target = Union[str, "os.PathLike[str]", IO[str]]
+"""A file path or an open text stream like `sys.stdout`."""
+
+
+@lru_cache(maxsize=None)
+def _dumpers() -> Tuple[type, type]:
+    """Import PyYAML and create the dumper classes, `AnchorDumper` and `Dumper`."""
+    import yaml
+
+    class AnchorDumper(getattr(yaml, "CSafeDumper", yaml.SafeDumper)):  # type: ignore[misc]
+        """A YAML dumper which writes objects referenced more than once as anchor and aliases."""
+
+    class Dumper(AnchorDumper):
+        """The YAML dumper used for all pipeline output.
+
+        The render caches share dictionaries between jobs. PyYAML would emit those as anchors and aliases,
+        which depend on what else is part of the same document. This dumper writes every value inline,
+        so that the output of a job never depends on the other jobs.
+        """
+
+        def ignore_aliases(self, data: Any) -> bool:
+            return True
+
+    return AnchorDumper, Dumper
+
+
+def __getattr__(name: str) -> Any:
+    if name == "AnchorDumper":
+        return _dumpers()[0]
+    if name == "Dumper":
+        return _dumpers()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+DUMP_OPTIONS: Dict[str, Any] = {
+    "default_flow_style": False,
+    "sort_keys": False,
+    "allow_unicode": True,
+}
+
+
+def dump(rendered: Any, *, anchors: bool = False) -> str:
+    """Dump a rendered value to YAML with the options used for all pipeline output.
+
+    Args:
+        rendered (Any): A rendered pipeline, job or keyword.
+        anchors (bool): Write objects which are referenced more than once as YAML anchor and aliases.
+            Defaults to False.
+
+    Returns:
+        str: The YAML document.
+    """
+    import yaml
+
+    anchor_dumper, dumper = _dumpers()
+    return yaml.dump(
+        rendered, Dumper=anchor_dumper if anchors else dumper, **DUMP_OPTIONS
+    )
+
+
+def iter_chunks(items: Iterable[Tuple[str, Any]]) -> Iterable[str]:
+    """Dump the top-level entries of a pipeline one at a time.
+
+    The concatenation of the chunks equals `dump(dict(items))`, but only one entry needs
+    to be rendered at a time.
+
+    Args:
+        items (Iterable[Tuple[str, Any]]): The top-level keys and their rendered values.
+
+    Yields:
+        str: The YAML of every entry.
+    """
+    empty = True
+    for key, value in items:
+        empty = False
+        yield dump({key: value})
+
+    if empty:
+        yield dump({})
+
+
+def write(
+    pipeline: Pipeline,
+    target: Target,
+    *,
+    verify: bool = False,
+    expand_matrix: bool = False,
+) -> None:
+    """Stream the YAML of a pipeline to a file or an open text stream.
+
+    The jobs are rendered and written one by one, so the complete pipeline dictionary is never held in
+    memory. A file target is written to a temporary file first and moved into place once complete.
+
+    Args:
+        pipeline (Pipeline): The pipeline to write.
+        target (Target): The file path or an open text stream like `sys.stdout`.
+        verify (bool): Additionally dump the fully rendered pipeline dictionary and ensure that the streamed
+            output is byte-identical. Defaults to False.
+        expand_matrix (bool): Write the variants of `parallel:matrix` jobs as jobs, generating them one at a time.
+            Defaults to False.
+
+    Raises:
+        RenderMismatchError: If `verify` is set and the outputs differ. A file target is left untouched.
+    """
+    if not isinstance(target, (str, os.PathLike)):
+        name = getattr(target, "name", repr(target))
+        _write_stream(pipeline, target, verify, expand_matrix, name)
+        return
+
+    path = os.fspath(target)
+    with atomic_stream(path) as stream:
+        _write_stream(pipeline, stream, verify, expand_matrix, path)
+
+
+@contextmanager
+def atomic_stream(path: Union[str, "os.PathLike[str]"]) -> Iterator[IO[str]]:
+    """Open a temporary file next to `path`, which replaces `path` once the context exits without an error.
+
+    Readers of `path` never see a partially written file. The mode of an existing file is kept.
+
+    Args:
+        path (Union[str, os.PathLike[str]]): The file to replace.
+
+    Yields:
+        IO[str]: The text stream to write the new content to.
+    """
+    path = os.fspath(path)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), prefix=".nay-", suffix=".yml"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as stream:
+            yield stream
+        os.chmod(tmp_path, os.stat(path).st_mode if os.path.exists(path) else 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _write_stream(
+    pipeline: Pipeline,
+    stream: IO[str],
+    verify: bool,
+    expand_matrix: bool,
+    target_name: str,
+) -> None:
+    digest = hashlib.sha256() if verify else None
+    for chunk in iter_chunks(pipeline.iter_render(expand_matrix=expand_matrix)):
+        stream.write(chunk)
+        if digest is not None:
+            digest.update(chunk.encode("utf-8"))
+
+    if digest is not None:
+        rendered = pipeline.render(expand_matrix=expand_matrix)
+        expected = hashlib.sha256(dump(rendered).encode("utf-8"))
+        if digest.digest() != expected.digest():
+            raise RenderMismatchError(target_name)
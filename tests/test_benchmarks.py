@@ -0,0 +1,29 @@
+import json
+
+from benchmarks import compare, run
+from benchmarks.synthetic import PipelineShape, generate
+
+
+class TestBenchmarks:
+    def test_generate(self):
+        pipeline = generate(PipelineShape(jobs=20, stages=4))
+        assert len(pipeline.jobs) == 20
+        assert pipeline.stages == ["stage-0", "stage-1", "stage-2", "stage-3"]
+        pipeline.needs_graph().validate()
+
+    def test_run_and_compare(self):
+        results = run.run(PipelineShape(jobs=10), repeat=2)
+        assert set(results["results"]) == set(run.BENCHMARKS)
+        assert results["meta"]["shape"]["jobs"] == 10
+
+        rows = compare.compare(results, results, threshold=0.1)
+        assert rows and not any(row[4] for row in rows)
+
+    def test_main(self, tmp_path):
+        path = tmp_path / "results.json"
+        arguments = ["--jobs", "12", "--stages", "3", "--repeat", "1", "--output", str(path)]
+        assert run.main([*arguments, "--only", "construct", "--only", "derive_jobs"]) == 0
+
+        results = json.loads(path.read_text())
+        assert results["meta"]["shape"]["stages"] == 3
+        assert list(results["results"]) == ["construct", "derive_jobs"]
@@ -0,0 +1,115 @@
+import re
+
+import pytest
+from nay.core.changes import FileMatcher, PatternIndex, translate
+from nay.core.job import Job
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule, When
+
+
+class TestTranslate:
+    @pytest.mark.parametrize(
+        "pattern, path, expected",
+        [
+            ("*.py", "setup.py", True),
+            ("*.py", "nay/setup.py", False),
+            ("*", ".gitlab-ci.yml", True),
+            ("**/*.py", "setup.py", True),
+            ("**/*.py", "nay/core/job.py", True),
+            ("nay/**/*.py", "nay/job.py", True),
+            ("nay/**/*.py", "tests/job.py", False),
+            ("nay/**", "nay/job.py", True),
+            ("nay/**", "nay/core/job.py", False),
+            ("file?.txt", "file1.txt", True),
+            ("file?.txt", "file/.txt", False),
+            ("file[0-9].txt", "file1.txt", True),
+            ("file[!0-9].txt", "file1.txt", False),
+            ("*.{yml,yaml}", "ci.yaml", True),
+            ("{docs,nay/{core,cli}}/*.md", "nay/cli/README.md", True),
+            ("{docs,nay/{core,cli}}/*.md", "nay/README.md", False),
+            ("a+b(c).txt", "a+b(c).txt", True),
+        ],
+    )
+    def test_semantics(self, pattern, path, expected):
+        assert (re.fullmatch(translate(pattern), path) is not None) == expected
+
+    @pytest.mark.parametrize("pattern", ["{a,b", "[abc"])
+    def test_invalid(self, pattern):
+        with pytest.raises(ValueError):
+            translate(pattern)
+
+
+class TestPatternIndex:
+    def test_matching(self):
+        index = PatternIndex(
+            ["Dockerfile", "./docs/**/*", "nay/core/*.py", "**/*.md", "tests/*.py"]
+        )
+        assert len(index) == 5
+        assert index.matching(["nay/core/job.py", "README.md"]) == {
+            "nay/core/*.py",
+            "**/*.md",
+        }
+        assert index.matching(["./Dockerfile", "docs/a/b.txt"]) == {
+            "Dockerfile",
+            "docs/**/*",
+        }
+        assert index.matching([]) == set()
+
+    def test_same_node(self):
+        index = PatternIndex(["src/*.py", "src/*.txt", "src/main.*"])
+        assert index.matching(["src/main.py", "src/other.txt"]) == {
+            "src/*.py",
+            "src/*.txt",
+            "src/main.*",
+        }
+
+    def test_many_files(self):
+        patterns = [f"service{i}/**/*.py" for i in range(200)]
+        files = [f"service{i}/src/module{j}.py" for i in range(0, 200, 2) for j in range(50)]
+        assert len(PatternIndex(patterns).matching(files)) == 100
+
+
+@pytest.fixture
+def rules():
+    return [
+        Rule(if_statement="$CI_MERGE_REQUEST_IID", changes=["nay/**/*.py"]),
+        Rule(changes=["docs/*", "nay/**/*.py"], when=When.MANUAL),
+        Rule(exists=["Dockerfile"]),
+        Rule(when=When.ALWAYS),
+    ]
+
+
+class TestFileMatcher:
+    def test_fired_rules(self, rules):
+        matcher = FileMatcher(rules)
+        assert matcher.fired_rules(rules, changed=["nay/core/job.py"]) == rules
+        assert matcher.fired_rules(rules, changed=["README.md"], existing=[]) == [
+            rules[3]
+        ]
+        assert matcher.fired_rules(rules, changed=["docs/a.md"], existing=["Dockerfile"]) == rules[1:]
+
+    def test_unknown_files_match(self, rules):
+        files = FileMatcher(rules).match()
+        assert all(files.rule_matches(rule) for rule in rules)
+
+
+class TestPipelineEvaluateRules:
+    def test_changes(self, rules):
+        pipeline = Pipeline()
+        pipeline.add_children(
+            Job(name="lint", script="flake8", rules=rules[:1]),
+            Job(name="docs", script="mkdocs build", rules=rules[1:2]),
+            Job(name="docker", script="docker build .", rules=rules[2:3]),
+        )
+        variables = {"CI_MERGE_REQUEST_IID": "1"}
+
+        assert pipeline.evaluate_rules(variables, changed=["docs/index.md"], existing=[]) == {
+            "lint": When.NEVER,
+            "docs": When.MANUAL,
+            "docker": When.NEVER,
+        }
+
+        matcher = pipeline.file_matcher()
+        assert pipeline.evaluate_rules(
+            variables, changed=["nay/job.py"], matcher=matcher
+        ) == {"lint": When.ON_SUCCESS, "docs": When.MANUAL, "docker": When.ON_SUCCESS}
@@ -0,0 +1,103 @@
+import functools
+
+import pytest
+import yaml
+from nay.core.children import generate_children
+from nay.core.exceptions import ChildPipelineError, ScriptArgumentNotAllowedError
+from nay.core.job import Job, TriggerJob
+from nay.core.pipeline import Pipeline
+from nay.core.variables import EnvironmentSnapshot, PredefinedVariables
+
+
+def build_service(service: str) -> Pipeline:
+    if service == "broken":
+        raise RuntimeError("cannot build the broken service")
+    pipeline = Pipeline()
+    pipeline.add_children(
+        Job(name=f"test-{service}", script=f"test {PredefinedVariables.CI_COMMIT_REF_SLUG}")
+    )
+    return pipeline
+
+
+def builders(*services):
+    return {service: functools.partial(build_service, service) for service in services}
+
+
+SNAPSHOT = EnvironmentSnapshot.simulate(CI_COMMIT_REF_SLUG="feature", CI_JOB_NAME="generate")
+
+
+class TestGenerateChildren:
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_generate(self, tmp_path, max_workers):
+        results = generate_children(
+            builders("web", "api", "db"), str(tmp_path), max_workers=max_workers, snapshot=SNAPSHOT
+        )
+        assert [result.name for result in results] == ["web", "api", "db"]
+        assert all(result.ok for result in results)
+        with open(results[1].path) as stream:
+            assert yaml.safe_load(stream) == {"test-api": {"script": ["test feature"]}}
+
+    def test_failures_per_child(self, tmp_path):
+        results = generate_children(builders("web", "broken"), str(tmp_path), max_workers=2, snapshot=SNAPSHOT)
+        assert results[0].ok
+        assert "cannot build the broken service" in results[1].error
+
+    def test_unpicklable_builder(self, tmp_path):
+        results = generate_children({"web": lambda: Pipeline()}, str(tmp_path), max_workers=2)
+        assert not results[0].ok
+
+
+class TestAddChildPipelines:
+    def test_trigger_jobs(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        parent = Pipeline()
+        parent.add_child_pipelines(
+            builders("web", "api"),
+            stage="deploy",
+            snapshot=EnvironmentSnapshot.simulate(CI="true", CI_COMMIT_REF_SLUG="feature", CI_JOB_NAME="generate"),
+        )
+        assert [job.name for job in parent.jobs] == ["trigger-web", "trigger-api"]
+        assert parent.render()["trigger-api"] == {
+            "stage": "deploy",
+            "trigger": {
+                "include": [{"artifact": "children/api.yml", "job": "generate"}],
+                "strategy": "depend",
+            },
+        }
+        assert (tmp_path / "children" / "api.yml").exists()
+
+    def test_artifact_job_required(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        parent = Pipeline()
+        with pytest.raises(ValueError, match="artifact_job"):
+            parent.add_child_pipelines(builders("web"), snapshot=SNAPSHOT)
+        assert not (tmp_path / "children").exists()
+
+        parent.add_child_pipelines(builders("web"), artifact_job="generate", snapshot=SNAPSHOT)
+        assert parent.render()["trigger-web"]["trigger"]["include"][0]["job"] == "generate"
+
+    def test_absolute_directory(self, tmp_path):
+        with pytest.raises(ValueError, match="relative"):
+            Pipeline().add_child_pipelines(
+                builders("web"), directory=str(tmp_path), artifact_job="generate", snapshot=SNAPSHOT
+            )
+
+    def test_failure(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        parent = Pipeline()
+        with pytest.raises(ChildPipelineError) as error:
+            parent.add_child_pipelines(builders("web", "broken"), artifact_job="generate", snapshot=SNAPSHOT)
+        assert list(error.value.failures) == ["broken"]
+        assert parent.jobs == []
+
+
+class TestTriggerJob:
+    def test_script_not_allowed(self):
+        with pytest.raises(ScriptArgumentNotAllowedError):
+            TriggerJob(name="trigger", artifact="child.yml", job="generate", script="make")
+
+    def test_derive(self):
+        job = TriggerJob(name="trigger", artifact="child.yml", job="generate", strategy=None)
+        assert job.derive("other").render() == {
+            "trigger": {"include": [{"artifact": "child.yml", "job": "generate"}]}
+        }
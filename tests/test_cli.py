@@ -0,0 +1,124 @@
+import subprocess
+import sys
+
+import nay
+import pytest
+import yaml
+from nay import cli
+from nay.core.job import Job
+from nay.core.loader import loads
+from nay.core.need import Need
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule
+
+
+def pipeline():
+    return Pipeline(variables={"GLOBAL": "value"}).add_children(
+        Job(name="build", stage="build", script="make build"),
+        Job(
+            name="test",
+            stage="test",
+            script="make test",
+            needs=[Need(job="build")],
+            rules=[Rule(if_statement='$CI_COMMIT_BRANCH == "main"')],
+        ),
+    )
+
+
+class TestLazyImports:
+    def test_attributes(self):
+        from nay.core import job, pipeline
+
+        assert nay.Pipeline is pipeline.Pipeline
+        assert nay.core.Job is job.Job
+        assert nay.core.loader.__name__ == "nay.core.loader"
+        assert "Pipeline" in dir(nay)
+
+    def test_unknown_attribute(self):
+        with pytest.raises(AttributeError):
+            nay.Nothing
+        with pytest.raises(AttributeError):
+            nay.core.Nothing
+
+    def test_version_imports(self):
+        code = (
+            "import sys; from nay.cli import main\n"
+            "try:\n    main(['--version'])\nexcept SystemExit:\n    pass\n"
+            "print(' '.join(sorted(sys.modules)))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        modules = output.splitlines()[-1].split()
+
+        assert output.startswith(f"nay {nay.__version__}")
+        assert not {"copy", "dataclasses", "yaml", "nay.core.pipeline"} & set(modules)
+
+
+class TestGenerate:
+    def test_stdout(self, capsys):
+        assert cli.main(["generate", "tests.test_cli:pipeline"]) == 0
+        assert capsys.readouterr().out == pipeline().to_yaml()
+
+    def test_output(self, tmp_path):
+        path = tmp_path / ".gitlab-ci.yml"
+        assert cli.main(["generate", "tests.test_cli:pipeline", "-o", str(path)]) == 0
+        assert path.read_text() == pipeline().to_yaml()
+
+    def test_invalid_reference(self, capsys):
+        assert cli.main(["generate", "tests.test_cli"]) == 2
+        assert "module:function" in capsys.readouterr().err
+
+
+class TestValidate:
+    def test_valid(self, tmp_path, capsys):
+        path = tmp_path / ".gitlab-ci.yml"
+        path.write_text(pipeline().to_yaml())
+        assert cli.main(["validate", str(path)]) == 0
+        assert cli.main(["validate", "tests.test_cli:pipeline"]) == 0
+        assert "is valid" in capsys.readouterr().out
+
+    def test_errors(self):
+        loaded = loads(
+            "a:\n  script: [x]\n  needs: [b, missing]\n"
+            "b:\n  script: [x]\n  needs: [a]\n"
+            "c:\n  script: [x]\n  rules:\n    - if: $A ==\n"
+            "  variables:\n    X: $Y\n    Y: $X\n"
+        )
+        errors = cli.validate(loaded)
+
+        assert "a: needs the unknown job 'missing'" in errors
+        assert any(error.startswith("the needs form a cycle") for error in errors)
+        assert any(error.startswith("c: ") for error in errors)
+        assert len(errors) == 4
+
+    def test_exit_code(self, tmp_path, capsys):
+        path = tmp_path / ".gitlab-ci.yml"
+        path.write_text(yaml.safe_dump({"a": {"script": ["x"], "needs": ["b"]}}))
+        assert cli.main(["validate", str(path)]) == 1
+        assert "unknown job 'b'" in capsys.readouterr().err
+
+    def test_unsupported_keys(self, tmp_path, capsys):
+        path = tmp_path / ".gitlab-ci.yml"
+        path.write_text(yaml.safe_dump({"a": {"script": ["x"], "needs": [{"job": "b", "optional": True}]}}))
+        assert cli.main(["validate", str(path)]) == 2
+        assert "a: needs:optional" in capsys.readouterr().err
+
+
+class TestDiff:
+    def test_exit_code(self, tmp_path, capsys):
+        path = tmp_path / ".gitlab-ci.yml"
+        path.write_text(pipeline().to_yaml())
+        assert cli.main(["diff", str(path), "tests.test_cli:pipeline"]) == 0
+
+        path.write_text(pipeline().to_yaml().replace("make test", "pytest"))
+        assert cli.main(["diff", str(path), "tests.test_cli:pipeline"]) == 1
+        assert "~ test" in capsys.readouterr().out
+
+
+class TestImportTime:
+    def test_report(self, capfd):
+        assert cli.main(["--import-time", "--version"]) == 0
+        captured = capfd.readouterr()
+        assert f"nay {nay.__version__}" in captured.out
+        assert "ms  nay.cli" in captured.err
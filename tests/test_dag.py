@@ -0,0 +1,66 @@
+import pytest
+from nay.core.dag import NeedsGraph
+from nay.core.exceptions import CyclicNeedsError, UnknownNeedError
+from nay.core.job import Job
+from nay.core.need import Need
+from nay.core.pipeline import Pipeline
+
+
+def job(name, *needs, **kwargs):
+    return Job(name=name, script="true", needs=[Need(job=need, **kwargs) for need in needs])
+
+
+@pytest.fixture
+def graph():
+    pipeline = Pipeline().add_children(
+        job("build"),
+        job("lint"),
+        job("test", "build"),
+        job("package", "build", "build"),
+        job("deploy", "test", "package", "lint"),
+    )
+    return pipeline.needs_graph()
+
+
+class TestNeedsGraph:
+    def test_edges(self, graph):
+        assert len(graph) == 5
+        assert graph.edge_count == 5
+        assert graph.needs("deploy") == ["test", "package", "lint"]
+        assert graph.needed_by("build") == ["test", "package"]
+
+    def test_topological_order(self, graph):
+        assert graph.topological_order() == ["build", "lint", "test", "package", "deploy"]
+
+    def test_critical_path(self, graph):
+        assert graph.critical_path({"build": 5, "test": 2, "package": 3}) == (9.0, ["build", "package", "deploy"])
+        assert graph.longest_chain() == ["build", "test", "deploy"]
+
+    def test_cycle(self):
+        graph = NeedsGraph([job("a", "c"), job("b", "a"), job("c", "b"), job("d")])
+        assert graph.find_cycle() == ["a", "b", "c", "a"]
+        with pytest.raises(CyclicNeedsError) as error:
+            graph.topological_order()
+        assert error.value.path == ["a", "b", "c", "a"]
+
+    def test_dangling(self):
+        graph = NeedsGraph([job("a", "missing"), job("b", "a")])
+        assert graph.dangling == {"a": ["missing"]}
+        with pytest.raises(UnknownNeedError):
+            graph.validate()
+
+    def test_ignores_cross_project_needs(self):
+        graph = NeedsGraph([job("a", "other", project="group/project"), Job(name="b", script="true")])
+        assert graph.edge_count == 0
+        graph.validate()
+
+    def test_empty(self):
+        graph = NeedsGraph([])
+        assert graph.topological_order() == []
+        assert graph.critical_path() == (0.0, [])
+
+    def test_large_chain(self):
+        jobs = [job("job-0")] + [job(f"job-{index}", f"job-{index - 1}") for index in range(1, 10000)]
+        graph = NeedsGraph(jobs)
+        assert graph.find_cycle() is None
+        assert len(graph.longest_chain()) == 10000
@@ -0,0 +1,120 @@
+import yaml
+
+from nay.core.diff import diff, main
+from nay.core.image import Image
+from nay.core.job import Job
+from nay.core.loader import loads
+from nay.core.need import Need
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule, When
+
+ON_MAIN = Rule(if_statement='$CI_COMMIT_BRANCH == "main"')
+
+
+def build(**overrides):
+    jobs = {
+        "build": Job(name="build", script=["make"], stage="build", rules=[ON_MAIN]),
+        "test": Job(
+            name="test",
+            script=["make test"],
+            stage="test",
+            image=Image(name="python", tag="3.11"),
+            rules=[ON_MAIN],
+            needs=[Need(job="build")],
+        ),
+    }
+    jobs.update(overrides)
+    pipeline = Pipeline(variables={"GLOBAL": "value"})
+    pipeline.add_children(*(job for job in jobs.values() if job is not None))
+    return pipeline
+
+
+class TestDiff:
+    def test_identical(self):
+        result = diff(build(), build())
+        assert not result
+        assert result.summary() == "0 added, 0 removed, 0 changed"
+
+    def test_job_order_is_ignored(self):
+        pipeline = build()
+        reordered = yaml.safe_load(pipeline.to_yaml())
+        reordered = {key: reordered[key] for key in reversed(list(reordered))}
+        assert not diff(pipeline, reordered)
+
+    def test_added_and_removed(self):
+        result = diff(build(), build(build=None, lint=Job(name="lint", script=["x"])))
+        assert result.added == ["lint"]
+        assert result.removed == ["build"]
+        assert result.changed == {}
+
+    def test_changed_fields(self):
+        changed = build().jobs[1].derive(
+            "test",
+            image=Image(name="python", tag="3.12"),
+            rules=[ON_MAIN, Rule(if_statement="$NIGHTLY", when=When.MANUAL)],
+        )
+        result = diff(build(), build(test=changed))
+        assert list(result.changed) == ["test"]
+        image, rules = result.changed["test"]
+        assert (image.field, image.before, image.after) == (
+            "image",
+            {"name": "python:3.11"},
+            {"name": "python:3.12"},
+        )
+        assert rules.field == "rules"
+        assert rules.removed == []
+        assert rules.added == [
+            {"if": "$NIGHTLY", "when": "manual", "allow_failure": False}
+        ]
+        assert "~ test" in result.summary()
+
+    def test_globals(self):
+        after = build()
+        after.variables["GLOBAL"] = "other"
+        result = diff(build(), after)
+        assert [change.field for change in result.globals] == ["variables"]
+        assert result.changed == {}
+
+    def test_value_shared_between_depths(self):
+        shared = {"A": {"value": "1", "description": "shared"}}
+        before = {"variables": shared, "job": {"script": ["x"], "variables": shared}}
+        after = {"variables": {"A": {"value": "1", "description": "shared"}}, "job": {"script": ["x"], "variables": {"A": {"value": "1", "description": "shared"}}}}
+        assert not diff(before, after)
+        assert not diff(after, before)
+
+    def test_loaded(self):
+        document = (
+            ".base:\n  stage: test\n  artifacts: {paths: [dist]}\n"
+            "job:\n  extends: .base\n  script: [make]\n"
+        )
+        changed = document.replace("dist", "build")
+        assert not diff(loads(document), loads(document))
+        result = diff(loads(document), loads(changed))
+        assert [change.field for change in result.changed["job"]] == ["artifacts"]
+
+    def test_loaded_short_forms(self):
+        document = (
+            "variables:\n  NUMBER: 3\n"
+            "build:\n  image: node:20\n  script: make build\n  rules: []\n"
+            "test:\n  image: {name: 'python:3.11'}\n  script: [make test]\n  needs: [build]\n"
+            "  rules:\n    - if: $CI_COMMIT_BRANCH\n"
+        )
+        loaded = loads(document)
+        assert not diff(loaded, loaded.to_pipeline())
+        assert not diff(loads(loaded.to_pipeline().to_yaml()), loaded)
+
+    def test_loaded_keys_which_are_not_built(self):
+        document = "build:\n  script: [x]\ntest:\n  script: [x]\n  needs: [{job: build, optional: true}]\n"
+        loaded = loads(document)
+        result = diff(loaded.to_pipeline(strict=False), loaded)
+        assert [change.field for change in result.changed["test"]] == ["needs"]
+
+
+class TestMain:
+    def test_files(self, tmp_path, capsys):
+        before, after = tmp_path / "before.yml", tmp_path / "after.yml"
+        build().write_yaml(str(before))
+        build(build=None).write_yaml(str(after))
+        assert main([str(before), str(before)]) == 0
+        assert main([str(before), str(after)]) == 1
+        assert "- build" in capsys.readouterr().out
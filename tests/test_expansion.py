@@ -0,0 +1,111 @@
+import pytest
+from nay.core.exceptions import VariableCycleError
+from nay.core.expansion import VariableExpander, VariableScope
+from nay.core.job import Job
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule, When
+
+
+class TestVariableScope:
+    def test_expand(self):
+        scope = VariableScope({"A": "$B-${C}", "B": "b", "C": "${B}c"})
+        assert scope["A"] == "b-bc"
+        assert scope.as_dict() == {"A": "b-bc", "B": "b", "C": "bc"}
+
+    def test_literal_dollar_and_undefined(self):
+        scope = VariableScope({"A": "$$B costs $$5", "B": "$MISSING!", "C": "$"})
+        assert scope["A"] == "$B costs $5"
+        assert scope["B"] == "!"
+        assert scope["C"] == "$"
+
+    def test_precedence(self):
+        scope = VariableScope({"A": "$B", "B": "global"}).child({"B": "job"})
+        assert scope["A"] == "job"
+        assert scope.parent["A"] == "global"
+        assert scope.raw("A") == "$B"
+        assert scope.raw("MISSING") is None
+
+    def test_self_reference(self):
+        scope = VariableScope({"PATH": "/usr/bin"}).child({"PATH": "$PATH:/opt/bin"})
+        assert scope["PATH"] == "/usr/bin:/opt/bin"
+        assert VariableScope({"PATH": "$PATH:/opt/bin"})["PATH"] == ":/opt/bin"
+
+    def test_cycle(self):
+        scope = VariableScope({"A": "$B", "B": "${C}", "C": "x$A"})
+        with pytest.raises(VariableCycleError) as error:
+            scope["A"]
+        assert error.value.chain == ["A", "B", "C", "A"]
+
+    def test_mapping(self):
+        scope = VariableScope({"A": "1", "B": "2"}).child({"B": "3", "C": "$A"})
+        assert list(scope) == ["A", "B", "C"]
+        assert len(scope) == 3
+        assert "C" in scope and "D" not in scope
+        assert scope.get("D") is None
+        with pytest.raises(KeyError):
+            scope["D"]
+
+    def test_expand_text(self):
+        scope = VariableScope({"NAME": "world"})
+        assert scope.expand("echo hello ${NAME}$UNSET") == "echo hello world"
+
+    def test_memoized_in_parent(self):
+        base = VariableScope({"A": "$B", "B": "b", "C": "c"})
+        child = base.child({"C": "other"})
+        assert child["A"] == "b"
+        assert child._expanded["A"] is base._expanded["A"]
+
+    def test_children_are_shared(self):
+        base = VariableScope({"A": "a"})
+        assert base.child({"B": "b"}) is base.child({"B": "b"})
+        assert base.child({}) is base
+
+
+class TestVariableExpander:
+    @pytest.fixture
+    def pipeline(self):
+        pipeline = Pipeline(
+            variables={"REGISTRY": "registry.example.com", "IMAGE": "$REGISTRY/$APP:$CI_COMMIT_REF_SLUG"}
+        )
+        pipeline.add_children(
+            Job(name="build", script=["make"], variables={"APP": "api"}),
+            Job(name="docs", script=["make docs"]),
+        )
+        return pipeline
+
+    def test_job(self, pipeline):
+        expander = VariableExpander(pipeline, predefined={"CI_COMMIT_REF_SLUG": "main"})
+        assert expander.job(pipeline.jobs[0])["IMAGE"] == "registry.example.com/api:main"
+        assert expander.job(pipeline.jobs[1])["IMAGE"] == "registry.example.com/:main"
+        assert expander.globals["REGISTRY"] == "registry.example.com"
+
+    def test_rule_and_overrides(self, pipeline):
+        rule = Rule(if_statement="$DEPLOY", variables={"APP": "web"})
+        expander = VariableExpander(
+            pipeline, overrides={"CI_COMMIT_REF_SLUG": "feature"}
+        )
+        scope = expander.job(pipeline.jobs[0], rule=rule)
+        assert scope["IMAGE"] == "registry.example.com/web:feature"
+
+    def test_expand_all(self, pipeline):
+        expanded = VariableExpander(pipeline).expand_all()
+        assert expanded["build"]["IMAGE"] == "registry.example.com/api:"
+        assert list(expanded) == ["build", "docs"]
+
+
+class TestEvaluateRulesExpanded:
+    def test_references_are_expanded(self):
+        pipeline = Pipeline(variables={"TARGET": "$CI_COMMIT_BRANCH"})
+        pipeline.add_children(
+            Job(
+                name="deploy",
+                script=["deploy"],
+                rules=[Rule(if_statement='$TARGET == "main"')],
+            )
+        )
+        assert pipeline.evaluate_rules({"CI_COMMIT_BRANCH": "main"}) == {
+            "deploy": When.ON_SUCCESS
+        }
+        assert pipeline.evaluate_rules({"CI_COMMIT_BRANCH": "dev"}) == {
+            "deploy": When.NEVER
+        }
@@ -0,0 +1,101 @@
+import pytest
+from nay.core.exceptions import ExpressionSyntaxError
+from nay.core.expressions import compile_expression, evaluate_rules
+from nay.core.job import Job
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule, When
+from nay.core.variables import EnvironmentSnapshot
+
+PUSH_TO_MAIN = {"CI_COMMIT_BRANCH": "main", "CI_PIPELINE_SOURCE": "push", "EMPTY": ""}
+
+
+class TestCompileExpression:
+    @pytest.mark.parametrize(
+        "expression, expected",
+        [
+            ('$CI_COMMIT_BRANCH == "main"', True),
+            ("$CI_COMMIT_BRANCH == 'develop'", False),
+            ('${CI_COMMIT_BRANCH} != "main"', False),
+            ("$CI_COMMIT_BRANCH", True),
+            ("$EMPTY", False),
+            ("$UNDEFINED", False),
+            ("$UNDEFINED == null", True),
+            ("$EMPTY == null", False),
+            ('$EMPTY == ""', True),
+            ("$CI_COMMIT_BRANCH =~ /^MA/i", True),
+            ("$CI_COMMIT_BRANCH =~ /^release\\/.*$/", False),
+            ("$UNDEFINED =~ /.*/", False),
+            ("$UNDEFINED !~ /.*/", True),
+            ("$CI_COMMIT_BRANCH == $CI_COMMIT_BRANCH", True),
+            ('$CI_COMMIT_TAG || $CI_COMMIT_BRANCH == "main" && $CI_PIPELINE_SOURCE == "push"', True),
+            ('($CI_COMMIT_TAG || $CI_COMMIT_BRANCH == "main") && $CI_PIPELINE_SOURCE == "web"', False),
+            ('$CI_PIPELINE_SOURCE == "web" || $CI_PIPELINE_SOURCE == "push" && $UNDEFINED', False),
+        ],
+    )
+    def test_evaluate(self, expression, expected):
+        assert compile_expression(expression)(PUSH_TO_MAIN) is expected
+
+    def test_regex_in_variable(self):
+        predicate = compile_expression("$CI_COMMIT_BRANCH =~ $PATTERN")
+        assert predicate({"CI_COMMIT_BRANCH": "release/1.0", "PATTERN": "/^release\\/.*/"})
+        assert not predicate({"CI_COMMIT_BRANCH": "main", "PATTERN": "/^release/"})
+        assert not predicate({"CI_COMMIT_BRANCH": "main", "PATTERN": "no regex"})
+
+    def test_cached(self):
+        assert compile_expression("$CI_COMMIT_TAG") is compile_expression("$CI_COMMIT_TAG")
+
+    @pytest.mark.parametrize(
+        "expression",
+        ["", "$A ==", "$A == (", '($A == "a"', "$A = 1", "/regex/", "$A =~ 'text'", "$A =~ /[/", "KLOCWORK_ISSUES > 5"],
+    )
+    def test_syntax_error(self, expression):
+        with pytest.raises(ExpressionSyntaxError):
+            compile_expression(expression)
+
+
+class TestEvaluateRules:
+    def test_first_matching_rule(self):
+        rules = [Rule(if_statement="$CI_COMMIT_TAG", when=When.MANUAL), Rule(if_statement="$CI_COMMIT_BRANCH")]
+        assert evaluate_rules(rules, PUSH_TO_MAIN) == When.ON_SUCCESS
+        assert evaluate_rules(rules, {"CI_COMMIT_TAG": "v1"}) == When.MANUAL
+        assert evaluate_rules(rules, {}) == When.NEVER
+
+    def test_no_rules(self):
+        assert evaluate_rules([], {}) == When.ON_SUCCESS
+
+    def test_pipeline(self):
+        on_main = Rule(if_statement='$CI_COMMIT_BRANCH == "main"')
+        pipeline = Pipeline(variables={"DEPLOY": "yes"}).add_children(
+            Job(name="build", script="make"),
+            Job(name="release", script="release", rules=[on_main.never(), Rule(when=When.MANUAL)]),
+            Job(name="deploy", script="deploy", rules=[Rule(if_statement='$DEPLOY == "yes"')]),
+            Job(name="skip", script="true", variables={"DEPLOY": "no"}, rules=[Rule(if_statement='$DEPLOY == "yes"')]),
+        )
+        assert pipeline.evaluate_rules(PUSH_TO_MAIN) == {
+            "build": When.ON_SUCCESS,
+            "release": When.NEVER,
+            "deploy": When.ON_SUCCESS,
+            "skip": When.NEVER,
+        }
+        assert pipeline.evaluate_rules({"CI_COMMIT_BRANCH": "feature", "DEPLOY": "no"})["release"] == When.MANUAL
+
+    def test_pipeline_with_snapshot(self):
+        pipeline = Pipeline().add_children(
+            Job(name="main", script="make", rules=[Rule(if_statement='$CI_COMMIT_BRANCH == "main"')]),
+        )
+        snapshot = EnvironmentSnapshot.simulate(CI="true", CI_COMMIT_BRANCH="main")
+        assert pipeline.evaluate_rules(snapshot) == {"main": When.ON_SUCCESS}
+
+    def test_snapshot_variables(self):
+        deploy = Rule(if_statement='$DEPLOY_ENV == "prod"')
+        pipeline = Pipeline().add_children(
+            Job(name="deploy", script="deploy", rules=[deploy]),
+            Job(name="override", script="deploy", variables={"DEPLOY_ENV": "dev"}, rules=[deploy]),
+            Job(name="slug", script="true", rules=[Rule(if_statement="$CI_COMMIT_REF_SLUG")]),
+        )
+        snapshot = EnvironmentSnapshot(environ={"DEPLOY_ENV": "prod"})
+        assert pipeline.evaluate_rules(snapshot) == {
+            "deploy": When.ON_SUCCESS,
+            "override": When.NEVER,
+            "slug": When.NEVER,
+        }
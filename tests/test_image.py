@@ -1,5 +1,7 @@
 import pytest
-from nay.core.image import Image
+import pickle
+
+from nay.core.image import FrozenImage, Image
 
 class TestImage:
     def test_valid_init(self):
@@ -48,6 +50,67 @@ class TestImage:
         image2 = Image(name="sonarqube:latest", tag="v2", entrypoint=["/start.sh"])
         assert not image1._equals(image2)
 
+    def test_hash_dedup(self):
+        images = [Image(name="python", tag="3.11"), Image(name="python:3.11"), Image(name="python", tag="3.12")]
+        assert len(set(images)) == 2
+
+    def test_fingerprint_invalidated_by_assignment(self):
+        image = Image(name="python", tag="3.11")
+        fingerprint = image.fingerprint
+        image.tag = "3.12"
+        assert image.fingerprint != fingerprint
+        assert image == Image(name="python:3.12")
+
+    def test_render_cached_until_modified(self):
+        image = Image(name="python")
+        rendered = image.render()
+        assert image.render() is rendered
+        image.tag = "3.12"
+        assert image.render() == {"name": "python:3.12"}
+
+    def test_with_tag_keeps_original(self):
+        original_image = Image(name="python", tag="3.11")
+        original_image.with_tag("3.12")
+        assert original_image.tag == "3.11"
+
+    def test_with_tag_copies_entrypoint(self):
+        original_image = Image(name="python", tag="3.11", entrypoint=["/bin/sh"])
+        modified_image = original_image.with_tag("3.12")
+        modified_image.entrypoint.append("-c")
+        assert original_image.entrypoint == ["/bin/sh"]
+
+
+class TestFrozenImage:
+    def test_interned(self):
+        image = FrozenImage("python", "3.11", ["/bin/sh"])
+        assert FrozenImage("python", "3.11", ("/bin/sh",)) is image
+        assert image.with_tag("3.12").with_tag("3.11") is image
+        assert Image(name="python", tag="3.11", entrypoint=["/bin/sh"]).freeze() is image
+
+    def test_immutable(self):
+        image = FrozenImage("python")
+        with pytest.raises(AttributeError):
+            image.tag = "3.12"
+        assert not hasattr(image, "__dict__")
+
+    def test_structural_sharing(self):
+        image = FrozenImage("python", entrypoint=["/bin/sh", "-c"])
+        assert image.with_tag("3.12").entrypoint is image.entrypoint
+
+    def test_equals_mutable_image(self):
+        image = Image(name="python", entrypoint=["/bin/sh"])
+        assert FrozenImage("python", entrypoint=["/bin/sh"]) == image
+        assert len({image, image.freeze()}) == 1
+
+    def test_render(self):
+        image = FrozenImage("python", "3.11").with_entrypoint("/bin/sh")
+        assert image.render() == {"name": "python:3.11", "entrypoint": ["/bin/sh"]}
+        assert image.thaw().render() == image.render()
+
+    def test_pickle_reinterns(self):
+        image = FrozenImage("python", "3.11")
+        assert pickle.loads(pickle.dumps(image)) is image
+
 # Run the tests with pytest
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,173 @@
+import os
+
+import pytest
+from nay.core.exceptions import IncludeError
+from nay.core.includes import IncludeResolver, ParseCache
+
+
+def write(directory, files):
+    for name, content in files.items():
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+@pytest.fixture
+def repository(tmp_path):
+    write(
+        tmp_path / "repo",
+        {
+            ".gitlab-ci.yml": (
+                "include:\n"
+                "  - local: ci/base.yml\n"
+                "  - ci/jobs/*.yml\n"
+                "  - remote: https://example.com/shared/lint.yml\n"
+                "  - project: group/templates\n"
+                "    ref: v1\n"
+                "    file: [/deploy.yml]\n"
+                "variables:\n"
+                "  LEVEL: main\n"
+            ),
+            "ci/base.yml": (
+                "include: /ci/common.yml\n"
+                "variables:\n"
+                "  LEVEL: base\n"
+                "  BASE: 'true'\n"
+            ),
+            "ci/common.yml": ".common:\n  image: python:3.11\n",
+            "ci/jobs/build.yml": "build:\n  extends: .common\n  script: [make]\n",
+            "ci/jobs/test.yml": (
+                "include: ci/common.yml\n"
+                "test:\n  extends: .common\n  script: [make test]\n"
+            ),
+        },
+    )
+    write(
+        tmp_path / "mirror",
+        {
+            "example.com/shared/lint.yml": "lint:\n  script: [make lint]\n",
+            "group/templates/v1/deploy.yml": "deploy:\n  script: [make deploy]\n",
+        },
+    )
+    return tmp_path
+
+
+@pytest.fixture
+def resolver(repository):
+    return IncludeResolver(
+        repository / "repo", mirror=repository / "mirror", cache=ParseCache()
+    )
+
+
+class TestIncludeResolver:
+    def test_resolve(self, resolver):
+        config = resolver.resolve()
+        assert "include" not in config
+        assert config["variables"] == {"LEVEL": "main", "BASE": "true"}
+        assert list(config) == [
+            ".common",
+            "variables",
+            "build",
+            "test",
+            "lint",
+            "deploy",
+        ]
+
+    def test_load(self, resolver):
+        loaded = resolver.load()
+        assert list(loaded) == ["build", "test", "lint", "deploy"]
+        assert loaded["build"].image.name == "python:3.11"
+
+    def test_cache(self, repository):
+        cache = ParseCache()
+        resolver = IncludeResolver(
+            repository / "repo", mirror=repository / "mirror", cache=cache
+        )
+        resolver.resolve()
+        assert (cache.hits, cache.misses) == (0, 7)
+        resolver.resolve()
+        assert (cache.hits, cache.misses) == (7, 7)
+
+    def test_cache_invalidated(self, repository, resolver):
+        resolver.resolve()
+        path = repository / "repo" / "ci" / "common.yml"
+        path.write_text(".common:\n  image: python:3.12-slim\n")
+        os.utime(path, ns=(0, 0))
+        assert resolver.resolve()[".common"]["image"] == "python:3.12-slim"
+
+    def test_own_project(self, repository):
+        write(
+            repository / "own",
+            {
+                ".gitlab-ci.yml": "include:\n  project: group/own\n  file: ci.yml\n",
+                "ci.yml": "job:\n  script: [x]\n",
+            },
+        )
+        resolver = IncludeResolver(
+            repository / "own", project="group/own", cache=ParseCache()
+        )
+        assert list(resolver.load()) == ["job"]
+
+    def test_local_include_of_other_project(self, tmp_path):
+        write(
+            tmp_path / "repo",
+            {
+                ".gitlab-ci.yml": "include:\n  project: group/tools\n  file: ci/tools.yml\n",
+                "ci/common.yml": ".common:\n  image: repo\n",
+            },
+        )
+        write(
+            tmp_path / "mirror",
+            {
+                "group/tools/ci/tools.yml": "include:\n  local: ci/common.yml\ntool:\n  extends: .common\n  script: [x]\n",
+                "group/tools/ci/common.yml": ".common:\n  image: tools\n",
+            },
+        )
+        resolver = IncludeResolver(tmp_path / "repo", mirror=tmp_path / "mirror", cache=ParseCache())
+        assert resolver.load()["tool"].image.name == "tools"
+
+    def test_sequential(self, repository):
+        resolver = IncludeResolver(
+            repository / "repo",
+            mirror=repository / "mirror",
+            max_workers=1,
+            cache=ParseCache(),
+        )
+        assert "deploy" in resolver.resolve()
+
+
+class TestIncludeErrors:
+    def test_missing_file(self, tmp_path):
+        write(tmp_path, {".gitlab-ci.yml": "include: missing.yml\n"})
+        with pytest.raises(IncludeError, match="does not exist") as error:
+            IncludeResolver(tmp_path, cache=ParseCache()).resolve()
+        assert error.value.location == "missing.yml"
+        assert error.value.chain == [".gitlab-ci.yml"]
+
+    def test_circular(self, tmp_path):
+        write(
+            tmp_path,
+            {
+                ".gitlab-ci.yml": "include: a.yml\n",
+                "a.yml": "include: b.yml\n",
+                "b.yml": "include: a.yml\n",
+            },
+        )
+        with pytest.raises(IncludeError, match="circular") as error:
+            IncludeResolver(tmp_path, cache=ParseCache()).resolve()
+        assert error.value.chain == [".gitlab-ci.yml", "a.yml", "b.yml", "a.yml"]
+
+    def test_no_mirror(self, tmp_path):
+        write(tmp_path, {".gitlab-ci.yml": "include: https://example.com/a.yml\n"})
+        with pytest.raises(IncludeError, match="no mirror"):
+            IncludeResolver(tmp_path, cache=ParseCache()).resolve()
+
+    def test_outside_of_repository(self, tmp_path):
+        write(tmp_path, {".gitlab-ci.yml": "include: ../outside.yml\n"})
+        with pytest.raises(IncludeError, match="outside"):
+            IncludeResolver(tmp_path, cache=ParseCache()).resolve()
+
+    def test_not_a_mapping(self, tmp_path):
+        write(tmp_path, {".gitlab-ci.yml": "include: a.yml\n", "a.yml": "- x\n"})
+        with pytest.raises(IncludeError, match="mapping"):
+            IncludeResolver(tmp_path, cache=ParseCache()).resolve()
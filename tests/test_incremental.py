@@ -0,0 +1,100 @@
+import os
+
+import pytest
+from nay.core import incremental
+from nay.core.image import Image
+from nay.core.incremental import regenerate
+from nay.core.job import Job
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule
+from nay.core.variables import EnvironmentSnapshot
+
+SNAPSHOT = EnvironmentSnapshot.simulate(CI_COMMIT_REF_SLUG="main")
+
+
+def build(version="3.11"):
+    pipeline = Pipeline()
+    pipeline.add_children(
+        Job(name="lint", script="flake8", image=Image(name="python", tag=version)),
+        Job(name="test", script="pytest", rules=[Rule(if_statement="$CI_COMMIT_TAG")]),
+    )
+    return pipeline
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "web.yml"), str(tmp_path / "api.yml"), str(tmp_path / "cache.json")
+
+
+def run(outputs, cache, **kwargs):
+    kwargs.setdefault("snapshot", SNAPSHOT)
+    return regenerate(outputs, cache_path=cache, **kwargs)
+
+
+class TestRegenerate:
+    def test_skips_unchanged(self, paths):
+        web, api, cache = paths
+        report = run({web: build(), api: build()}, cache)
+        assert report.written == [web, api]
+        assert report.changed_jobs[web] == ["lint", "test"]
+        mtime = os.stat(web).st_mtime_ns
+
+        report = run({web: build(), api: build("3.12")}, cache)
+        assert report.skipped == [web]
+        assert report.written == [api]
+        assert report.changed_jobs[api] == ["lint"]
+        assert os.stat(web).st_mtime_ns == mtime
+
+    def test_environment_invalidates(self, paths):
+        web, _, cache = paths
+        run({web: build()}, cache, environment=["CI_COMMIT_REF_SLUG"])
+        report = run(
+            {web: build()},
+            cache,
+            environment=["CI_COMMIT_REF_SLUG"],
+            snapshot=EnvironmentSnapshot.simulate(CI_COMMIT_REF_SLUG="feature"),
+        )
+        assert report.unchanged == [web]
+
+    def test_per_run_variables_are_not_hashed(self, paths):
+        web, _, cache = paths
+        run({web: build()}, cache, snapshot=EnvironmentSnapshot.simulate(CI="true", CI_PIPELINE_ID="1"))
+        report = run({web: build()}, cache, snapshot=EnvironmentSnapshot.simulate(CI="true", CI_PIPELINE_ID="2"))
+        assert report.skipped == [web]
+
+    def test_modified_file_is_restored(self, paths):
+        web, _, cache = paths
+        run({web: build()}, cache)
+        expected = open(web).read()
+        with open(web, "w") as stream:
+            stream.write("edited: true\n")
+
+        assert run({web: build()}, cache).written == [web]
+        assert open(web).read() == expected
+
+    def test_check(self, paths):
+        web, _, cache = paths
+        report = run({web: build()}, cache, check=True)
+        assert report.changed
+        assert not os.path.exists(web)
+        assert not os.path.exists(cache)
+
+        run({web: build()}, cache)
+        assert run({web: build("3.12")}, cache, check=True).written == [web]
+        assert build().to_yaml() == open(web).read()
+
+
+def pipelines():
+    return {os.environ["NAY_TEST_OUTPUT"]: build()}
+
+
+class TestMain:
+    def test_check_exit_code(self, paths, monkeypatch, capsys):
+        web, _, cache = paths
+        monkeypatch.setenv("NAY_TEST_OUTPUT", web)
+        arguments = ["tests.test_incremental:pipelines", "--cache", cache]
+
+        assert incremental.main([*arguments, "--check"]) == 1
+        assert "would write" in capsys.readouterr().out
+        assert incremental.main(arguments) == 0
+        assert incremental.main([*arguments, "--check"]) == 0
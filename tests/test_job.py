@@ -0,0 +1,97 @@
+import pytest
+from nay.core.image import Image
+from nay.core.job import Job
+from nay.core.need import Need
+from nay.core.rules import Rule, When
+
+
+class TestJob:
+    def test_valid_init(self):
+        job = Job(name="build", script="make", stage="build", image="python:3.11")
+        assert job.name == "build"
+        assert job.scripts == ["make"]
+        assert job.image == Image(name="python:3.11")
+        assert job.needs is None
+
+    def test_empty_name(self):
+        with pytest.raises(ValueError):
+            Job(name="", script="make")
+
+    def test_scripts(self):
+        job = Job(name="build", script=["make"])
+        job.prepend_scripts("cd src").append_scripts("make install")
+        assert job.scripts == ["cd src", "make", "make install"]
+
+    def test_rules(self):
+        on_main = Rule(if_statement='$CI_COMMIT_BRANCH == "main"')
+        job = Job(name="build", script="make", rules=[on_main])
+        job.prepend_rules(on_main.never()).append_rules(Rule(when=When.MANUAL))
+        assert [rule._when for rule in job.rules] == [When.NEVER, When.ON_SUCCESS, When.MANUAL]
+
+    def test_render(self):
+        job = Job(
+            name="deploy",
+            script="deploy.sh",
+            stage="deploy",
+            image=Image(name="alpine", tag="3.18"),
+            rules=[Rule(if_statement="$CI_COMMIT_TAG")],
+            needs=[Need(job="build")],
+            variables={"ENV": "prod"},
+            tags=["docker"],
+        )
+        assert job.render() == {
+            "stage": "deploy",
+            "image": {"name": "alpine:3.18"},
+            "variables": {"ENV": "prod"},
+            "tags": ["docker"],
+            "rules": [{"if": "$CI_COMMIT_TAG", "when": "on_success", "allow_failure": False}],
+            "needs": [{"job": "build", "artifacts": True}],
+            "script": ["deploy.sh"],
+        }
+
+    def test_render_empty_needs(self):
+        job = Job(name="lint", script="flake8", needs=[])
+        assert job.render()["needs"] == []
+
+    def test_render_reuses_cached_keywords(self):
+        rule = Rule(if_statement="$CI_COMMIT_TAG")
+        job = Job(name="deploy", script="deploy.sh", rules=[rule])
+        assert job.render()["rules"][0] is rule.render()
+        rule.add_variables(FOO="bar")
+        assert job.render()["rules"][0]["variables"] == {"FOO": "bar"}
+
+
+class TestDerive:
+    def test_shares_lists(self):
+        rules = [Rule(if_statement="$CI_COMMIT_TAG")]
+        template = Job(name=".test", script="pytest", image="python:3.11", rules=rules)
+        job = template.derive("test")
+        assert job.name == "test"
+        assert job.rules is template.rules
+        assert job.scripts is template.scripts
+        assert job.image is template.image
+        assert job.render() == template.render()
+
+    def test_copy_on_write(self):
+        template = Job(name=".test", script="pytest", variables={"A": "1"}, needs=[])
+        job = template.derive("test")
+        job.prepend_scripts("pip install .").append_rules(Rule(when=When.MANUAL))
+        job.add_variables(B="2").add_needs(Need(job="build")).add_tags("docker")
+        assert template.scripts == ["pytest"]
+        assert template.rules == []
+        assert template.variables == {"A": "1"}
+        assert template.needs == []
+        assert template.tags == []
+        assert job.variables == {"A": "1", "B": "2"}
+
+    def test_overrides(self):
+        template = Job(name=".test", script="pytest", stage="test", image="python:3.11")
+        job = template.derive("lint", script=["flake8"], image=None, stage="lint")
+        assert (job.scripts, job.image, job.stage) == (["flake8"], None, "lint")
+        with pytest.raises(ValueError):
+            template.derive("")
+
+    def test_slots(self):
+        job = Job(name="build", script="make")
+        with pytest.raises(AttributeError):
+            job.unknown = True
@@ -0,0 +1,218 @@
+import textwrap
+
+import pytest
+from nay.core.exceptions import UnsupportedKeywordError
+from nay.core.image import Image
+from nay.core.loader import load, loads
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+from nay.core.optimize import expand
+from nay.core.rules import Rule, When
+
+DOCUMENT = textwrap.dedent(
+    """
+    stages: [build, test]
+
+    variables:
+      GLOBAL: value
+      NUMBER: 3
+
+    default:
+      image: python:3.11
+      tags: [docker]
+
+    .rules: &rules
+      rules:
+        - if: $CI_COMMIT_BRANCH == "main"
+        - if: $CI_PIPELINE_SOURCE == "merge_request_event"
+          when: manual
+          allow_failure: true
+          changes:
+            paths: ["src/**/*"]
+
+    .setup:
+      script:
+        - make setup
+
+    .base:
+      <<: *rules
+      stage: test
+      variables:
+        LEVEL: base
+
+    build:
+      stage: build
+      image:
+        name: node:20
+        entrypoint: [""]
+      script: [make build]
+      artifacts:
+        paths: [dist]
+
+    test:
+      extends: .base
+      variables:
+        SUITE:
+          value: unit
+          description: The test suite
+      parallel:
+        matrix:
+          - PYTHON: ["3.11", "3.12"]
+      needs:
+        - build
+        - job: lint
+          artifacts: false
+      script:
+        - !reference [.setup, script]
+        - make test
+
+    lint:
+      extends: .base
+      inherit:
+        default: false
+      needs: []
+      script: make lint
+    """
+)
+
+
+@pytest.fixture
+def loaded():
+    return loads(DOCUMENT)
+
+
+class TestLoad:
+    def test_jobs(self, loaded):
+        assert list(loaded) == ["build", "test", "lint"]
+        assert len(loaded) == 3
+        assert loaded.stages == ["build", "test"]
+        assert loaded.variables == {"GLOBAL": "value", "NUMBER": "3"}
+
+    def test_lazy(self, loaded):
+        assert loaded.built == []
+        loaded["lint"]
+        assert loaded.built == ["lint"]
+        assert loaded["lint"] is loaded["lint"]
+
+    def test_unknown_job(self, loaded):
+        with pytest.raises(KeyError):
+            loaded[".base"]
+        with pytest.raises(KeyError):
+            loaded["stages"]
+
+    def test_job(self, loaded):
+        job = loaded["test"]
+        assert job.stage == "test"
+        assert job.image == Image(name="python:3.11")
+        assert job.scripts == ["make setup", "make test"]
+        assert job.variables == {"LEVEL": "base", "SUITE": "unit"}
+        assert job.tags == ["docker"]
+        assert job.needs == [Need(job="build"), Need(job="lint", artifacts=False)]
+        assert job.matrix == Matrix({"PYTHON": ["3.11", "3.12"]})
+        assert job.rules == [
+            Rule(if_statement='$CI_COMMIT_BRANCH == "main"'),
+            Rule(
+                if_statement='$CI_PIPELINE_SOURCE == "merge_request_event"',
+                when=When.MANUAL,
+                allow_failure=True,
+                changes=["src/**/*"],
+            ),
+        ]
+
+    def test_image_entrypoint(self, loaded):
+        assert loaded["build"].image == Image(name="node:20", entrypoint=[""])
+
+    def test_inherit_default(self, loaded):
+        job = loaded["lint"]
+        assert job.image is None
+        assert job.tags == []
+        assert job.needs == []
+        assert job.scripts == ["make lint"]
+
+    def test_shared_keywords(self, loaded):
+        assert loaded["test"].rules[0] is loaded["lint"].rules[0]
+
+    def test_unsupported(self, loaded):
+        assert loaded.unsupported("build") == {"artifacts": {"paths": ["dist"]}}
+        assert loaded.unsupported("test") == {}
+
+    def test_dropped(self):
+        loaded = loads(
+            "job:\n  script: [x]\n  image: {name: alpine, pull_policy: always}\n"
+            "  needs: [{job: a, optional: true}, b, {job: c, optional: false}]\n"
+            "  rules:\n    - if: $A\n      when: delayed\n      start_in: 1 hour\n"
+            "sharded:\n  script: [x]\n  parallel: 3\n"
+            "a:\n  script: [x]\n"
+        )
+        assert loaded.dropped("job") == {
+            "image:pull_policy": ["always"],
+            "needs:optional": [True, False],
+            "rules:start_in": ["1 hour"],
+        }
+        assert loaded.dropped("sharded") == {"parallel": [3]}
+        rules = loads(
+            "job:\n  script: [x]\n  rules:\n    - if: $A\n      allow_failure: {exit_codes: [137]}\n"
+            "      changes: {paths: [src/*], compare_to: main}\n    - exists: {paths: [Dockerfile]}\n"
+        )
+        assert rules.dropped("job") == {
+            "rules:allow_failure:exit_codes": [[137]],
+            "rules:changes:compare_to": ["main"],
+        }
+        assert loaded.dropped("a") == {}
+
+        with pytest.raises(UnsupportedKeywordError) as error:
+            loaded.to_pipeline()
+        assert error.value.keywords == {
+            "job": ["image:pull_policy", "needs:optional", "rules:start_in"],
+            "sharded": ["parallel"],
+        }
+        assert "needs:optional" in str(error.value)
+        assert len(loaded.to_pipeline(strict=False).jobs) == 3
+
+    def test_round_trip(self, loaded):
+        rendered = loaded.to_pipeline().render()
+        expected = expand(loads(DOCUMENT).config)
+        for name in ("test", "lint"):
+            assert rendered[name]["script"] == (
+                ["make setup", "make test"] if name == "test" else ["make lint"]
+            )
+            assert rendered[name]["stage"] == expected[name]["stage"]
+        assert rendered["variables"] == {"GLOBAL": "value", "NUMBER": "3"}
+
+    def test_stage_order(self):
+        document = (
+            "stages: [build, test, deploy]\n"
+            "deploy:\n  stage: deploy\n  script: [x]\n"
+            "build:\n  stage: build\n  script: [x]\n"
+        )
+        pipeline = loads(document).to_pipeline()
+        assert pipeline.stages == ["build", "test", "deploy"]
+        assert loads(pipeline.to_yaml()).stages == ["build", "test", "deploy"]
+
+    def test_load_file(self, tmp_path):
+        path = tmp_path / ".gitlab-ci.yml"
+        path.write_text(DOCUMENT)
+        assert list(load(path)) == ["build", "test", "lint"]
+        with open(path) as stream:
+            assert list(load(stream)) == ["build", "test", "lint"]
+
+
+class TestLoadErrors:
+    def test_not_a_mapping(self):
+        with pytest.raises(ValueError):
+            loads("- job")
+
+    def test_unknown_reference(self):
+        loaded = loads("job:\n  script: [!reference [.missing, script]]\n")
+        with pytest.raises(ValueError, match="unknown job"):
+            loaded["job"]
+
+    def test_unknown_reference_key(self):
+        loaded = loads(".a:\n  script: [x]\njob:\n  script: !reference [.a, nope]\n")
+        with pytest.raises(ValueError, match="unknown key"):
+            loaded["job"]
+
+    def test_circular_extends(self):
+        loaded = loads("a:\n  extends: b\n  script: [x]\nb:\n  extends: a\n")
+        with pytest.raises(ValueError, match="Circular"):
+            loaded["a"]
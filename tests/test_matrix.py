@@ -0,0 +1,142 @@
+import pytest
+from nay.core.image import Image
+from nay.core.job import Job
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule
+
+
+@pytest.fixture
+def matrix():
+    return Matrix(
+        {"PROVIDER": "aws", "STACK": ["monitoring", "app1", "app2"]},
+        {"PROVIDER": ["gcp", "vultr"], "STACK": ["data", "processing"]},
+    )
+
+
+class TestMatrix:
+    def test_variants(self, matrix):
+        assert len(matrix) == 7
+        assert list(matrix)[:2] == [
+            {"PROVIDER": "aws", "STACK": "monitoring"},
+            {"PROVIDER": "aws", "STACK": "app1"},
+        ]
+        assert [matrix[index] for index in range(len(matrix))] == list(matrix)
+        assert matrix[-1] == {"PROVIDER": "vultr", "STACK": "processing"}
+        with pytest.raises(IndexError):
+            matrix[7]
+
+    def test_index(self, matrix):
+        for index, variables in enumerate(matrix):
+            assert matrix.index(variables) == index
+        assert matrix.index({"PROVIDER": "aws", "STACK": "data"}) is None
+        assert matrix.index({"PROVIDER": "aws"}) is None
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            Matrix()
+        with pytest.raises(ValueError):
+            Matrix({})
+        with pytest.raises(ValueError):
+            Matrix({"STACK": []})
+
+    def test_render(self, matrix):
+        assert matrix.render() == [
+            {"PROVIDER": "aws", "STACK": ["monitoring", "app1", "app2"]},
+            {"PROVIDER": ["gcp", "vultr"], "STACK": ["data", "processing"]},
+        ]
+        assert matrix == Matrix(*matrix.render())
+        assert hash(matrix) == hash(Matrix(*matrix.render()))
+
+
+class TestJobMatrix:
+    def test_variants_share_keywords(self, matrix):
+        rule = Rule(if_statement="$CI_COMMIT_TAG")
+        job = Job(
+            name="deploy",
+            script="deploy.sh",
+            image=Image(name="alpine"),
+            rules=[rule],
+            needs=[Need(job="build")],
+            variables={"ENV": "prod"},
+            matrix=matrix,
+        )
+        variants = job.variants()
+        first = next(variants)
+        assert first.name == "deploy: [aws, monitoring]"
+        assert first.variables == {"ENV": "prod", "PROVIDER": "aws", "STACK": "monitoring"}
+        assert first.matrix is None
+        assert first.rules is job.rules
+        assert first.needs is job.needs
+        assert first.image is job.image
+        assert len(list(variants)) == 6
+
+    def test_render(self, matrix):
+        job = Job(name="deploy", script="deploy.sh", matrix=matrix)
+        assert job.render()["parallel"] == {"matrix": matrix.render()}
+
+    def test_without_matrix(self):
+        job = Job(name="build", script="make")
+        assert list(job.variants()) == [job]
+
+
+class TestPipelineMatrix:
+    def test_expand_matrix(self, matrix):
+        pipeline = Pipeline()
+        pipeline.add_children(
+            Job(name="build", script="make"),
+            Job(name="deploy", script="deploy.sh", matrix=matrix),
+        )
+        assert list(pipeline.render()) == ["build", "deploy"]
+
+        rendered = pipeline.render(expand_matrix=True)
+        assert len(rendered) == 8
+        assert rendered["deploy: [gcp, data]"]["variables"] == {"PROVIDER": "gcp", "STACK": "data"}
+        assert "parallel" not in rendered["deploy: [gcp, data]"]
+
+    def test_expand_matrix_needs(self, matrix):
+        selected = Matrix({"STACK": "data", "PROVIDER": ["gcp", "vultr"]})
+        pipeline = Pipeline()
+        pipeline.add_children(
+            Job(name="build", script="make", matrix=Matrix({"ARCH": ["amd64", "arm64"]})),
+            Job(name="deploy", script="deploy.sh", matrix=matrix, needs=[Need(job="build")]),
+            Job(
+                name="verify",
+                script="verify.sh",
+                needs=[Need(job="deploy", parallel=selected, artifacts=False), Need(job="lint")],
+            ),
+        )
+        rendered = pipeline.render(expand_matrix=True)
+
+        assert rendered["deploy: [aws, app1]"]["needs"] == [
+            {"job": "build: [amd64]", "artifacts": True},
+            {"job": "build: [arm64]", "artifacts": True},
+        ]
+        assert rendered["verify"]["needs"] == [
+            {"job": "deploy: [gcp, data]", "artifacts": False},
+            {"job": "deploy: [vultr, data]", "artifacts": False},
+            {"job": "lint", "artifacts": True},
+        ]
+        assert pipeline.render()["verify"]["needs"][0]["job"] == "deploy"
+
+    def test_needs_graph(self, matrix):
+        selected = Matrix({"PROVIDER": "gcp", "STACK": ["data", "processing"]})
+        pipeline = Pipeline()
+        pipeline.add_children(
+            Job(name="deploy", script="deploy.sh", matrix=matrix),
+            Job(name="verify", script="verify.sh", needs=[Need(job="deploy", parallel=selected)]),
+            Job(name="report", script="report.sh", needs=[Need(job="deploy")]),
+            Job(
+                name="missing",
+                script="true",
+                needs=[Need(job="deploy", parallel=Matrix({"PROVIDER": "azure", "STACK": "data"}))],
+            ),
+        )
+        graph = pipeline.needs_graph(expand_matrix=True)
+        assert len(graph) == 10
+        assert graph.needs("verify") == ["deploy: [gcp, data]", "deploy: [gcp, processing]"]
+        assert len(graph.needs("report")) == 7
+        assert graph.dangling == {"missing": ["deploy: [azure, data]"]}
+
+        assert pipeline.needs_graph().needs("verify") == ["deploy"]
@@ -1,4 +1,5 @@
 import pytest
+from nay.core.matrix import Matrix
 from nay.core.need import Need
 from nay.core.variables import PredefinedVariables
 
@@ -59,3 +60,34 @@ class TestNeed:
         need1 = Need(job="my_job1", project="my_project", ref="main", artifacts=False)
         need2 = Need(job="my_job2", project="my_project", ref="main", artifacts=False)
         assert not need1._equals(need2)
+
+    def test_hash_dedup(self):
+        needs = [Need(job="a"), Need(job="a"), Need(job="a", artifacts=False), Need(pipeline="other")]
+        assert len(set(needs)) == 3
+        assert Need(job="a") in {Need(job="a"): None}
+
+    def test_equals_none(self):
+        assert not Need(job="a")._equals(None)
+
+
+    def test_with_artifacts(self):
+        need = Need(job="build", project="group/tools", ref="stable")
+        assert need.with_artifacts(False) == Need(job="build", project="group/tools", ref="stable", artifacts=False)
+        assert need.artifacts is True
+
+
+class TestNeedParallel:
+    def test_render(self):
+        matrix = Matrix({"PROVIDER": "aws", "STACK": ["app1", "app2"]})
+        need = Need(job="deploy", parallel=matrix)
+        assert need.render() == {
+            "job": "deploy",
+            "artifacts": True,
+            "parallel": {"matrix": [{"PROVIDER": "aws", "STACK": ["app1", "app2"]}]},
+        }
+        assert need != Need(job="deploy")
+        assert need == Need(job="deploy", parallel=Matrix(*matrix.render()))
+
+    def test_requires_job(self):
+        with pytest.raises(ValueError):
+            Need(pipeline="other/project", parallel=Matrix({"A": "1"}))
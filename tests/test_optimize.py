@@ -0,0 +1,197 @@
+import pytest
+import yaml
+from nay.core.image import Image
+from nay.core.job import Job
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+from nay.core.optimize import ArtifactPolicy, deep_merge, expand, factor, is_job, reduce_needs, resolve_extends
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule
+
+
+@pytest.fixture
+def pipeline():
+    on_main = Rule(if_statement='$CI_COMMIT_BRANCH == "main"')
+    on_mr = Rule(if_statement='$CI_PIPELINE_SOURCE == "merge_request_event"')
+    pipeline = Pipeline()
+    for index in range(10):
+        pipeline.add_children(
+            Job(
+                name=f"job-{index}",
+                script=["make", f"make test-{index}"],
+                image=Image(name="python", tag="3.11" if index else "3.12"),
+                rules=[on_main, on_mr] if index % 3 else [on_main.never()],
+                needs=[Need(job="job-0")] if index else [],
+            )
+        )
+    return pipeline
+
+
+class TestFactor:
+    def test_bytes_saved(self, pipeline):
+        report = factor(pipeline)
+        assert report.bytes_saved > 0
+        assert report.bytes_after == len(report.yaml.encode())
+        assert report.defaults == ["image"]
+        assert report.templates
+
+    def test_equivalent_after_expansion(self, pipeline):
+        report = factor(pipeline)
+        assert expand(yaml.safe_load(report.yaml)) == pipeline.render()
+
+    def test_default_keeps_overrides(self, pipeline):
+        loaded = yaml.safe_load(factor(pipeline, use_extends=False, use_anchors=False).yaml)
+        assert loaded["default"] == {"image": {"name": "python:3.11"}}
+        assert loaded["job-0"]["image"] == {"name": "python:3.12"}
+        assert "image" not in loaded["job-1"]
+
+    def test_no_default_when_a_job_lacks_the_keyword(self, pipeline):
+        pipeline.add_children(Job(name="no-image", script="true"))
+        report = factor(pipeline, use_extends=False, use_anchors=False)
+        assert report.defaults == []
+        assert "default" not in yaml.safe_load(report.yaml)
+
+    def test_anchors_only(self, pipeline):
+        report = factor(pipeline, use_default=False, use_extends=False)
+        assert report.anchors > 0
+        assert yaml.safe_load(report.yaml) == pipeline.render()
+
+    def test_jobs_with_extends_untouched(self):
+        rendered = {
+            ".base": {"image": "alpine"},
+            "a": {"extends": ".base", "script": ["true"]},
+            "b": {"extends": ".base", "script": ["true"]},
+        }
+        report = factor(rendered, use_anchors=False)
+        assert report.templates == []
+        assert yaml.safe_load(report.yaml) == rendered
+
+
+class TestExpand:
+    def test_extends_and_default(self):
+        config = {
+            "default": {"image": "alpine", "tags": ["docker"]},
+            ".base": {"variables": {"A": "1", "B": "1"}, "script": ["base"]},
+            ".more": {"extends": ".base", "variables": {"B": "2"}},
+            "job": {"extends": [".more"], "script": ["job"], "inherit": {"default": ["image"]}},
+        }
+        assert expand(config) == {
+            "job": {
+                "variables": {"A": "1", "B": "2"},
+                "script": ["job"],
+                "inherit": {"default": ["image"]},
+                "image": "alpine",
+            }
+        }
+
+    def test_circular_extends(self):
+        with pytest.raises(ValueError, match="Circular"):
+            expand({".a": {"extends": ".b"}, ".b": {"extends": ".a"}, "job": {"extends": ".a"}})
+
+    def test_unknown_extends(self):
+        with pytest.raises(ValueError, match="unknown"):
+            expand({"job": {"extends": ".missing"}})
+
+    def test_helpers(self):
+        config = {".base": {"variables": {"A": "1"}, "tags": ["a"]}, "job": {"extends": ".base", "tags": ["b"]}}
+        resolved = {}
+        assert resolve_extends("job", config, resolved) == {"variables": {"A": "1"}, "tags": ["b"]}
+        assert set(resolved) == {".base", "job"}
+        with pytest.raises(ValueError, match="Unknown job 'missing'"):
+            resolve_extends("missing", config, {})
+
+        assert deep_merge({"a": {"b": 1, "c": 2}}, {"a": {"c": 3}}) == {"a": {"b": 1, "c": 3}}
+        assert [key for key, value in config.items() if is_job(key, value)] == ["job"]
+        assert not is_job("variables", {"A": "1"})
+
+
+def reducible_pipeline():
+    return Pipeline().add_children(
+        Job(name="c", script="true"),
+        Job(name="b", script="true", needs=[Need(job="c")]),
+        Job(name="a", script="true", needs=[Need(job="b"), Need(job="c"), Need(job="c", artifacts=False)]),
+        Job(name="d", script="true", needs=[Need(job="a"), Need(job="c", artifacts=False), Need(pipeline="1")]),
+    )
+
+
+class TestReduceNeeds:
+    def test_redundant_edges(self):
+        assert reducible_pipeline().needs_graph().redundant_edges() == [("c", "a"), ("c", "d")]
+
+    def test_keep_artifacts(self):
+        pipeline = reducible_pipeline()
+        report = reduce_needs(pipeline)
+        assert report.removed == [("c", "d")]
+        assert report.duplicates == [("c", "a")]
+        assert report.kept == [("c", "a")]
+        assert report.edges_removed == 1
+        assert report.downloads_removed == 0
+        assert pipeline.get_job("a").render()["needs"] == [
+            {"job": "b", "artifacts": True},
+            {"job": "c", "artifacts": True},
+        ]
+        assert pipeline.get_job("d").render()["needs"] == [{"job": "a", "artifacts": True}, {"pipeline": "1"}]
+
+    def test_demote_artifacts(self):
+        pipeline = reducible_pipeline()
+        report = reduce_needs(pipeline, artifacts=ArtifactPolicy.DEMOTE)
+        assert report.demoted == [("c", "a")]
+        assert report.downloads_removed == 1
+        assert pipeline.get_job("a").render()["needs"][1] == {"job": "c", "artifacts": False}
+
+    def test_drop_artifacts(self):
+        pipeline = reducible_pipeline()
+        report = reduce_needs(pipeline, artifacts=ArtifactPolicy.DROP)
+        assert report.edges_removed == 2
+        assert report.downloads_removed == 1
+        assert pipeline.get_job("a").render()["needs"] == [{"job": "b", "artifacts": True}]
+
+    def test_duplicates_download_artifacts(self):
+        pipeline = Pipeline().add_children(
+            Job(name="c", script="true"),
+            Job(name="a", script="true", needs=[Need(job="c", artifacts=False), Need(job="c")]),
+        )
+        report = reduce_needs(pipeline)
+        assert report.duplicates == [("c", "a")]
+        assert report.removed == []
+        assert pipeline.get_job("a").render()["needs"] == [{"job": "c", "artifacts": True}]
+
+    def test_demote_keeps_parallel(self):
+        aws = Matrix({"PROVIDER": "aws"})
+        pipeline = Pipeline().add_children(
+            Job(name="build", script="true", matrix=Matrix({"PROVIDER": ["aws", "gcp"]})),
+            Job(name="b", script="true", needs=[Need(job="build")]),
+            Job(name="a", script="true", needs=[Need(job="b"), Need(job="build", parallel=aws)]),
+        )
+        report = reduce_needs(pipeline, artifacts=ArtifactPolicy.DEMOTE)
+        assert report.demoted == [("build", "a")]
+        assert pipeline.get_job("a").needs[1] == Need(job="build", parallel=aws, artifacts=False)
+
+    def test_variant_needs(self):
+        aws, gcp = Matrix({"PROVIDER": "aws"}), Matrix({"PROVIDER": "gcp"})
+        pipeline = Pipeline().add_children(
+            Job(name="build", script="true", matrix=Matrix({"PROVIDER": ["aws", "gcp"]})),
+            Job(name="b", script="true", needs=[Need(job="build", parallel=gcp)]),
+            Job(
+                name="a",
+                script="true",
+                needs=[Need(job="b"), Need(job="build", parallel=aws), Need(job="build", parallel=gcp)],
+            ),
+        )
+        report = reduce_needs(pipeline)
+        assert report.duplicates == []
+        assert report.removed == []
+        assert report.kept == [("build", "a")]
+        assert pipeline.get_job("a").needs == [Need(job="b"), Need(job="build", parallel=aws), Need(job="build", parallel=gcp)]
+
+        reduce_needs(pipeline, artifacts=ArtifactPolicy.DROP)
+        assert pipeline.get_job("a").needs == [Need(job="b"), Need(job="build", parallel=aws)]
+
+    def test_large_graph(self):
+        pipeline = Pipeline()
+        for index in range(2000):
+            needs = [Need(job=f"job-{other}", artifacts=False) for other in range(max(0, index - 10), index)]
+            pipeline.add_children(Job(name=f"job-{index}", script="true", needs=needs))
+        report = reduce_needs(pipeline)
+        assert pipeline.needs_graph().edge_count == 1999
+        assert report.edges_removed == sum(min(index, 10) for index in range(2000)) - 1999
@@ -0,0 +1,57 @@
+import pytest
+from nay.core.image import Image
+from nay.core.job import Job
+from nay.core.need import Need
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = Pipeline(variables={"GLOBAL": "1"})
+    pipeline.add_children(
+        Job(name="build", script="make", stage="build", image=Image(name="gcc")),
+        Job(name="test", script="make test", image=Image(name="gcc"), needs=[Need(job="build")]),
+        Job(name="deploy", script="deploy.sh", stage="deploy", rules=[Rule(if_statement="$CI_COMMIT_TAG")]),
+    )
+    return pipeline
+
+
+class TestPipeline:
+    def test_stages(self, pipeline):
+        assert pipeline.stages == ["build", "test", "deploy"]
+
+    def test_no_stages(self):
+        pipeline = Pipeline().add_children(Job(name="a", script="true"))
+        assert pipeline.stages == []
+        assert "stages" not in pipeline.render()
+
+    def test_given_stages(self):
+        pipeline = Pipeline(stages=["build", "test", "deploy"]).add_children(
+            Job(name="deploy", script="deploy.sh", stage="deploy"),
+            Job(name="lint", script="lint", stage="lint"),
+        )
+        assert pipeline.stages == ["build", "test", "deploy", "lint"]
+        assert Pipeline(stages=["build"]).stages == ["build"]
+
+    def test_duplicate_job(self, pipeline):
+        with pytest.raises(ValueError):
+            pipeline.add_children(Job(name="build", script="true"))
+
+    def test_reserved_job_name(self):
+        with pytest.raises(ValueError):
+            Pipeline().add_children(Job(name="variables", script="true"))
+
+    def test_render(self, pipeline):
+        rendered = pipeline.render()
+        assert list(rendered) == ["stages", "variables", "build", "test", "deploy"]
+        assert rendered["variables"] == {"GLOBAL": "1"}
+        assert rendered["test"]["needs"] == [{"job": "build", "artifacts": True}]
+
+    def test_render_shares_equal_keywords(self):
+        pipeline = Pipeline().add_children(
+            Job(name="a", script="true", rules=[Rule(if_statement="$CI")]),
+            Job(name="b", script="true", rules=[Rule(if_statement="$CI")]),
+        )
+        rendered = pipeline.render()
+        assert rendered["a"]["rules"][0] is rendered["b"]["rules"][0]
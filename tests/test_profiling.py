@@ -0,0 +1,66 @@
+import io
+import json
+
+import pytest
+from nay.core.image import Image
+from nay.core.job import Job
+from nay.core.pipeline import Pipeline
+from nay.core.profiling import profile
+from nay.core.rules import Rule
+from nay.core.variables import PredefinedVariables
+
+
+def build():
+    rule = Rule(if_statement="$CI_COMMIT_TAG")
+    template = Job(name=".build", script="make", image=Image(name="gcc"), rules=[rule])
+    pipeline = Pipeline()
+    pipeline.add_children(*(template.derive(f"build-{index}") for index in range(3)))
+    return pipeline
+
+
+class TestProfile:
+    def test_records_calls(self):
+        with profile() as profiler:
+            pipeline = build()
+            pipeline.write_yaml(io.StringIO())
+            Image(name="gcc")._equals(Image(name="gcc"))
+            PredefinedVariables.CI_PIPELINE_ID
+
+        assert profiler.stats["Job.render"].calls == 3
+        assert profiler.stats["Rule.render"].calls == 1
+        assert profiler.stats["Image._equals"].calls == 1
+        assert profiler.stats["EnvProxy.__get__"].calls == 1
+        assert set(profiler.jobs) == {"build-0", "build-1", "build-2"}
+        assert profiler.templates == {".build": 3}
+
+        write = profiler.stats["Pipeline.write_yaml"]
+        assert write.own <= write.total
+        assert "Job.render" in profiler.summary()
+
+    def test_restores_methods(self):
+        render = Rule.render
+        with profile():
+            assert Rule.render is not render
+        assert Rule.render is render
+
+    def test_single_profiler(self):
+        with profile():
+            with pytest.raises(RuntimeError):
+                with profile():
+                    pass
+
+    def test_chrome_trace(self, tmp_path):
+        with profile() as profiler:
+            build().render()
+        path = tmp_path / "trace.json"
+        profiler.write_chrome_trace(str(path))
+        events = json.loads(path.read_text())["traceEvents"]
+        assert {"Pipeline.render", "Job.render"} <= {event["name"] for event in events}
+        assert all(event["ph"] == "X" for event in events)
+
+    def test_without_trace(self, tmp_path):
+        with profile(trace=False) as profiler:
+            build().render()
+        assert profiler.events == []
+        with pytest.raises(RuntimeError):
+            profiler.write_chrome_trace(str(tmp_path / "trace.json"))
@@ -1,6 +1,6 @@
 import pytest
 from enum import Enum
-from nay.core.rules import Rule, When
+from nay.core.rules import FrozenRule, Rule, When
 
 # Define a fixture for creating a default Rule instance
 @pytest.fixture
@@ -23,6 +23,12 @@ class TestRule:
         new_rule = default_rule.never()
         assert new_rule._when == When.NEVER
 
+    def test_never_keeps_original(self, klocwork_rule):
+        never_rule = klocwork_rule.never()
+        never_rule.add_variables(EXTRA="1")
+        assert klocwork_rule._when == When.ON_FAILURE
+        assert "EXTRA" not in klocwork_rule._variables
+
     def test_add_variables(self, default_rule):
         default_rule.add_variables(KLOCWORK_ISSUES="10", KLOCWORK_SEVERITY="high")
         assert default_rule._variables == {"KLOCWORK_ISSUES": "10", "KLOCWORK_SEVERITY": "high"}
@@ -44,6 +50,36 @@ class TestRule:
         )
         assert not rule1._equals(rule2)
 
+    def test_hash_dedup(self, klocwork_rule):
+        duplicate = Rule(
+            if_statement="KLOCWORK_ISSUES > 5",
+            when=When.ON_FAILURE,
+            allow_failure=True,
+            variables={"KLOCWORK_SEVERITY": "high", "KLOCWORK_ISSUES": "10"},
+        )
+        assert duplicate == klocwork_rule
+        assert len({klocwork_rule, duplicate, klocwork_rule.never()}) == 2
+
+    def test_fingerprint_invalidated_by_add_variables(self, default_rule):
+        other = Rule()
+        assert default_rule == other
+        default_rule.add_variables(FOO="bar")
+        assert default_rule != other
+        assert hash(default_rule) == hash(Rule(variables={"FOO": "bar"}))
+
+    def test_fingerprint_invalidated_by_if_statement(self, default_rule):
+        fingerprint = default_rule.fingerprint
+        default_rule.if_statement = '$CI_COMMIT_BRANCH == "main"'
+        assert default_rule.fingerprint != fingerprint
+        assert default_rule.render()["if"] == '$CI_COMMIT_BRANCH == "main"'
+
+    def test_render_cached_until_modified(self, klocwork_rule):
+        rendered = klocwork_rule.render()
+        assert klocwork_rule.render() is rendered
+        klocwork_rule.add_variables(KLOCWORK_SEVERITY="low")
+        assert klocwork_rule.render() is not rendered
+        assert klocwork_rule.render()["variables"]["KLOCWORK_SEVERITY"] == "low"
+
     def test_render_klocwork_rule(self, klocwork_rule):
         # Render the Klocwork rule
         rendered_rule = klocwork_rule.render()
@@ -59,6 +95,36 @@ class TestRule:
         # Assert that the rendered rule matches the expected rendering
         assert rendered_rule == expected_rendering
 
+class TestFrozenRule:
+    def test_interned(self, klocwork_rule):
+        frozen = klocwork_rule.freeze()
+        assert frozen is klocwork_rule.freeze()
+        assert frozen.never() is frozen.never()
+        assert frozen == klocwork_rule
+        assert frozen.render() == klocwork_rule.render()
+
+    def test_immutable(self):
+        rule = FrozenRule(if_statement='$CI_COMMIT_BRANCH == "main"')
+        with pytest.raises(AttributeError):
+            rule.if_statement = "$CI"
+        assert not hasattr(rule, "__dict__")
+
+    def test_add_variables_returns_new_rule(self):
+        rule = FrozenRule()
+        with_variables = rule.add_variables(FOO="bar")
+        assert with_variables is not rule
+        assert rule.render() == {"when": "on_success", "allow_failure": False}
+        assert with_variables.render()["variables"] == {"FOO": "bar"}
+
+    def test_structural_sharing(self):
+        rule = FrozenRule(changes=["src/**/*"], variables={"FOO": "bar"})
+        never_rule = rule.never()
+        assert never_rule._changes is rule._changes
+        assert never_rule._variables is rule._variables
+
+    def test_thaw(self, klocwork_rule):
+        assert klocwork_rule.freeze().thaw() == klocwork_rule
+
 # Define test cases for the When enum
 class TestWhen:
     def test_enum_values(self):
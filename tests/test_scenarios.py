@@ -0,0 +1,64 @@
+import pytest
+from nay.core.job import Job
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule, When
+from nay.core.scenarios import WHEN_CODES, simulate
+
+SCENARIOS = [
+    {"CI_COMMIT_BRANCH": branch, "CI_PIPELINE_SOURCE": source}
+    for branch in ("main", "feature")
+    for source in ("push", "schedule")
+]
+
+
+@pytest.fixture
+def pipeline():
+    on_main = Rule(if_statement='$CI_COMMIT_BRANCH == "main"')
+    on_schedule = Rule(if_statement='$CI_PIPELINE_SOURCE == "schedule"')
+    return Pipeline().add_children(
+        Job(name="build", script="make"),
+        Job(name="deploy", script="deploy", rules=[on_schedule.never(), on_main]),
+        Job(name="deploy-eu", script="deploy", rules=[on_schedule.never(), on_main]),
+        Job(name="nightly", script="nightly", rules=[on_schedule, Rule(when=When.MANUAL)]),
+        Job(name="dead", script="true", rules=[Rule(if_statement='$CI_COMMIT_BRANCH == "gone"')]),
+    )
+
+
+class TestSimulate:
+    def test_outcomes(self, pipeline):
+        matrix = simulate(pipeline, SCENARIOS)
+        assert matrix.scenario_count == 4
+        assert matrix.outcomes("deploy") == [When.ON_SUCCESS, When.NEVER, When.NEVER, When.NEVER]
+        assert matrix.outcomes("nightly") == [When.MANUAL, When.ON_SUCCESS, When.MANUAL, When.ON_SUCCESS]
+        assert matrix.mask("nightly", When.ON_SUCCESS) == 0b1010
+        assert matrix.scheduled_mask("deploy") == 0b0001
+
+    def test_summaries(self, pipeline):
+        matrix = simulate(pipeline, SCENARIOS)
+        assert matrix.never_scheduled() == ["dead"]
+        assert matrix.always_scheduled() == ["build", "nightly"]
+        assert matrix.identical_rule_sets() == [["deploy", "deploy-eu"]]
+        assert matrix.equivalent_jobs() == [["deploy", "deploy-eu"]]
+
+    def test_matches_single_evaluation(self, pipeline):
+        matrix = simulate(pipeline, SCENARIOS)
+        for index, scenario in enumerate(SCENARIOS):
+            for job, when in pipeline.evaluate_rules(scenario).items():
+                assert matrix.outcome(job, index) == when
+
+    def test_job_variables(self):
+        rule = Rule(if_statement='$TARGET == "prod"')
+        pipeline = Pipeline().add_children(
+            Job(name="prod", script="true", variables={"TARGET": "prod"}, rules=[rule]),
+            Job(name="dev", script="true", variables={"TARGET": "dev"}, rules=[rule]),
+        )
+        matrix = simulate(pipeline, [{}, {"TARGET": "prod"}])
+        assert matrix.outcomes("prod") == [When.ON_SUCCESS, When.ON_SUCCESS]
+        assert matrix.outcomes("dev") == [When.NEVER, When.ON_SUCCESS]
+
+    def test_to_numpy(self, pipeline):
+        numpy = pytest.importorskip("numpy")
+        array = simulate(pipeline, SCENARIOS).to_numpy()
+        assert array.shape == (5, 4)
+        assert WHEN_CODES[array[1, 0]] == When.ON_SUCCESS
+        assert numpy.all(array[4] == WHEN_CODES.index(When.NEVER))
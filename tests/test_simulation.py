@@ -0,0 +1,164 @@
+import random
+
+import pytest
+
+from nay.core.exceptions import CyclicNeedsError
+from nay.core.job import Job
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule, When
+from nay.core.simulation import Simulator, triangular
+
+
+def job(name, stage, needs=None, **kwargs):
+    return Job(
+        name=name,
+        script=["make"],
+        stage=stage,
+        needs=[Need(job=need) for need in needs] if needs is not None else None,
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = Pipeline()
+    pipeline.add_children(
+        job("build", "build"),
+        job("lint", "build"),
+        job("unit", "test", needs=["build"]),
+        job("integration", "test", needs=["build"]),
+        job("deploy", "deploy"),
+    )
+    return pipeline
+
+
+DURATIONS = {"build": 10, "lint": 2, "unit": 5, "integration": 20, "deploy": 3}
+
+
+class TestSimulator:
+    def test_unlimited_runners(self, pipeline):
+        result = Simulator(pipeline, durations=DURATIONS, runners=10).run()
+        assert result.makespan == 33
+        assert result.start == {
+            "build": 0,
+            "lint": 0,
+            "unit": 10,
+            "integration": 10,
+            "deploy": 30,
+        }
+        assert result.critical_path == ["build", "integration", "deploy"]
+        assert result.total_queue_wait == 0
+        assert result.blocked == []
+
+    def test_one_runner(self, pipeline):
+        result = Simulator(pipeline, durations=DURATIONS, runners=1).run()
+        assert result.makespan == sum(DURATIONS.values())
+        assert result.start["lint"] == 10
+        assert result.queue_wait["lint"] == 10
+        assert result.utilization == {"default": 1.0}
+
+    def test_needs_do_not_wait_for_stage(self):
+        pipeline = Pipeline()
+        pipeline.add_children(
+            job("slow", "build"),
+            job("fast", "build"),
+            job("next", "test", needs=["fast"]),
+        )
+        result = Simulator(
+            pipeline, durations={"slow": 100, "fast": 1, "next": 1}, runners=2
+        ).run()
+        assert result.start["next"] == 1
+        assert result.critical_path == ["slow"]
+
+    def test_rules(self, pipeline):
+        pipeline.jobs[-1].append_rules(Rule(if_statement='$CI_COMMIT_BRANCH == "main"'))
+        simulator = Simulator(pipeline, durations=DURATIONS, runners=10)
+        assert "deploy" not in simulator.jobs
+        simulator = Simulator(
+            pipeline,
+            durations=DURATIONS,
+            runners=10,
+            variables={"CI_COMMIT_BRANCH": "main"},
+        )
+        assert "deploy" in simulator.jobs
+
+    def test_manual_blocks_needs(self, pipeline):
+        outcomes = {"build": When.MANUAL}
+        result = Simulator(
+            pipeline, durations=DURATIONS, runners=10, outcomes=outcomes
+        ).run()
+        assert "build" not in result.start
+        assert result.blocked == ["unit", "integration", "deploy"]
+
+        result = Simulator(
+            pipeline,
+            durations=DURATIONS,
+            runners=10,
+            outcomes=outcomes,
+            run_manual=True,
+        ).run()
+        assert result.blocked == []
+
+    def test_pools(self, pipeline):
+        pipeline.jobs[1].add_tags("docker")
+        result = Simulator(
+            pipeline, durations=DURATIONS, runners=1, pools={"docker": 1}
+        ).run()
+        assert result.start["lint"] == 0
+        assert set(result.utilization) == {"default", "docker"}
+
+    def test_matrix_variants(self):
+        pipeline = Pipeline()
+        pipeline.add_children(
+            Job(name="test", script=["x"], matrix=Matrix({"PY": ["3.11", "3.12"]}))
+        )
+        simulator = Simulator(pipeline, durations={"test: [3.12]": 5}, runners=1)
+        assert simulator.jobs == ["test: [3.11]", "test: [3.12]"]
+        assert simulator.run().makespan == 65
+
+    def test_cycle(self):
+        pipeline = Pipeline()
+        pipeline.add_children(job("a", "test", ["b"]), job("b", "test", ["a"]))
+        with pytest.raises(CyclicNeedsError):
+            Simulator(pipeline)
+
+    def test_cycle_through_stages(self):
+        pipeline = Pipeline()
+        pipeline.add_children(job("build", "build", ["deploy"]), job("deploy", "deploy", None))
+        with pytest.raises(CyclicNeedsError) as error:
+            Simulator(pipeline)
+        assert error.value.path == ["build", "stage build", "deploy", "build"]
+
+    def test_no_runners(self, pipeline):
+        with pytest.raises(ValueError):
+            Simulator(pipeline, runners=0)
+
+
+class TestMonteCarlo:
+    def test_distributions(self, pipeline):
+        simulator = Simulator(
+            pipeline,
+            durations={
+                **DURATIONS,
+                "integration": (5, 10, 40),
+                "unit": lambda rng: rng.uniform(1, 30),
+            },
+            runners=10,
+        )
+        result = simulator.monte_carlo(200, seed=1)
+        assert len(result.makespans) == 200
+        assert 18 <= min(result.makespans) <= result.percentile(90) <= 53
+        assert result.critical["build"] == 1.0
+        assert result.critical["deploy"] == 1.0
+        assert 0 < result.critical["integration"] < 1
+        assert result == simulator.monte_carlo(200, seed=1)
+
+    def test_triangular(self):
+        draw = triangular(1, 2, 3)
+        assert all(1 <= draw(random.Random(seed)) <= 3 for seed in range(20))
+
+    def test_runs(self, pipeline):
+        with pytest.raises(ValueError):
+            Simulator(pipeline).monte_carlo(0)
@@ -0,0 +1,206 @@
+import pickle
+import struct
+
+import pytest
+from nay import cli
+from nay.core import snapshot
+from nay.core.exceptions import SnapshotError
+from nay.core.image import FrozenImage, Image
+from nay.core.job import Job, TriggerJob
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule, When
+from nay.core.snapshot import Snapshot, dumps, loads
+
+ON_MAIN = Rule(if_statement='$CI_COMMIT_BRANCH == "main"', variables={"ENV": "prod"})
+ON_MERGE_REQUEST = Rule(
+    if_statement='$CI_PIPELINE_SOURCE == "merge_request_event"',
+    when=When.MANUAL,
+    allow_failure=True,
+    changes=["src/**/*"],
+).freeze()
+
+
+def build(jobs=3):
+    template = Job(
+        name=".test",
+        script=["make setup", "make test"],
+        stage="test",
+        image=FrozenImage("python", "3.11"),
+        rules=[ON_MAIN, ON_MERGE_REQUEST],
+        tags=["docker"],
+    )
+    pipeline = Pipeline(variables={"GLOBAL": "value", "EMPTY": ""})
+    pipeline.add_children(
+        Job(
+            name="build",
+            stage="build",
+            script="make build",
+            image=Image("node", "20", entrypoint=[""]),
+            matrix=Matrix({"PROVIDER": ["aws", "gcp"], "STACK": "app"}),
+            needs=[],
+        ),
+        *(
+            template.derive(
+                f"test-{index}",
+                needs=[
+                    Need("build", parallel=Matrix({"PROVIDER": "aws", "STACK": "app"})),
+                    Need(pipeline="other/project"),
+                ],
+            ).add_variables(SHARD=str(index))
+            for index in range(jobs)
+        ),
+        TriggerJob(
+            name="deploy",
+            artifact="child.yml",
+            job="build",
+            needs=[Need("lint", project="group/tools", ref="stable", artifacts=False)],
+        ),
+    )
+    return pipeline
+
+
+class TestRoundTrip:
+    def test_render(self):
+        pipeline = build()
+        loaded = loads(dumps(pipeline))
+        assert loaded.render() == pipeline.render()
+        assert loaded.render(expand_matrix=True) == pipeline.render(expand_matrix=True)
+        assert loaded.to_yaml() == pipeline.to_yaml()
+
+    def test_stages(self):
+        pipeline = Pipeline(stages=["build", "test", "deploy"]).add_children(
+            Job(name="deploy", stage="deploy", script="deploy.sh")
+        )
+        assert loads(dumps(pipeline)).stages == ["build", "test", "deploy"]
+        with Snapshot(dumps(pipeline)) as loaded:
+            assert loaded.stages == ["build", "test", "deploy"]
+
+    def test_types(self):
+        loaded = loads(dumps(build()))
+        test = loaded.get_job("test-0")
+        assert type(loaded.get_job("deploy")) is TriggerJob
+        assert type(test.rules[0]) is Rule
+        assert test.rules[1] is ON_MERGE_REQUEST
+        assert test.image is FrozenImage("python", "3.11")
+        assert type(loaded.get_job("build").image) is Image
+        assert loaded.get_job("build").needs == []
+        assert (
+            loads(dumps(Pipeline().add_children(Job(name="job", script="x"))))
+            .get_job("job")
+            .needs
+            is None
+        )
+
+    def test_shared_objects(self):
+        loaded = loads(dumps(build()))
+        first, second = loaded.get_job("test-0"), loaded.get_job("test-1")
+        assert first.rules is second.rules
+        assert first.scripts is second.scripts
+        assert first.needs[0] is second.needs[0]
+        assert first.variables is not second.variables
+
+    def test_compact(self):
+        pipeline = build(1000)
+        assert len(dumps(pipeline)) < len(pickle.dumps(pipeline)) / 2
+
+    def test_unsupported_job(self):
+        class CustomJob(Job):
+            pass
+
+        with pytest.raises(SnapshotError, match="CustomJob"):
+            dumps(Pipeline().add_children(CustomJob(name="job", script="x")))
+
+    def test_non_string_variable(self):
+        with pytest.raises(SnapshotError, match="expected a string"):
+            dumps(Pipeline(variables={"NUMBER": 3}))
+
+
+class TestSnapshot:
+    def test_lazy(self):
+        data = dumps(build())
+        with Snapshot(data) as loaded:
+            assert list(loaded) == ["build", "test-0", "test-1", "test-2", "deploy"]
+            assert loaded.variables == {"GLOBAL": "value", "EMPTY": ""}
+            assert loaded["test-1"] is loaded["test-1"]
+            assert loaded["test-1"].variables == {"SHARD": "1"}
+
+    def test_memory_mapped_file(self, tmp_path):
+        path = tmp_path / "pipeline.nay"
+        pipeline = build()
+        snapshot.dump(pipeline, path)
+        with Snapshot.open(path) as loaded:
+            job = loaded["deploy"]
+        assert job.render() == pipeline.get_job("deploy").render()
+        assert snapshot.load(path).render() == pipeline.render()
+
+    def test_not_a_snapshot(self):
+        with pytest.raises(SnapshotError, match="no pipeline snapshot"):
+            Snapshot(b"stages: [build]\n" * 4)
+
+    def test_version(self):
+        data = bytearray(dumps(build()))
+        struct.pack_into("<H", data, 8, snapshot.FORMAT_VERSION + 1)
+        with pytest.raises(SnapshotError, match="format version"):
+            Snapshot(bytes(data))
+
+    def test_truncated(self, tmp_path):
+        with pytest.raises(SnapshotError, match="truncated"):
+            Snapshot(dumps(build())[:-1])
+        path = tmp_path / "empty.nay"
+        path.write_bytes(b"")
+        with pytest.raises(SnapshotError, match="empty"):
+            Snapshot.open(path)
+
+    @pytest.mark.parametrize(
+        "corrupt, message",
+        [
+            (lambda data: data[:-1], "truncated"),
+            (lambda data: data[:10], "too short"),
+            (lambda data: data[:8] + struct.pack("<H", snapshot.FORMAT_VERSION + 1) + data[10:], "format version"),
+            (lambda data: b"stages: [build]\n" * 4, "no pipeline snapshot"),
+        ],
+        ids=["truncated", "short", "version", "yaml"],
+    )
+    def test_invalid_files(self, tmp_path, corrupt, message):
+        path = tmp_path / "pipeline.nay"
+        path.write_bytes(corrupt(dumps(build())))
+        with pytest.raises(SnapshotError, match=message):
+            Snapshot.open(path)
+        with pytest.raises(SnapshotError, match=message):
+            snapshot.load(path)
+
+
+def pipeline():
+    return build()
+
+
+class TestCli:
+    def test_generate_and_reload(self, tmp_path, capsys):
+        path = tmp_path / "pipeline.nay"
+        assert (
+            cli.main(
+                ["generate", "tests.test_snapshot:pipeline", "--snapshot", str(path)]
+            )
+            == 0
+        )
+        emitted = capsys.readouterr().out
+        assert emitted == build().to_yaml()
+
+        assert cli.main(["generate", str(path)]) == 0
+        assert capsys.readouterr().out == emitted
+        assert cli.main(["diff", str(path), "tests.test_snapshot:pipeline"]) == 0
+        assert cli.main(["validate", str(path)]) == 0
+
+    def test_generate_invalid_files(self, tmp_path, capsys):
+        path = tmp_path / ".gitlab-ci.yml"
+        path.write_text(build().to_yaml())
+        assert cli.main(["generate", str(path)]) == 2
+        assert "is no pipeline snapshot" in capsys.readouterr().err
+
+        path = tmp_path / "pipeline.nay"
+        path.write_bytes(dumps(build())[:-1])
+        assert cli.main(["generate", str(path)]) == 2
+        assert "Invalid pipeline snapshot: the data is truncated" in capsys.readouterr().err
+        assert cli.main(["validate", str(path)]) == 2
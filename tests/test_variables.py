@@ -0,0 +1,103 @@
+import pickle
+import threading
+from collections import ChainMap
+
+import pytest
+from nay.core.need import Need
+from nay.core.variables import EnvironmentSnapshot, EnvProxy, OptionalEnvProxy, PredefinedVariables
+
+
+class TestEnvProxy:
+    def test_not_running_in_pipeline(self, monkeypatch):
+        monkeypatch.delenv("CI", raising=False)
+        monkeypatch.delenv("CI_COMMIT_REF_SLUG", raising=False)
+        assert PredefinedVariables.CI_COMMIT_REF_SLUG == "notRunningInAPipeline"
+
+    def test_running_in_pipeline(self, monkeypatch):
+        monkeypatch.setenv("CI", "true")
+        monkeypatch.setenv("CI_COMMIT_REF_SLUG", "main")
+        monkeypatch.delenv("CI_JOB_NAME", raising=False)
+        assert PredefinedVariables.CI_COMMIT_REF_SLUG == "main"
+        with pytest.raises(KeyError):
+            PredefinedVariables.CI_JOB_NAME
+
+
+class TestEnvironmentSnapshot:
+    def test_resolves_once(self, monkeypatch):
+        monkeypatch.setenv("CI", "true")
+        monkeypatch.setenv("CI_COMMIT_REF_SLUG", "main")
+        snapshot = EnvironmentSnapshot()
+        monkeypatch.setenv("CI_COMMIT_REF_SLUG", "changed")
+        assert snapshot.CI_COMMIT_REF_SLUG == "main"
+        with snapshot:
+            assert PredefinedVariables.CI_COMMIT_REF_SLUG == "main"
+        assert PredefinedVariables.CI_COMMIT_REF_SLUG == "changed"
+
+    def test_overrides(self, monkeypatch):
+        monkeypatch.delenv("CI", raising=False)
+        snapshot = EnvironmentSnapshot({"CI_COMMIT_REF_SLUG": "offline"})
+        assert snapshot["CI_COMMIT_REF_SLUG"] == "offline"
+        assert snapshot["CI_PIPELINE_ID"] == "notRunningInAPipeline"
+
+    def test_simulate_ignores_environ(self, monkeypatch):
+        monkeypatch.setenv("CI_COMMIT_REF_SLUG", "real")
+        snapshot = EnvironmentSnapshot.simulate(CI="true", CI_COMMIT_REF_SLUG="simulated")
+        assert snapshot.CI_COMMIT_REF_SLUG == "simulated"
+        with pytest.raises(KeyError):
+            snapshot.CI_JOB_NAME
+
+    def test_optional_and_custom_proxies(self):
+        class Custom:
+            MY_VAR = EnvProxy("MY_VAR")
+            MY_OPTIONAL = OptionalEnvProxy("MY_OPTIONAL")
+
+        with EnvironmentSnapshot.simulate(CI="true", MY_VAR="value"):
+            assert Custom.MY_VAR == "value"
+            assert Custom.MY_OPTIONAL is None
+
+    def test_need_uses_active_snapshot(self):
+        with EnvironmentSnapshot.simulate(CI="true", CI_PIPELINE_ID="42"):
+            with pytest.raises(ValueError):
+                Need(pipeline="42")
+            assert Need(pipeline="43").render() == {"pipeline": "43"}
+
+    def test_nested_and_thread_local(self):
+        outer = EnvironmentSnapshot.simulate(CI="true", CI_COMMIT_REF_SLUG="outer")
+        inner = EnvironmentSnapshot.simulate(CI="true", CI_COMMIT_REF_SLUG="inner")
+        seen = []
+        with outer:
+            with inner:
+                assert PredefinedVariables.CI_COMMIT_REF_SLUG == "inner"
+                thread = threading.Thread(target=lambda: seen.append(EnvironmentSnapshot.active()))
+                thread.start()
+                thread.join()
+            assert EnvironmentSnapshot.active() is outer
+        assert EnvironmentSnapshot.active() is None
+        assert seen == [None]
+
+    def test_pickle(self):
+        snapshot = EnvironmentSnapshot.simulate(CI="true", CI_COMMIT_REF_SLUG="main")
+        with snapshot:
+            restored = pickle.loads(pickle.dumps(snapshot))
+        assert restored.CI_COMMIT_REF_SLUG == "main"
+
+    def test_mapping(self):
+        snapshot = EnvironmentSnapshot.simulate(CI="true", DEPLOY_ENV="prod")
+        assert "DEPLOY_ENV" in snapshot
+        assert "MISSING" not in snapshot
+        assert dict(snapshot) == {"CI": "true", "DEPLOY_ENV": "prod"}
+        assert len(snapshot) == 2
+        assert ChainMap({}, snapshot).get("MISSING") is None
+
+    def test_empty_snapshot_is_used(self):
+        snapshot = EnvironmentSnapshot.simulate()
+        assert len(snapshot) == 0
+        with snapshot:
+            assert EnvironmentSnapshot.current() is snapshot
+
+    def test_keys(self):
+        environ = {"CI": "true", "CI_JOB_NAME": "build", "DEPLOY_ENV": "prod", "HOME": "/root"}
+        snapshot = EnvironmentSnapshot(environ=environ, keys=["DEPLOY_ENV"])
+        assert dict(snapshot) == {"CI": "true", "CI_JOB_NAME": "build", "DEPLOY_ENV": "prod"}
+        assert snapshot.CI_JOB_NAME == "build"
+        assert "HOME" not in pickle.loads(pickle.dumps(snapshot))
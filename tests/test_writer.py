@@ -0,0 +1,73 @@
+import io
+
+import pytest
+import yaml
+from nay.core import writer
+from nay.core.exceptions import RenderMismatchError
+from nay.core.image import Image
+from nay.core.job import Job
+from nay.core.matrix import Matrix
+from nay.core.need import Need
+from nay.core.pipeline import Pipeline
+from nay.core.rules import Rule, When
+
+
+@pytest.fixture
+def pipeline():
+    on_main = Rule(if_statement='$CI_COMMIT_BRANCH == "main"', variables={"ENV": "ä"})
+    pipeline = Pipeline(variables={"GLOBAL": "1"})
+    for index in range(20):
+        pipeline.add_children(
+            Job(
+                name=f"job {index}: [a, b]",
+                script=["echo 'quoted: value'", "make"],
+                stage="build" if index % 2 else None,
+                image=Image(name="python", tag="3.11"),
+                rules=[on_main, on_main.never(), Rule(when=When.MANUAL, changes=["src/**/*"])],
+                needs=[Need(job=f"job {index - 1}: [a, b]")] if index else [],
+            )
+        )
+    return pipeline
+
+
+class TestWriter:
+    def test_stream_is_byte_identical(self, pipeline):
+        stream = io.StringIO()
+        pipeline.write_yaml(stream, verify=True)
+        assert stream.getvalue() == pipeline.to_yaml()
+
+    def test_no_aliases(self, pipeline):
+        assert "&id" not in pipeline.to_yaml()
+        assert yaml.safe_load(pipeline.to_yaml()) == pipeline.render()
+
+    def test_empty_pipeline(self):
+        stream = io.StringIO()
+        Pipeline().write_yaml(stream, verify=True)
+        assert stream.getvalue() == Pipeline().to_yaml() == "{}\n"
+
+    def test_write_file(self, pipeline, tmp_path):
+        target = tmp_path / ".gitlab-ci.yml"
+        pipeline.write_yaml(target, verify=True)
+        assert target.read_text(encoding="utf-8") == pipeline.to_yaml()
+        assert [path.name for path in tmp_path.iterdir()] == [".gitlab-ci.yml"]
+
+    def test_verify_mismatch_keeps_file(self, pipeline, tmp_path, monkeypatch):
+        target = tmp_path / ".gitlab-ci.yml"
+        target.write_text("old")
+        monkeypatch.setattr(writer, "iter_chunks", lambda items: iter(["changed"]))
+        with pytest.raises(RenderMismatchError):
+            pipeline.write_yaml(target, verify=True)
+        assert target.read_text() == "old"
+        assert [path.name for path in tmp_path.iterdir()] == [".gitlab-ci.yml"]
+
+
+class TestWriteMatrix:
+    def test_expand_matrix(self):
+        pipeline = Pipeline()
+        pipeline.add_children(
+            Job(name="deploy", script="deploy.sh", matrix=Matrix({"STACK": ["a", "b"]}))
+        )
+        stream = io.StringIO()
+        pipeline.write_yaml(stream, verify=True, expand_matrix=True)
+        assert stream.getvalue() == pipeline.to_yaml(expand_matrix=True)
+        assert yaml.safe_load(stream.getvalue())["deploy: [b]"]["variables"] == {"STACK": "b"}